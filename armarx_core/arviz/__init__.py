@@ -14,6 +14,12 @@ from armarx_core.arviz.elements.elements import (
     Text
 )
 from armarx_core.arviz.elements.mesh import Mesh
+from armarx_core.arviz.elements.arrays import (
+    ArrowArray,
+    BoxArray,
+    ElementArray,
+    SphereArray,
+)
 from armarx_core.arviz.layer import Layer
 from armarx_core.arviz.stage import Stage
 from armarx_core.arviz.interaction_feedback import (
@@ -22,3 +28,12 @@ from armarx_core.arviz.interaction_feedback import (
     CommitResult,
 )
 from armarx_core.arviz.client import Client
+from armarx_core.arviz.async_committer import AsyncCommitter
+from armarx_core.arviz.interaction_session import InteractionSession
+from armarx_core.arviz.point_cloud_lod import PointCloudLOD
+from armarx_core.arviz.recording import (
+    ArVizRecorder,
+    ArVizRecordingReader,
+    ArVizReplayer,
+    RecordingClient,
+)
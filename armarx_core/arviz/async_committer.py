@@ -0,0 +1,191 @@
+import logging
+import queue
+import threading
+import time
+
+from typing import Callable, List, Optional, Union
+
+from armarx_core.arviz.client import Client
+from armarx_core.arviz.layer import Layer
+from armarx_core.arviz.layer_mailbox import LayerMailbox
+from armarx_core.arviz.stage import Stage
+from armarx_core.arviz.interaction_feedback import CommitResult, InteractionFeedback
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCommitter:
+    """
+    Commits layers to ArViz from a background thread.
+
+    `commit()` converts the layers to Ice data on the caller's thread (so
+    the elements may be modified right after) and puts them into a mailbox
+    holding one slot per layer. The background thread sends the newest
+    state of each layer, at most `max_rate_hz` times per second. Layers
+    committed several times in between are only sent once.
+
+    Ice data committed as such (e.g. a `viz.data.LayerUpdate`) and arrays
+    set via `PointCloud.cloud` are queued by reference, so they must not
+    be modified after committing.
+
+    The results of the commits are passed to `on_result`, and the received
+    interactions are put into the `interactions` queue. Both happen in the
+    background thread.
+
+    Usage:
+
+    committer = client.start_async(max_rate_hz=30)
+    while running:
+        ...
+        committer.commit(stage)
+        while not committer.interactions.empty():
+            handle(committer.interactions.get())
+    committer.close()
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        max_rate_hz: Optional[float] = 30.0,
+        on_result: Optional[Callable[[CommitResult], None]] = None,
+        max_queued_interactions: int = 1024,
+        start=True,
+    ):
+        """
+        :param client: The client used for committing.
+        :param max_rate_hz: The maximum number of commits sent per second.
+            If None, commits are sent as fast as possible.
+        :param on_result: Called with the result of each commit.
+        :param max_queued_interactions: The size of the `interactions` queue.
+            Interactions arriving when it is full are dropped.
+        """
+        self.client = client
+        self.max_rate_hz = max_rate_hz
+        self.on_result = on_result
+        self.interactions: "queue.Queue[InteractionFeedback]" = queue.Queue(
+            maxsize=max_queued_interactions
+        )
+
+        self._cond = threading.Condition()
+        self._mailbox = LayerMailbox()
+        self._sending = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._last_send_time: Optional[float] = None
+
+        self.num_commits = 0
+        self.num_sent = 0
+        self.num_errors = 0
+        self.num_dropped_interactions = 0
+
+        if start:
+            self.start()
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="ArVizAsyncCommitter", daemon=True)
+        self._thread.start()
+
+    def commit(
+        self,
+        layers_or_stages: Union[None, Layer, Stage, List[Union[Layer, Stage]]] = None,
+        full_resync=False,
+    ):
+        """
+        Queue layers and stages for committing. Does not block on the storage.
+        :param layers_or_stages: Layer(s) or Stage(s) to commit.
+        :param full_resync: See `Client.commit()`.
+        """
+        updates, interaction_layers = self.client._prepare_commit(layers_or_stages)
+        with self._cond:
+            self._mailbox.put(updates, interaction_layers, full_resync)
+            self.num_commits += 1
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all queued commits have been sent.
+        :return: False if the timeout expired before, or if the committer
+            is not running while commits are queued.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._is_idle() or not self._running, timeout)
+            return self._is_idle()
+
+    def close(self, flush=True):
+        """
+        Stop the background thread, sending the queued layers first if
+        `flush` is true and the committer is running.
+        """
+        if flush:
+            self.flush()
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._mailbox.has_pending_work() or not self._running
+                )
+                if not self._running:
+                    return
+
+            # Limit the rate, while further commits may replace the queued ones.
+            if self.max_rate_hz and self._last_send_time is not None:
+                delay = self._last_send_time + 1.0 / self.max_rate_hz - time.monotonic()
+                if delay > 0:
+                    with self._cond:
+                        if self._cond.wait_for(lambda: not self._running, delay):
+                            return
+
+            with self._cond:
+                updates, interaction_layers, full_resync = self._mailbox.take()
+                self._sending = True
+
+            self._last_send_time = time.monotonic()
+            try:
+                self._send(updates, interaction_layers, full_resync)
+            finally:
+                with self._cond:
+                    self._sending = False
+                    self._cond.notify_all()
+
+    def _is_idle(self) -> bool:
+        return not (self._mailbox.has_pending_work() or self._sending)
+
+    def _send(self, updates, interaction_layers, full_resync):
+        try:
+            result = self.client._commit_updates(
+                updates, interaction_layers, full_resync=full_resync
+            )
+        except Exception:
+            self.num_errors += 1
+            logger.exception("Failed to commit to ArViz.")
+            return
+        self.num_sent += 1
+
+        for interaction in result.interactions:
+            try:
+                self.interactions.put_nowait(interaction)
+            except queue.Full:
+                self.num_dropped_interactions += 1
+
+        if self.on_result is not None:
+            try:
+                self.on_result(result)
+            except Exception:
+                logger.exception("Error in ArViz commit result callback.")
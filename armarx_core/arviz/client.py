@@ -1,6 +1,7 @@
 import logging
+import threading
 
-from typing import List, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 from armarx_core import ice_manager
 
@@ -15,6 +16,17 @@ logger = logging.getLogger(__name__)
 class Client:
     """
     An ArViz client.
+
+    If `delta_commits` is true, the client remembers the content hash of
+    each layer it committed, and `commit()` skips layers whose content has
+    not changed since. ArViz replaces a layer as a whole when receiving
+    its update, so a changed layer is always sent completely. Put static
+    and moving elements into different layers to benefit most.
+    If the storage may have lost its state (e.g. after it was restarted),
+    call `commit()` with `full_resync=True` or call `request_full_resync()`.
+
+    Instead of a proxy of the ArViz storage, a local `storage` can be
+    given, e.g. a `armarx_core.arviz.testing.LocalArVizStorage`.
     """
 
     STORAGE_DEFAULT_NAME = "ArVizStorage"
@@ -24,11 +36,20 @@ class Client:
         component: str,
         storage_name=STORAGE_DEFAULT_NAME,
         wait_for_proxy=True,
+        delta_commits=False,
+        storage: Optional[viz.StorageInterface] = None,
     ):
         self.component_name = component
+        self.delta_commits = delta_commits
+
+        # Content hashes of the last committed layers, by component and name.
+        self._committed_hashes: Dict[Tuple[str, str], bytes] = {}
+        self._lock = threading.Lock()
 
         args = (viz.StorageInterfacePrx, storage_name)
-        if wait_for_proxy:
+        if storage is not None:
+            self.storage = storage
+        elif wait_for_proxy:
             self.storage = ice_manager.wait_for_proxy(*args)
         else:
             self.storage = ice_manager.get_proxy(*args)
@@ -49,14 +70,30 @@ class Client:
         else:
             return Stage(self.component_name)
 
+    def request_full_resync(self):
+        """Send all layers with the next commit, even if they did not change."""
+        with self._lock:
+            self._committed_hashes.clear()
+
     def commit(
         self,
         layers_or_stages: Union[None, Layer, Stage, List[Union[Layer, Stage]]] = None,
+        full_resync=False,
     ) -> CommitResult:
         """
         Commit the given layers and stages.
         :param layers_or_stages: Layer(s) or Stage(s) to commit.
+        :param full_resync: If true, send all layers even if delta commits
+            are enabled and they did not change.
         """
+        updates, interaction_layers = self._prepare_commit(layers_or_stages)
+        return self._commit_updates(updates, interaction_layers, full_resync=full_resync)
+
+    def _prepare_commit(
+        self,
+        layers_or_stages: Union[None, Layer, Stage, List[Union[Layer, Stage]]],
+    ) -> Tuple[List[Tuple[viz.data.LayerUpdate, Optional[bytes]]], List[str]]:
+        """Return the layer updates with their content hashes and the interaction layers."""
         if layers_or_stages is None:
             layers_or_stages = []
         try:
@@ -65,9 +102,7 @@ class Client:
             # Single item.
             layers_or_stages = [layers_or_stages]
 
-        input_ = viz.data.CommitInput()
-        input_.updates = sum(map(self._get_layer_updates, layers_or_stages), [])
-        input_.interactionComponent = self.component_name
+        updates = sum(map(self._get_layer_updates_and_hashes, layers_or_stages), [])
 
         interaction_layers: List[str] = []
 
@@ -76,24 +111,94 @@ class Client:
                 stage = layer_or_stage
                 interaction_layers += stage._interaction_layers
 
+        return updates, interaction_layers
+
+    def start_async(
+        self,
+        max_rate_hz: Optional[float] = 30.0,
+        on_result: Optional[Callable[[CommitResult], None]] = None,
+    ) -> "AsyncCommitter":
+        """
+        Start committing asynchronously. See `AsyncCommitter`.
+        :param max_rate_hz: The maximum number of commits sent per second.
+        :param on_result: Called with the result of each commit.
+        """
+        from armarx_core.arviz.async_committer import AsyncCommitter
+
+        return AsyncCommitter(self, max_rate_hz=max_rate_hz, on_result=on_result)
+
+    def start_interaction_session(
+        self,
+        idle_rate_hz: float = 5.0,
+        active_rate_hz: float = 60.0,
+    ) -> "InteractionSession":
+        """
+        Start receiving interactions in the background. See `InteractionSession`.
+        :param idle_rate_hz: The polling rate while the user is idle.
+        :param active_rate_hz: The polling rate during interactions.
+        """
+        from armarx_core.arviz.interaction_session import InteractionSession
+
+        return InteractionSession(
+            self, idle_rate_hz=idle_rate_hz, active_rate_hz=active_rate_hz
+        )
+
+    def _commit_updates(
+        self,
+        updates_and_hashes: List[Tuple[viz.data.LayerUpdate, Optional[bytes]]],
+        interaction_layers: List[str],
+        full_resync=False,
+    ) -> CommitResult:
+        with self._lock:
+            if full_resync:
+                self._committed_hashes.clear()
+
+            updates: List[viz.data.LayerUpdate] = []
+            new_hashes: Dict[Tuple[str, str], Optional[bytes]] = {}
+            for update, content_hash in updates_and_hashes:
+                key = (update.component, update.name)
+                if (
+                    self.delta_commits
+                    and content_hash is not None
+                    and self._committed_hashes.get(key, None) == content_hash
+                ):
+                    continue
+                updates.append(update)
+                new_hashes[key] = content_hash
+
+        input_ = viz.data.CommitInput()
+        input_.updates = updates
+        input_.interactionComponent = self.component_name
         input_.interactionLayers = interaction_layers
 
-        ice_result = self.storage.commitAndReceiveInteractions(input_)
+        try:
+            ice_result = self.storage.commitAndReceiveInteractions(input_)
+        except Exception:
+            # The storage may have received the commit partially.
+            self.request_full_resync()
+            raise
+
+        with self._lock:
+            for key, content_hash in new_hashes.items():
+                if content_hash is None:
+                    self._committed_hashes.pop(key, None)
+                else:
+                    self._committed_hashes[key] = content_hash
 
         result = CommitResult(data=ice_result)
         return result
 
     @staticmethod
-    def _get_layer_updates(
-        layer_like: Union[Layer, viz.data.LayerUpdate],
-    ) -> List[viz.data.LayerUpdate]:
-
+    def _get_layer_updates_and_hashes(
+        layer_like: Union[Layer, Stage, viz.data.LayerUpdate],
+    ) -> List[Tuple[viz.data.LayerUpdate, Optional[bytes]]]:
+        """Return the layer updates with their content hashes (None if unknown)."""
         if isinstance(layer_like, viz.data.LayerUpdate):
-            return [layer_like]
+            return [(layer_like, None)]
         elif isinstance(layer_like, Layer):
-            return [layer_like.data()]
+            return [layer_like.data_and_hash()]
         elif isinstance(layer_like, Stage):
-            return [layer.data() for layer in layer_like.layers]
+            return [layer.data_and_hash() for layer in layer_like.layers]
         else:
             logger.warning("Unable to get layer updates.")
             return []
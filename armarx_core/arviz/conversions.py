@@ -1,3 +1,4 @@
+import itertools
 from typing import List, Union, Tuple, Any
 
 import numpy as np
@@ -21,7 +22,9 @@ def vector3fs_to_numpy(vs: List[Vector3f]):
 
 
 def vector3fs_from_numpy(array: np.ndarray):
-    return list(map(vector3f_from_numpy, array))
+    # Convert all values to Python floats at once.
+    values = np.asarray(array, dtype=float).reshape(-1, 3).tolist()
+    return list(itertools.starmap(Vector3f, values))
 
 
 def color_to_numpy(c: Color) -> np.ndarray:
@@ -42,6 +45,12 @@ def to_viz_color(value) -> Color:
     return c
 
 
+def to_viz_colors(array: np.ndarray) -> List[Color]:
+    """Convert an (N, 4) array of (r, g, b, a) colors."""
+    values = np.asarray(array).reshape(-1, 4).astype(int).tolist()
+    return [Color(r=r, g=g, b=b, a=a) for r, g, b, a in values]
+
+
 def colored_point_to_numpy_full(point: ColoredPoint):
     return np.array(
         [
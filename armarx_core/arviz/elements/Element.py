@@ -1,4 +1,5 @@
 import enum
+import hashlib
 import numpy as np
 
 from typing import Iterable, Union, List
@@ -10,7 +11,9 @@ slice_loader.load_armarx_slice("RobotAPI", "ArViz/Elements.ice")
 
 
 from armarx.viz.data import Element
+from armarx.viz.data import InteractionDescription
 
+from armarx_core.math import quaternion
 from armarx_core.math.transform import Transform
 from armarx import Vector3f
 
@@ -21,7 +24,34 @@ class ElementFlags(enum.IntFlag):
     HIDDEN = 2
 
 
+def _update_hash(h: "hashlib._Hash", value):
+    """Feed a value of an element's state into a hash."""
+    if isinstance(value, np.ndarray):
+        h.update(f"ndarray{value.dtype.descr}{value.shape}".encode())
+        if value.dtype.hasobject:
+            _update_hash(h, value.tolist())
+        else:
+            h.update(np.ascontiguousarray(value))
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}{len(value)}".encode())
+        for v in value:
+            _update_hash(h, v)
+    elif isinstance(value, dict):
+        h.update(f"dict{len(value)}".encode())
+        for k, v in sorted(value.items()):
+            _update_hash(h, k)
+            _update_hash(h, v)
+    else:
+        h.update(repr(value).encode())
+
+
 class Element:
+
+    _default_color = np.array((100, 100, 100, 255))
+
+    # Attributes which are not part of the content hash.
+    _unhashed_attributes = ("ice_data_cls", "_ice_data_cache", "_ori_quat_cache")
+
     def __init__(
         self,
         ice_data_cls,
@@ -31,25 +61,40 @@ class Element:
         orientation=None,
         color=None,
         scale=1.0,
+        validate=True,
     ):
+        """
+        :param validate: If false, `pose`, `position`, `orientation` and
+            `color` are used as given without checking or converting them.
+            This is faster for trusted inputs: `pose` must be a float array
+            of shape (4, 4) (which is not copied), `orientation` a rotation
+            matrix and `color` an array of shape (4,).
+        """
         self.ice_data_cls = ice_data_cls
         self.id: str = str(id)
 
-        self.pose = np.eye(4)
-        if pose is not None:
-            self.pose = pose
-        if position is not None:
-            self.position = position
-        if orientation is not None:
-            self.ori_mat = orientation
+        if validate:
+            self.pose = np.eye(4)
+            if pose is not None:
+                self.pose = pose
+            if position is not None:
+                self.position = position
+            if orientation is not None:
+                self.ori_mat = orientation
 
-        self.color = color if color is not None else (100, 100, 100, 255)
+            self.color = color if color is not None else (100, 100, 100, 255)
+        else:
+            self._pose = np.eye(4) if pose is None else pose
+            if position is not None:
+                self._pose[:3, 3] = position
+            if orientation is not None:
+                self._pose[:3, :3] = orientation
+
+            self._color = self._default_color.copy() if color is None else color
 
         self.scale = scale
         self.flags: ElementFlags = ElementFlags.NONE
 
-        from armarx.viz.data import InteractionDescription
-
         self._interaction = InteractionDescription()
 
     @property
@@ -105,24 +150,36 @@ class Element:
 
     @property
     def ori_quat(self):
-        """The orientation as [w, x, y, z] quaternion."""
-        import transforms3d as tf3d
-
-        try:
-            return tf3d.quaternions.mat2quat(self.ori_mat)
-        except np.linalg.LinAlgError as e:
-            print("Rotation matrix to quaternion: \n{}".format(self.ori_mat))
-            raise
+        """
+        The orientation as [w, x, y, z] quaternion.
+        It is cached until the orientation matrix changes.
+        """
+        return self._get_ori_quat().copy()
 
     @ori_quat.setter
     def ori_quat(self, value):
-        import transforms3d as tf3d
-
-        try:
-            self.ori_mat = tf3d.quaternions.quat2mat(value)
-        except np.linalg.LinAlgError as e:
-            print("Quaternion to rotation matrix: \n{}".format(value))
-            raise
+        value = self._to_array_checked(value, (4,), "orientation quaternion", dtype=float)
+        self.ori_mat = quaternion.quat2mat(value)
+        value = value / np.linalg.norm(value)
+        self._set_cached_ori_quat(-value if value[0] < 0 else value)
+
+    def _get_ori_quat(self) -> np.ndarray:
+        quat = self._get_cached_ori_quat()
+        if quat is None:
+            quat = quaternion.mat2quat(self._pose[:3, :3])
+            self._set_cached_ori_quat(quat)
+        return quat
+
+    def _get_cached_ori_quat(self) -> Union[np.ndarray, None]:
+        cache = getattr(self, "_ori_quat_cache", None)
+        if cache is not None and cache[0] == self._pose[:3, :3].tobytes():
+            return cache[1]
+        return None
+
+    def _set_cached_ori_quat(self, quat: np.ndarray):
+        # The cache is keyed by the matrix' content, as the pose can be
+        # modified in place (e.g. via `ori_mat`).
+        self._ori_quat_cache = (self._pose[:3, :3].tobytes(), quat)
 
     @property
     def color(self) -> np.ndarray:
@@ -242,18 +299,60 @@ class Element:
         if hide_during_transform:
             flags |= Flags.TRANSFORM_HIDE
 
-        self._interaction.enableFlags = flags
-        self._interaction.contextMenuOptions = context_menu_options or []
+        # Replace the description, as committed Ice data refers to the previous one.
+        self._interaction = InteractionDescription(
+            enableFlags=flags,
+            contextMenuOptions=list(context_menu_options or []),
+        )
 
         return self
 
     # Behind the scenes
 
     def get_ice_data(self):
-        """Get the Ice data for committing."""
+        """
+        Get the Ice data for committing.
+
+        The data is rebuilt only if the element's content hash has changed
+        since the last call. Otherwise, the cached data is returned, so
+        it must not be modified.
+        """
+        return self._get_ice_data_and_hash()[0]
+
+    def _get_ice_data_and_hash(self, content_hash: bytes = None):
+        if content_hash is None:
+            content_hash = self.content_hash()
+        if self._has_ice_data_cached(content_hash):
+            return self._ice_data_cache
+
         ice_data = self.ice_data_cls(id=self.id, interaction=self._interaction)
         self._update_ice_data(ice_data)
-        return ice_data
+        self._ice_data_cache = (ice_data, content_hash)
+        return self._ice_data_cache
+
+    def _has_ice_data_cached(self, content_hash: bytes) -> bool:
+        cache = getattr(self, "_ice_data_cache", None)
+        return cache is not None and cache[1] == content_hash
+
+    def content_hash(self) -> bytes:
+        """
+        Return a hash of the element's content.
+        Elements with equal content hashes produce equal Ice data.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(type(self).__qualname__.encode())
+        for name, value in sorted(self._get_hashed_state().items()):
+            h.update(name.encode())
+            _update_hash(h, value)
+        return h.digest()
+
+    def _get_hashed_state(self) -> dict:
+        """Return the attributes determining the element's Ice data."""
+        return {
+            name: value
+            for name, value in vars(self).items()
+            if name not in self._unhashed_attributes
+        }
 
     def _update_ice_data(self, ice_data):
         """
@@ -262,7 +361,7 @@ class Element:
         """
         p = ice_data.pose
         p.x, p.y, p.z = self.position
-        p.qw, p.qx, p.qy, p.qz = map(float, self.ori_quat)
+        p.qw, p.qx, p.qy, p.qz = self._get_ori_quat().tolist()
 
         c = ice_data.color
         c.r, c.g, c.b, c.a = map(int, self.color)
@@ -277,6 +376,19 @@ class Element:
 
         ice_data.flags = int(self.flags)
 
+    @staticmethod
+    def cache_ori_quats(elements: Iterable["Element"]):
+        """
+        Compute the orientation quaternions of many elements in one
+        vectorized pass and cache them in the elements.
+        """
+        elements = [e for e in elements if e._get_cached_ori_quat() is None]
+        if not elements:
+            return
+        mats = np.stack([e._pose[:3, :3] for e in elements])
+        for element, quat in zip(elements, quaternion.mat2quat(mats)):
+            element._set_cached_ori_quat(quat)
+
     @classmethod
     def _match_shape(
         cls, shape: Iterable[int], shape_pattern: Iterable[Union[int, None]]
@@ -288,11 +400,9 @@ class Element:
             A shape pattern, i.e. tuple of ints or None, where None matches any size.
         :return: True if `shape` matches `accepted_shape`.
         """
-        return np.all(
-            np.logical_or(
-                np.array(shape) == shape_pattern,
-                np.isnan(np.array(shape_pattern, dtype=float)),
-            )
+        shape_pattern = tuple(shape_pattern)
+        return len(shape) == len(shape_pattern) and all(
+            p is None or s == p for s, p in zip(shape, shape_pattern)
         )
 
     @classmethod
@@ -311,9 +421,7 @@ class Element:
     @classmethod
     def _to_array_checked(cls, value, accepted_shapes, name, dtype=None) -> np.ndarray:
         assert len(accepted_shapes) > 0
-        value = np.array(value)
-        if dtype is not None:
-            value = value.astype(dtype)
+        value = np.array(value, dtype=dtype)
         if isinstance(accepted_shapes, tuple):
             accepted_shapes = [accepted_shapes]
 
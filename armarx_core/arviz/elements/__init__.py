@@ -15,3 +15,4 @@ from armarx_core.arviz.elements.elements import (
     Text,
 )
 from armarx_core.arviz.elements.mesh import Mesh
+from armarx_core.arviz.elements.arrays import ArrowArray, BoxArray, ElementArray, SphereArray
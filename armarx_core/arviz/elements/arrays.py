@@ -0,0 +1,424 @@
+"""
+Batches of elements of the same type.
+
+An element array holds the state of N elements in (N, ...) arrays and
+converts them to Ice elements in vectorized passes. This is much faster
+than creating N element objects when drawing large, homogeneous sets of
+elements, e.g. the voxels of a volumetric plot:
+
+layer.add(BoxArray("voxel_", positions=xs, sizes=sizes, colors=colors))
+"""
+
+import hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from armarx_core.slice_loader import load_armarx_slice
+
+load_armarx_slice("RobotAPI", "ArViz/Elements.ice")
+
+
+import armarx.viz as viz
+from armarx_core.arviz import conversions
+from armarx_core.arviz.elements.Element import ElementFlags, _update_hash
+from armarx_core.math import quaternion
+
+
+def directions_to_quats(directions: np.ndarray, natural_dir=(0, 1, 0)) -> np.ndarray:
+    """
+    Compute the rotations turning `natural_dir` into each of the `directions`.
+
+    Vectorized version of `direction_to_ori_mat()`.
+    :param directions: The directions, shape (N, 3). They are normalized.
+    :return: The quaternions [w, x, y, z], shape (N, 4).
+    """
+    directions = np.asarray(directions, dtype=float)
+    directions = directions / np.linalg.norm(directions, axis=-1, keepdims=True)
+    natural_dir = np.asarray(natural_dir, dtype=float)
+
+    # The half-way quaternion [1 + cos(angle), sin(angle) * axis].
+    quats = np.empty(directions.shape[:-1] + (4,))
+    quats[..., 0] = 1 + directions @ natural_dir
+    quats[..., 1:] = np.cross(natural_dir, directions)
+
+    # Opposite directions => Do 180 deg rotation around the x-axis.
+    opposite = quats[..., 0] < 1e-6
+    quats[opposite] = (0, 1, 0, 0)
+
+    return quats / np.linalg.norm(quats, axis=-1, keepdims=True)
+
+
+class ElementArray:
+    """
+    Base class of arrays of N elements of the same type.
+
+    The IDs are generated from `id_prefix` as "<id_prefix><i>" unless
+    explicit `ids` are given.
+    """
+
+    ice_data_cls = None
+
+    # Attributes which are not part of the content hash.
+    _unhashed_attributes = ("_ice_data_cache",)
+
+    def __init__(
+        self,
+        id_prefix: str,
+        positions: np.ndarray,
+        orientations: Optional[np.ndarray] = None,
+        colors: Optional[np.ndarray] = None,
+        scales=1.0,
+        ids: Optional[Sequence[str]] = None,
+    ):
+        """
+        :param id_prefix: The prefix of the generated IDs.
+        :param positions: The positions, shape (N, 3).
+        :param orientations: The orientations as quaternions [w, x, y, z]
+            of shape (N, 4) or (4,), or as rotation matrices of shape
+            (N, 3, 3) or (3, 3). By default, elements are not rotated.
+        :param colors: The colors (r, g, b[, a]), shape (N, 3|4) or (3|4,).
+        :param scales: The scales, shape (N, 3), (N,), (3,) or scalar.
+        :param ids: Explicit IDs of the N elements.
+        """
+        self.id_prefix = str(id_prefix)
+        self.positions = positions
+        self.ori_quats = orientations
+        self.colors = colors
+        self.scales = scales
+        self.ids = ids
+        self.flags: ElementFlags = ElementFlags.NONE
+
+    @property
+    def num_elements(self) -> int:
+        return len(self._positions)
+
+    @property
+    def positions(self) -> np.ndarray:
+        """
+        The positions, shape (N, 3).
+
+        When setting positions of a different N, the other per-element
+        values must be set as well before the array is committed.
+        """
+        return self._positions
+
+    @positions.setter
+    def positions(self, value):
+        value = np.asarray(value, dtype=float)
+        if value.ndim != 2 or value.shape[1] != 3:
+            raise ValueError(
+                f"Expected positions of shape (N, 3), but got array of shape {value.shape}."
+            )
+        self._positions = value
+
+    @property
+    def ori_quats(self) -> np.ndarray:
+        """The orientations as quaternions [w, x, y, z], shape (N, 4)."""
+        return self._ori_quats
+
+    @ori_quats.setter
+    def ori_quats(self, value):
+        """Set the orientations as quaternions or rotation matrices."""
+        if value is None:
+            value = (1.0, 0.0, 0.0, 0.0)
+        value = np.asarray(value, dtype=float)
+        if value.shape[-2:] == (3, 3):
+            value = quaternion.mat2quat(value)
+        self._ori_quats = self._broadcast(value, (4,), "orientations")
+
+    @property
+    def ori_mats(self) -> np.ndarray:
+        """The orientations as rotation matrices, shape (N, 3, 3)."""
+        return quaternion.quat2mat(self._ori_quats)
+
+    @property
+    def colors(self) -> np.ndarray:
+        """The colors (r, g, b, a), shape (N, 4)."""
+        return self._colors
+
+    @colors.setter
+    def colors(self, value):
+        if value is None:
+            value = (100, 100, 100, 255)
+        value = np.asarray(value)
+        if value.shape[-1:] == (3,):
+            alpha = np.full(value.shape[:-1] + (1,), 255, dtype=value.dtype)
+            value = np.concatenate([value, alpha], axis=-1)
+        self._colors = self._broadcast(value.astype(int), (4,), "colors")
+
+    @property
+    def scales(self) -> np.ndarray:
+        """The scales, shape (N, 3)."""
+        return self._scales
+
+    @scales.setter
+    def scales(self, value):
+        self._scales = self._broadcast_vectors(value, "scales")
+
+    @property
+    def ids(self) -> List[str]:
+        if self._ids is not None:
+            return self._ids
+        return [f"{self.id_prefix}{i}" for i in range(self.num_elements)]
+
+    @ids.setter
+    def ids(self, value: Optional[Sequence[str]]):
+        if value is not None:
+            value = list(map(str, value))
+            if len(value) != self.num_elements:
+                raise ValueError(
+                    f"Expected {self.num_elements} IDs, but got {len(value)}."
+                )
+        self._ids = value
+
+    # Behind the scenes
+
+    def get_ice_data(self) -> List[viz.data.Element]:
+        """
+        Get the Ice data of all elements for committing.
+
+        The data is rebuilt only if the array's content hash has changed
+        since the last call. Otherwise, the cached data is returned, so
+        it must not be modified.
+        """
+        return self._get_ice_data_and_hash()[0]
+
+    def _get_ice_data_and_hash(self) -> Tuple[List[viz.data.Element], bytes]:
+        content_hash = self.content_hash()
+        cache = getattr(self, "_ice_data_cache", None)
+        if cache is not None and cache[1] == content_hash:
+            return cache
+
+        self._ice_data_cache = (self._make_ice_data(), content_hash)
+        return self._ice_data_cache
+
+    def content_hash(self) -> bytes:
+        """
+        Return a hash of the elements' content.
+        Arrays with equal content hashes produce equal Ice data.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(type(self).__qualname__.encode())
+        for name, value in sorted(vars(self).items()):
+            if name not in self._unhashed_attributes:
+                h.update(name.encode())
+                _update_hash(h, value)
+        return h.digest()
+
+    def _make_ice_data(self) -> List[viz.data.Element]:
+        self._check_num_elements()
+
+        # Convert all values to Python scalars at once.
+        poses = [
+            viz.data.GlobalPose(x=x, y=y, z=z, qw=qw, qx=qx, qy=qy, qz=qz)
+            for (x, y, z), (qw, qx, qy, qz) in zip(
+                self._positions.tolist(), self._ori_quats.tolist()
+            )
+        ]
+        colors = conversions.to_viz_colors(self._colors)
+        scales = conversions.vector3fs_from_numpy(self._scales)
+
+        fields = self._get_ice_fields()
+        names = ["id", "pose", "color", "scale"] + list(fields)
+        columns = [self.ids, poses, colors, scales] + list(fields.values())
+
+        flags = int(self.flags)
+        interaction = viz.data.InteractionDescription()
+        return [
+            self.ice_data_cls(flags=flags, interaction=interaction, **dict(zip(names, values)))
+            for values in zip(*columns)
+        ]
+
+    def _get_ice_fields(self) -> Dict[str, list]:
+        """Return the values of the type-specific fields, one list per field."""
+        return {}
+
+    def _check_num_elements(self):
+        """
+        Check that all per-element values have N entries. They can differ
+        if `positions` was replaced by positions of a different N.
+        """
+        num = self.num_elements
+        for name, value in sorted(vars(self).items()):
+            if name in self._unhashed_attributes or name == "_positions":
+                continue
+            if isinstance(value, (np.ndarray, list)) and len(value) != num:
+                raise ValueError(
+                    f"Expected {num} {name.lstrip('_')}, but got {len(value)}. "
+                    f"Set all values after changing the number of positions."
+                )
+
+    def _broadcast(self, value: np.ndarray, shape: Tuple[int, ...], name: str) -> np.ndarray:
+        """Broadcast a value of one or N elements to shape (N, *shape)."""
+        num = self.num_elements
+        if value.shape == shape:
+            return np.tile(value, (num,) + (1,) * len(shape))
+        if value.shape != (num,) + shape:
+            raise ValueError(
+                f"Expected {name} of shape {shape} or {(num,) + shape}, "
+                f"but got array of shape {value.shape}."
+            )
+        return value
+
+    def _broadcast_vectors(self, value, name: str) -> np.ndarray:
+        """
+        Broadcast a scalar, (3,), (N,) or (N, 3) value to shape (N, 3).
+        A value of shape (3,) is always taken as vector.
+        """
+        value = np.asarray(value, dtype=float)
+        if value.ndim == 0 or (value.shape != (3,) and value.shape == (self.num_elements,)):
+            value = np.repeat(value[..., np.newaxis], 3, axis=-1)
+        return self._broadcast(value, (3,), name)
+
+    def _broadcast_scalars(self, value, name: str) -> np.ndarray:
+        """Broadcast a scalar or (N,) value to shape (N,)."""
+        value = np.asarray(value, dtype=float)
+        if value.ndim == 0:
+            return np.full(self.num_elements, float(value))
+        return self._broadcast(value, (), name)
+
+
+class BoxArray(ElementArray):
+    """
+    An array of boxes.
+    """
+
+    ice_data_cls = viz.data.ElementBox
+
+    def __init__(
+        self,
+        id_prefix: str,
+        positions: np.ndarray,
+        sizes=1.0,
+        **kwargs,
+    ):
+        """
+        :param sizes: The sizes, shape (N, 3), (N,), (3,) or scalar.
+        """
+        super().__init__(id_prefix, positions, **kwargs)
+        self.sizes = sizes
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """The sizes, shape (N, 3)."""
+        return self._sizes
+
+    @sizes.setter
+    def sizes(self, value):
+        self._sizes = self._broadcast_vectors(value, "sizes")
+
+    def _get_ice_fields(self):
+        return dict(size=conversions.vector3fs_from_numpy(self._sizes))
+
+
+class SphereArray(ElementArray):
+    """
+    An array of spheres.
+    """
+
+    ice_data_cls = viz.data.ElementSphere
+
+    def __init__(
+        self,
+        id_prefix: str,
+        positions: np.ndarray,
+        radii=10.0,
+        **kwargs,
+    ):
+        """
+        :param radii: The radii, shape (N,) or scalar.
+        """
+        super().__init__(id_prefix, positions, **kwargs)
+        self.radii = radii
+
+    @property
+    def radii(self) -> np.ndarray:
+        return self._radii
+
+    @radii.setter
+    def radii(self, value):
+        self._radii = self._broadcast_scalars(value, "radii")
+
+    def _get_ice_fields(self):
+        return dict(radius=self._radii.tolist())
+
+
+class ArrowArray(ElementArray):
+    """
+    An array of arrows.
+    """
+
+    ice_data_cls = viz.data.ElementArrow
+
+    natural_dir = np.array((0, 1, 0))
+
+    def __init__(
+        self,
+        id_prefix: str,
+        positions: np.ndarray,
+        lengths=100.0,
+        widths=10.0,
+        directions: Optional[np.ndarray] = None,
+        **kwargs,
+    ):
+        """
+        :param lengths: The lengths, shape (N,) or scalar.
+        :param widths: The widths, shape (N,) or scalar.
+        :param directions: The directions, shape (N, 3).
+            If given, they override `orientations`.
+        """
+        super().__init__(id_prefix, positions, **kwargs)
+        self.lengths = lengths
+        self.widths = widths
+        if directions is not None:
+            self.directions = directions
+
+    @classmethod
+    def from_to(
+        cls,
+        id_prefix: str,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        **kwargs,
+    ) -> "ArrowArray":
+        """Make arrows from `starts` to `ends`, both of shape (N, 3)."""
+        starts = np.asarray(starts, dtype=float)
+        deltas = np.asarray(ends, dtype=float) - starts
+        return cls(
+            id_prefix,
+            positions=starts,
+            lengths=np.linalg.norm(deltas, axis=-1),
+            directions=deltas,
+            **kwargs,
+        )
+
+    @property
+    def directions(self) -> np.ndarray:
+        """The directions, shape (N, 3)."""
+        return self.ori_mats @ self.natural_dir
+
+    @directions.setter
+    def directions(self, value):
+        value = np.asarray(value, dtype=float)
+        value = self._broadcast(value, (3,), "directions")
+        self.ori_quats = directions_to_quats(value, self.natural_dir)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return self._lengths
+
+    @lengths.setter
+    def lengths(self, value):
+        self._lengths = self._broadcast_scalars(value, "lengths")
+
+    @property
+    def widths(self) -> np.ndarray:
+        return self._widths
+
+    @widths.setter
+    def widths(self, value):
+        self._widths = self._broadcast_scalars(value, "widths")
+
+    def _get_ice_fields(self):
+        return dict(length=self._lengths.tolist(), width=self._widths.tolist())
@@ -438,14 +438,47 @@ class Robot(Object):
 
     def _update_ice_data(self, ice_data):
         super()._update_ice_data(ice_data)
-        ice_data.jointValues = self.joint_angles
+        ice_data.jointValues = dict(self.joint_angles)
 
 
 class PointCloud(Element):
     """
     A point cloud.
+
+    The points are stored in the packed layout sent to ArViz
+    (`PointCloud.dtype`), so committing a cloud does not convert it.
+    The storage is reused when the points are set again, unless it was
+    committed (copy-on-write), so committed data is never modified.
+
+    Points can be set
+
+    - as structured array via `cloud`, e.g. a VisionX point cloud
+      (see `armarx_vision.pointclouds`) with a `position` field and a
+      `color` or `r`, `g`, `b` (and `a`) fields. Arrays of `PointCloud.dtype`
+      are used without copying.
+    - as (N, 3), (N, 6) or (N, 7) array via `points`.
+
+    Accessing `points`, `point_positions` or `point_colors` returns an
+    (N, 7) float array which can be modified in place until the points are
+    set again. It is converted back each time the cloud is committed,
+    which is slower than using `cloud`.
+
+    Arrays set via `cloud` without copying are committed by reference,
+    so they must not be modified while a commit may still use them.
     """
 
+    dtype = np.dtype(
+        [
+            ("position", np.float32, (3,)),
+            ("a", np.uint8),
+            ("r", np.uint8),
+            ("g", np.uint8),
+            ("b", np.uint8),
+        ]
+    )
+
+    default_point_color = (100, 100, 100, 255)
+
     def __init__(
         self,
         id,
@@ -459,12 +492,22 @@ class PointCloud(Element):
         :param id:
         :param transparency:
         :param point_size: The point size in pixels.
-        :param points:
+        :param points: An (N, 3), (N, 6) or (N, 7) array or a structured array.
         :param point_colors:
         :param kwargs:
         """
         super().__init__(ice_data_cls=viz.data.ElementPointCloud, id=id, **kwargs)
-        self.points = np.zeros((0, 7))
+        # Storage owned by this element, reused when setting points.
+        self._buffer = np.zeros(0, dtype=self.dtype)
+        # The points in the packed layout. Either a view of the buffer or
+        # an array set by the user.
+        self._cloud = self._buffer
+        self._cloud_is_external = False
+        # Whether the buffer was handed out as Ice data and must not be modified.
+        self._buffer_shared = False
+        # The points as (N, 7) array, if they were accessed as such. If set,
+        # they take precedence over the cloud.
+        self._points = None
 
         self.transparency: float = transparency
         self.point_size: float = point_size
@@ -475,7 +518,52 @@ class PointCloud(Element):
             self.point_colors = point_colors
 
     def clear(self):
-        self.points = []
+        self._reserve(0)
+        self._points = None
+
+    @property
+    def num_points(self) -> int:
+        return len(self._points) if self._points is not None else len(self._cloud)
+
+    @property
+    def cloud(self) -> np.ndarray:
+        """The points as structured array of `PointCloud.dtype`."""
+        if self._points is not None:
+            # Keep the points, as they may still be modified in place.
+            self._set_from_points(self._points)
+        return self._cloud
+
+    @cloud.setter
+    def cloud(self, value: np.ndarray):
+        """
+        :param value: A structured array with a `position` field and
+            optionally `color` (packed r, g, b, a bytes) or `r`, `g`, `b`
+            (and `a`) fields. Points without color get `default_point_color`.
+        """
+        self._points = None
+        fields = value.dtype.fields
+        if fields is None or "position" not in fields:
+            raise ValueError(
+                f"Expected a structured array with a 'position' field, but got dtype {value.dtype}."
+            )
+        value = value.reshape(-1)
+
+        if value.dtype == self.dtype and value.flags.c_contiguous:
+            self._cloud = value
+            self._cloud_is_external = True
+            return
+
+        cloud = self._reserve(len(value))
+        cloud["position"] = value["position"]
+
+        colors = self._get_color_fields(value)
+        if colors is None:
+            for channel, c in zip("rgba", self.default_point_color):
+                cloud[channel] = c
+        else:
+            for channel in "rgb":
+                cloud[channel] = colors[channel]
+            cloud["a"] = colors["a"] if "a" in colors.dtype.names else 255
 
     @property
     def points(self) -> np.ndarray:
@@ -483,6 +571,13 @@ class PointCloud(Element):
         An array of shape (N, 7) containing N points of the form (x, y, z, r, g, b, a),
         or an empty array if there are no points.
         """
+        if self._points is None:
+            cloud = self._cloud
+            points = np.empty((len(cloud), 7))
+            points[:, :3] = cloud["position"]
+            for i, channel in enumerate("rgba"):
+                points[:, 3 + i] = cloud[channel]
+            self._points = points
         return self._points
 
     @points.setter
@@ -493,63 +588,122 @@ class PointCloud(Element):
             (N, 3): Set as (x, y, z) with default color (100, 100, 100, 255).
             (N, 6): Set as (x, y, z, r, g, b) with default alpha (255).
             (N, 7): Set as (x, y, z, r, g, b, a).
+        Or a structured array (see `cloud`).
         """
-        value = self._to_array_checked(
-            value, [(0,), (None, 3), (None, 6), (None, 7)], "points", dtype=float
-        )
-        if value.size == 0:
-            self._points = value
+        if isinstance(value, np.ndarray) and value.dtype.fields is not None:
+            self.cloud = value
             return
 
-        self._points = np.stack([[0, 0, 0, 100, 100, 100, 255]] * value.shape[0])
-        self._points[:, : value.shape[-1]] = value
+        value = self._to_array_checked(
+            value, [(0,), (None, 3), (None, 6), (None, 7)], "points"
+        )
+        self._points = None
+        self._set_from_points(value)
 
     @property
     def point_positions(self) -> np.ndarray:
         """An N x 3 slice of `self.points` containing the point positions as (x, y, z)."""
-        return self._points[:, :3]
+        return self.points[:, :3]
 
     @point_positions.setter
     def point_positions(self, value):
         value = self._to_array_checked(
             value, [(None, 3)], "point positions", dtype=float
         )
-        self._points[:, :3] = value
+        if self._points is not None:
+            self._points[:, :3] = value
+        else:
+            self._cloud_for_writing()["position"] = value
 
     @property
     def point_colors(self) -> np.ndarray:
         """An N x 4 slice of `self.points` containing the point colors as (r, g, b, a)."""
-        return self._points[:, 3:]
+        return self.points[:, 3:]
 
     @point_colors.setter
     def point_colors(self, value):
         value = self._to_array_checked(
             value, [(3,), (4,), (None, 3), (None, 4)], "point colors"
         )
-        self._points[:, 3 : (3 + value.shape[-1])] = value
+        if self._points is not None:
+            self._points[:, 3 : (3 + value.shape[-1])] = value
+        else:
+            cloud = self._cloud_for_writing()
+            for i in range(value.shape[-1]):
+                cloud["rgba"[i]] = value[..., i]
 
-    def _update_ice_data(self, ice_data):
-        super()._update_ice_data(ice_data)
+    def _reserve(self, num_points: int) -> np.ndarray:
+        """
+        Set the cloud to the first `num_points` points of the buffer, growing
+        it if necessary, or replacing it if it was handed out as Ice data.
+        """
+        if self._buffer_shared:
+            self._buffer = np.zeros(max(num_points, len(self._buffer)), dtype=self.dtype)
+            self._buffer_shared = False
+        elif len(self._buffer) < num_points:
+            self._buffer = np.zeros(max(num_points, len(self._buffer) * 3 // 2), dtype=self.dtype)
+        self._cloud = self._buffer[:num_points]
+        self._cloud_is_external = False
+        return self._cloud
+
+    def _cloud_for_writing(self) -> np.ndarray:
+        """Return the cloud, copying it to a writable buffer if it was set by the user or committed."""
+        if self._cloud_is_external or self._buffer_shared:
+            cloud = self._cloud
+            self._reserve(len(cloud))[:] = cloud
+        return self._cloud
+
+    def _set_from_points(self, points: np.ndarray):
+        """Set the cloud from an (N, 3), (N, 6) or (N, 7) array."""
+        if points.size == 0:
+            self._reserve(0)
+            return
 
-        dtype = np.dtype(
-            [
-                ("position", float32, (3,)),
-                ("a", np.uint8),
-                ("r", np.uint8),
-                ("g", np.uint8),
-                ("b", np.uint8),
-            ]
-        )
-        buffer = np.zeros(self.points.shape[0], dtype=dtype)
+        cloud = self._reserve(points.shape[0])
+        cloud["position"] = points[:, :3]
+        for i, channel in enumerate("rgba"):
+            if points.shape[1] > 3 + i:
+                cloud[channel] = points[:, 3 + i]
+            else:
+                cloud[channel] = self.default_point_color[i]
 
-        assert self.points.shape[1] == 7
-        buffer["position"] = self.points[:, :3]
-        buffer["r"] = self.points[:, 3]
-        buffer["g"] = self.points[:, 4]
-        buffer["b"] = self.points[:, 5]
-        buffer["a"] = self.points[:, 6]
+    @staticmethod
+    def _get_color_fields(value: np.ndarray):
+        """
+        Return a view of the color fields of a structured array,
+        or None if it has no color.
+        """
+        fields = value.dtype.fields
+        if all(c in fields for c in "rgb"):
+            return value
+        if "color" in fields and fields["color"][0].itemsize == 4:
+            # Reinterpret the packed color as its r, g, b and a bytes
+            # (as in armarx_vision.pointclouds.dtype_color_to_rgba_dict).
+            offset = fields["color"][1]
+            rgba = np.dtype(
+                dict(
+                    names=["r", "g", "b", "a"],
+                    formats=[np.uint8] * 4,
+                    offsets=[offset + i for i in range(4)],
+                    itemsize=value.dtype.itemsize,
+                )
+            )
+            return value.view(rgba)
+        return None
+
+    def _get_hashed_state(self) -> dict:
+        state = super()._get_hashed_state()
+        for name in ("_buffer", "_cloud", "_cloud_is_external", "_buffer_shared", "_points"):
+            state.pop(name)
+        state["cloud"] = self.cloud
+        return state
+
+    def _update_ice_data(self, ice_data):
+        super()._update_ice_data(ice_data)
 
-        ice_data.points = buffer
+        ice_data.points = self.cloud
+        if not self._cloud_is_external:
+            self._buffer_shared = True
         ice_data.transparency = self.transparency
         ice_data.point_size = self.point_size
 
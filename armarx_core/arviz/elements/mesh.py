@@ -1,3 +1,5 @@
+import itertools
+
 import numpy as np
 import typing as ty
 
@@ -46,7 +48,7 @@ class Mesh(Element):
     @vertices.setter
     def vertices(self, value):
         value = self._to_array_checked(
-            value, [(0,), (None, 3)], "mesh vertices", dtype=np.float
+            value, [(0,), (None, 3)], "mesh vertices", dtype=float
         )
         self._vertices = value
 
@@ -61,10 +63,10 @@ class Mesh(Element):
     @colors.setter
     def colors(self, value):
         value = self._to_array_checked(
-            value, [(0,), (None, 3), (None, 4)], "mesh colors", dtype=np.float
+            value, [(0,), (None, 3), (None, 4)], "mesh colors", dtype=float
         )
         if value.shape[-1] == 3:
-            self._colors = np.concatenate([value, [[255]] * len(value)], axis=-1)
+            self._colors = np.concatenate([value, np.full((len(value), 1), 255.0)], axis=-1)
         else:
             self._colors = value
 
@@ -88,9 +90,12 @@ class Mesh(Element):
     def _update_ice_data(self, ice_data):
         super()._update_ice_data(ice_data)
 
+        # Convert whole arrays to Python numbers at once, instead of per element.
         ice_data.vertices = conv.vector3fs_from_numpy(self.vertices)
-        ice_data.colors = [conv.to_viz_color(c) for c in self.colors]
-        ice_data.faces = [viz.data.Face(*map(int, f)) for f in self.faces]
+        ice_data.colors = conv.to_viz_colors(self.colors)
+        ice_data.faces = list(
+            itertools.starmap(viz.data.Face, self.faces.reshape(-1, 6).tolist())
+        )
 
     @staticmethod
     def make_grid2d_faces(
@@ -114,35 +119,28 @@ class Mesh(Element):
         :param num_y:
             The number of vertices in second dimension.
         :return:
-            An array f of shape (num_faces, 3+3) with f[i] = (v1, v2, v3, c1, c2, c3)
+            An integer array f of shape (num_faces, 3+3) with f[i] = (v1, v2, v3, c1, c2, c3)
             are the vertex and color indices of a triangular face.
         """
-        num_faces = 2 * (num_x - 1) * (num_y - 1)
-        faces = np.zeros((num_faces, 6))
-
-        i = 0
-        for x in range(num_x - 1):
-            for y in range(num_y - 1):
-                """
-                In counter-clockwise order:
-                      (x)  (x+1)
-                 (y)   *----*
-                       | \f1|
-                       |f2\ |
-                 (y+1) *----*
-                """
-                v0 = c0 = y * num_x + x
-                v1 = c1 = (y + 1) * num_x + (x + 1)
-                v2 = c2 = (y + 1) * num_x + x
-                faces[i] = v0, v1, v2, c0, c1, c2
-                i += 1
-
-                v0 = c0 = y * num_x + x
-                v1 = c1 = y * num_x + (x + 1)
-                v2 = c2 = (y + 1) * num_x + (x + 1)
-                faces[i] = v0, v1, v2, c0, c1, c2
-                i += 1
-
-        assert i == num_faces
-
-        return faces
+        # Each grid cell (x, y) is split into two faces, in counter-clockwise order:
+        #       (x)  (x+1)
+        #  (y)   *----*
+        #        | \f1|
+        #        |f2\ |
+        #  (y+1) *----*
+        x, y = np.meshgrid(np.arange(num_x - 1), np.arange(num_y - 1), indexing="ij")
+        top_left = (y * num_x + x).reshape(-1)
+        top_right = top_left + 1
+        bottom_left = top_left + num_x
+        bottom_right = bottom_left + 1
+
+        vertices = np.stack(
+            [
+                np.stack([top_left, bottom_right, bottom_left], axis=-1),
+                np.stack([top_left, top_right, bottom_right], axis=-1),
+            ],
+            axis=1,
+        ).reshape(-1, 3)
+
+        # Color indices equal vertex indices.
+        return np.concatenate([vertices, vertices], axis=-1)
@@ -0,0 +1,284 @@
+"""
+A compact binary encoding of ArViz Ice data used by ArViz recordings.
+
+Each value is encoded as a one-byte tag followed by its payload (little
+endian). Ice structs and classes are encoded as the path of their type
+(e.g. "armarx.viz.data.ElementBox") and their fields. When decoding,
+only the types accepted by `is_allowed_type_path()` are instantiated, and
+no other code is run, so recordings from untrusted sources can be read.
+"""
+
+import ast
+import importlib
+import struct
+import sys
+import typing as ty
+
+import numpy as np
+
+
+# Types which may be decoded: ArViz data and the basic vector types it uses.
+ALLOWED_TYPE_PREFIXES = ("armarx.viz.",)
+ALLOWED_TYPES = ("armarx.Vector2f", "armarx.Vector3f")
+
+_NONE = 0
+_FALSE = 1
+_TRUE = 2
+_INT = 3
+_FLOAT = 4
+_STRING = 5
+_BYTES = 6
+_LIST = 7
+_DICT = 8
+_NDARRAY = 9
+_OBJECT = 10
+_ENUM = 11
+
+_tag = struct.Struct("<B")
+_size = struct.Struct("<I")
+_long = struct.Struct("<q")
+_double = struct.Struct("<d")
+_num_bytes = struct.Struct("<Q")
+
+
+def is_allowed_type_path(path: str) -> bool:
+    return path in ALLOWED_TYPES or path.startswith(ALLOWED_TYPE_PREFIXES)
+
+
+def encode(value, out: ty.Optional[bytearray] = None) -> bytearray:
+    """
+    Encode Ice data.
+
+    :param value: Ice data of allowed types, or Python and NumPy values.
+    :param out: If given, the encoding is appended to this buffer.
+    :return: The buffer holding the encoding.
+    """
+    if out is None:
+        out = bytearray()
+    _encode(value, out)
+    return out
+
+
+def decode(
+    buffer: ty.Union[bytes, memoryview],
+    offset: int = 0,
+) -> ty.Tuple[ty.Any, int]:
+    """
+    Decode Ice data encoded by `encode()`.
+
+    :param buffer: The buffer holding the encoding.
+    :param offset: The position of the encoding in `buffer`.
+    :return: The Ice data and the position after its encoding.
+    """
+    return _decode(buffer, offset)
+
+
+# Ice types
+
+_ice_type_paths: ty.Dict[type, ty.Optional[str]] = {}
+_ice_types: ty.Dict[str, type] = {}
+
+
+def find_ice_type_path(cls: type) -> ty.Optional[str]:
+    """
+    Return the path under which an Ice-generated type can be found, e.g.
+    "armarx.viz.data.ElementBox", or None if it is not an Ice type.
+
+    Types generated from slice files loaded at runtime are not found
+    via their `__module__`, but they are registered in the Ice modules
+    (e.g. `armarx.viz.data`).
+    """
+    try:
+        return _ice_type_paths[cls]
+    except KeyError:
+        pass
+
+    for name, module in list(sys.modules.items()):
+        if module is None or name.split(".")[0] != "armarx":
+            continue
+        attrs = vars(module)
+        for attr, value in list(attrs.items()):
+            # Ice modules hold a type descriptor "_t_<name>" for each generated type.
+            if isinstance(value, type) and f"_t_{attr}" in attrs:
+                _ice_type_paths.setdefault(value, f"{name}.{attr}")
+    return _ice_type_paths.setdefault(cls, None)
+
+
+def _get_ice_type(path: str) -> type:
+    cls = _ice_types.get(path, None)
+    if cls is not None:
+        return cls
+
+    if not is_allowed_type_path(path):
+        raise ValueError(f"Decoding objects of type '{path}' is not allowed.")
+    module_name, name = path.rsplit(".", 1)
+    module = sys.modules.get(module_name, None) or importlib.import_module(module_name)
+    cls = getattr(module, name, None)
+    if not isinstance(cls, type):
+        raise ValueError(f"'{path}' is not a type.")
+    _ice_types[path] = cls
+    return cls
+
+
+def _get_allowed_path(value) -> str:
+    path = find_ice_type_path(type(value))
+    if path is None:
+        raise TypeError(f"Cannot encode value of type {type(value)}: {value}")
+    if not is_allowed_type_path(path):
+        raise TypeError(f"Encoding objects of type '{path}' is not allowed.")
+    return path
+
+
+# Encoding
+
+
+def _encode_str(value: str, out: bytearray):
+    encoded = value.encode("utf-8")
+    out += _size.pack(len(encoded))
+    out += encoded
+
+
+def _encode(value, out: bytearray):
+    if value is None:
+        out += _tag.pack(_NONE)
+    elif isinstance(value, (bool, np.bool_)):
+        out += _tag.pack(_TRUE if value else _FALSE)
+    elif isinstance(value, (int, np.integer)):
+        out += _tag.pack(_INT)
+        out += _long.pack(int(value))
+    elif isinstance(value, (float, np.floating)):
+        out += _tag.pack(_FLOAT)
+        out += _double.pack(float(value))
+    elif isinstance(value, str):
+        out += _tag.pack(_STRING)
+        _encode_str(value, out)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        value = bytes(value)
+        out += _tag.pack(_BYTES)
+        out += _num_bytes.pack(len(value))
+        out += value
+
+    elif isinstance(value, (list, tuple)):
+        out += _tag.pack(_LIST)
+        out += _size.pack(len(value))
+        for item in value:
+            _encode(item, out)
+
+    elif isinstance(value, dict):
+        out += _tag.pack(_DICT)
+        out += _size.pack(len(value))
+        for key, item in value.items():
+            _encode(key, out)
+            _encode(item, out)
+
+    elif isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError(f"Cannot encode arrays of dtype {value.dtype}.")
+        data = np.ascontiguousarray(value).tobytes()
+        out += _tag.pack(_NDARRAY)
+        _encode_str(repr(np.lib.format.dtype_to_descr(value.dtype)), out)
+        out += _size.pack(value.ndim)
+        out += struct.pack(f"<{value.ndim}q", *value.shape)
+        out += _num_bytes.pack(len(data))
+        out += data
+
+    elif callable(getattr(type(value), "valueOf", None)) and hasattr(value, "_value"):
+        # An Ice enumerator.
+        out += _tag.pack(_ENUM)
+        _encode_str(_get_allowed_path(value), out)
+        out += _long.pack(value._value)
+
+    else:
+        path = _get_allowed_path(value)
+        fields = vars(value)
+        out += _tag.pack(_OBJECT)
+        _encode_str(path, out)
+        out += _size.pack(len(fields))
+        for name, item in fields.items():
+            _encode_str(name, out)
+            _encode(item, out)
+
+
+# Decoding
+
+
+def _decode_str(buffer, offset: int) -> ty.Tuple[str, int]:
+    (size,) = _size.unpack_from(buffer, offset)
+    offset += _size.size
+    return str(buffer[offset : offset + size], "utf-8"), offset + size
+
+
+def _decode(buffer, offset: int):
+    tag = buffer[offset]
+    offset += 1
+
+    if tag == _NONE:
+        return None, offset
+    elif tag == _FALSE:
+        return False, offset
+    elif tag == _TRUE:
+        return True, offset
+    elif tag == _INT:
+        return _long.unpack_from(buffer, offset)[0], offset + _long.size
+    elif tag == _FLOAT:
+        return _double.unpack_from(buffer, offset)[0], offset + _double.size
+    elif tag == _STRING:
+        return _decode_str(buffer, offset)
+    elif tag == _BYTES:
+        (size,) = _num_bytes.unpack_from(buffer, offset)
+        offset += _num_bytes.size
+        return bytes(buffer[offset : offset + size]), offset + size
+
+    elif tag == _LIST:
+        (size,) = _size.unpack_from(buffer, offset)
+        offset += _size.size
+        items = []
+        for _ in range(size):
+            item, offset = _decode(buffer, offset)
+            items.append(item)
+        return items, offset
+
+    elif tag == _DICT:
+        (size,) = _size.unpack_from(buffer, offset)
+        offset += _size.size
+        items = {}
+        for _ in range(size):
+            key, offset = _decode(buffer, offset)
+            items[key], offset = _decode(buffer, offset)
+        return items, offset
+
+    elif tag == _NDARRAY:
+        descr, offset = _decode_str(buffer, offset)
+        dtype = np.lib.format.descr_to_dtype(ast.literal_eval(descr))
+        if dtype.hasobject:
+            raise ValueError(f"Invalid array dtype {dtype} at position {offset}.")
+        (ndim,) = _size.unpack_from(buffer, offset)
+        offset += _size.size
+        shape = struct.unpack_from(f"<{ndim}q", buffer, offset)
+        offset += 8 * ndim
+        (size,) = _num_bytes.unpack_from(buffer, offset)
+        offset += _num_bytes.size
+        data = bytearray(buffer[offset : offset + size])
+        return np.frombuffer(data, dtype=dtype).reshape(shape), offset + size
+
+    elif tag == _ENUM:
+        path, offset = _decode_str(buffer, offset)
+        (value,) = _long.unpack_from(buffer, offset)
+        return _get_ice_type(path).valueOf(value), offset + _long.size
+
+    elif tag == _OBJECT:
+        path, offset = _decode_str(buffer, offset)
+        cls = _get_ice_type(path)
+        obj = cls.__new__(cls)
+        (size,) = _size.unpack_from(buffer, offset)
+        offset += _size.size
+        for _ in range(size):
+            name, offset = _decode_str(buffer, offset)
+            if name.startswith("__"):
+                raise ValueError(f"Invalid field name '{name}' at position {offset}.")
+            value, offset = _decode(buffer, offset)
+            setattr(obj, name, value)
+        return obj, offset
+
+    else:
+        raise ValueError(f"Invalid tag {tag} at position {offset - 1}.")
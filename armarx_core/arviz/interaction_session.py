@@ -0,0 +1,280 @@
+import logging
+import threading
+import time
+
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+import armarx.viz as viz
+
+from armarx_core.arviz.client import Client
+from armarx_core.arviz.elements.Element import Element
+from armarx_core.arviz.layer import Layer
+from armarx_core.arviz.layer_mailbox import LayerMailbox
+from armarx_core.arviz.stage import Stage
+from armarx_core.arviz.interaction_feedback import (
+    CommitResult,
+    InteractionFeedback,
+    InteractionFeedbackType,
+)
+
+logger = logging.getLogger(__name__)
+
+InteractionHandler = Callable[[InteractionFeedback, Stage], None]
+
+
+class InteractionSession:
+    """
+    Receives interactions from ArViz in a background thread and dispatches
+    them to handlers.
+
+    Interactions are only returned by commits, so the session keeps
+    committing (and thereby polling) the interactive layers. It polls at
+    `idle_rate_hz` while the user is idle, and at `active_rate_hz` while
+    an element is being transformed and for `active_hold_seconds` after
+    the last interaction.
+
+    Handlers are registered for a layer or for a single element of a
+    layer, and called in the background thread with the interaction and
+    a stage. Layers added to the stage are committed right after the
+    handlers ran. Element handlers are called before layer handlers.
+
+    Usage:
+
+    with client.start_interaction_session() as session:
+        session.on(layer, handler=handle_layer)
+
+        @session.on(layer, "box")
+        def handle_box(interaction, stage):
+            box.position = interaction.transformation.translation
+            stage.add(layer)
+
+        session.commit(layer)
+        ...
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        idle_rate_hz: float = 5.0,
+        active_rate_hz: float = 60.0,
+        active_hold_seconds: float = 1.0,
+        start=True,
+    ):
+        """
+        :param client: The client used for committing.
+        :param idle_rate_hz: The polling rate while the user is idle.
+        :param active_rate_hz: The polling rate during interactions. It is
+            also the maximum rate of commits.
+        :param active_hold_seconds: How long to keep polling at the active
+            rate after the last interaction.
+        """
+        self.client = client
+        self.idle_rate_hz = idle_rate_hz
+        self.active_rate_hz = active_rate_hz
+        self.active_hold_seconds = active_hold_seconds
+
+        self._handlers: Dict[Tuple[str, Optional[str]], List[InteractionHandler]] = {}
+
+        self._cond = threading.Condition()
+        # The interaction layers are kept, as the layers are polled continuously.
+        self._mailbox = LayerMailbox()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        # The elements being transformed, as (layer, element).
+        self._transforming: Set[Tuple[str, str]] = set()
+        self._last_interaction_time: Optional[float] = None
+
+        self.num_commits = 0
+        self.num_errors = 0
+        self.num_interactions = 0
+
+        if start:
+            self.start()
+
+    @property
+    def is_active(self) -> bool:
+        """Whether the session currently polls at the active rate."""
+        if self._transforming:
+            return True
+        return (
+            self._last_interaction_time is not None
+            and time.monotonic() - self._last_interaction_time < self.active_hold_seconds
+        )
+
+    @property
+    def rate_hz(self) -> float:
+        """The current polling rate."""
+        return self.active_rate_hz if self.is_active else self.idle_rate_hz
+
+    def on(
+        self,
+        layer: Union[Layer, str],
+        element: Union[Element, str, None] = None,
+        handler: Optional[InteractionHandler] = None,
+    ):
+        """
+        Register a handler for interactions with a layer or one of its
+        elements, and request interactions for the layer.
+        Can be used as a decorator if no handler is given.
+
+        :param layer: The layer or its name.
+        :param element: The element or its ID. If None, the handler
+            receives the interactions with all elements of the layer.
+        :param handler: Called with the interaction and a stage.
+        """
+        layer_name = layer.name if isinstance(layer, Layer) else layer
+        element_id = element.id if isinstance(element, Element) else element
+
+        def register(handler_: InteractionHandler) -> InteractionHandler:
+            with self._cond:
+                self._handlers.setdefault((layer_name, element_id), []).append(handler_)
+                self._mailbox.add_interaction_layers([layer_name])
+                self._cond.notify_all()
+            return handler_
+
+        if handler is None:
+            return register
+        return register(handler)
+
+    def remove_handlers(
+        self,
+        layer: Union[Layer, str],
+        element: Union[Element, str, None] = None,
+    ):
+        """Remove the handlers registered with the same arguments."""
+        layer_name = layer.name if isinstance(layer, Layer) else layer
+        element_id = element.id if isinstance(element, Element) else element
+        with self._cond:
+            self._handlers.pop((layer_name, element_id), None)
+            interaction_layers = self._mailbox.interaction_layers
+            if layer_name in interaction_layers and not any(
+                key[0] == layer_name for key in self._handlers
+            ):
+                interaction_layers.remove(layer_name)
+                self._transforming = {
+                    key for key in self._transforming if key[0] != layer_name
+                }
+
+    def commit(
+        self,
+        layers_or_stages: Union[None, Layer, Stage, List[Union[Layer, Stage]]] = None,
+        full_resync=False,
+    ):
+        """
+        Queue layers and stages to be sent with the next poll, which
+        happens without waiting for the idle period.
+        :param layers_or_stages: Layer(s) or Stage(s) to commit.
+        :param full_resync: See `Client.commit()`.
+        """
+        updates, interaction_layers = self.client._prepare_commit(layers_or_stages)
+        with self._cond:
+            self._mailbox.put(updates, interaction_layers, full_resync)
+            self._cond.notify_all()
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="ArVizInteractionSession", daemon=True
+        )
+        self._thread.start()
+
+    def close(self):
+        """Stop the background thread. Queued layers are sent first."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _run(self):
+        last_poll_time = None
+        while True:
+            with self._cond:
+                if last_poll_time is not None:
+                    self._wait_for_next_poll(last_poll_time)
+                if not self._running and not self._mailbox.has_pending_work():
+                    return
+
+                updates, interaction_layers, full_resync = self._mailbox.take(
+                    keep_interaction_layers=True
+                )
+
+            last_poll_time = time.monotonic()
+            result = self._poll(updates, interaction_layers, full_resync)
+            # When closing, only the queued layers are sent.
+            if result is not None and self._running:
+                self._dispatch(result)
+
+    def _wait_for_next_poll(self, last_poll_time: float):
+        """Wait until the polling period expired, or earlier if layers were queued."""
+        min_period = 1.0 / self.active_rate_hz
+
+        def remaining() -> float:
+            period = 1.0 / self.rate_hz
+            if self._mailbox.has_pending_work():
+                period = min_period
+            return last_poll_time + period - time.monotonic()
+
+        while self._running:
+            delay = remaining()
+            if delay <= 0:
+                return
+            # Commits and new handlers notify, so that the period can shrink.
+            self._cond.wait(delay)
+
+    def _poll(self, updates, interaction_layers, full_resync) -> Optional[CommitResult]:
+        try:
+            result = self.client._commit_updates(
+                updates, interaction_layers, full_resync=full_resync
+            )
+        except Exception:
+            self.num_errors += 1
+            logger.exception("Failed to commit to ArViz.")
+            return None
+        self.num_commits += 1
+        return result
+
+    def _dispatch(self, result: CommitResult):
+        stage = Stage(self.client.component_name)
+        for interaction in result.interactions:
+            self.num_interactions += 1
+            self._update_activity(interaction)
+
+            with self._cond:
+                handlers = self._handlers.get((interaction.layer, interaction.element), [])
+                handlers = handlers + self._handlers.get((interaction.layer, None), [])
+            for handler in handlers:
+                try:
+                    handler(interaction, stage)
+                except Exception:
+                    logger.exception(
+                        f"Error in ArViz interaction handler for element "
+                        f"'{interaction.element}' of layer '{interaction.layer}'."
+                    )
+
+        if stage.layers:
+            self.commit(stage)
+
+    def _update_activity(self, interaction: InteractionFeedback):
+        self._last_interaction_time = time.monotonic()
+
+        key = (interaction.layer, interaction.element)
+        Types = InteractionFeedbackType
+        if interaction.type == Types.Transform:
+            if interaction.is_transform_end:
+                self._transforming.discard(key)
+            else:
+                self._transforming.add(key)
+        elif interaction.type == Types.Deselect:
+            self._transforming.discard(key)
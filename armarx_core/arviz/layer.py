@@ -1,4 +1,5 @@
-from typing import List, Union
+import hashlib
+from typing import List, Tuple, Union
 
 from armarx_core.slice_loader import load_armarx_slice
 
@@ -9,18 +10,24 @@ from armarx.viz.data import Element
 from armarx.viz.data import LayerUpdate
 
 from armarx_core.arviz.elements.elements import Element as E
+from armarx_core.arviz.elements.arrays import ElementArray
 
 
 class Layer:
-    def __init__(self, component: str, name: str, elements: List[E] = ()):
+    def __init__(
+        self,
+        component: str,
+        name: str,
+        elements: List[Union[E, ElementArray]] = (),
+    ):
         self.component = component
         self.name = name
-        self.elements: List[E] = list(elements)
+        self.elements: List[Union[E, ElementArray]] = list(elements)
 
     def clear(self):
         self.elements = []
 
-    def add(self, element: Union[Element, E]):
+    def add(self, element: Union[Element, E, ElementArray]):
         self.elements.append(element)
 
     @property
@@ -28,12 +35,67 @@ class Layer:
         return "{}/{}".format(self.component, self.name)
 
     def data(self) -> LayerUpdate:
-        return LayerUpdate(
-            component=self.component,
-            name=self.name,
-            elements=list(map(self._get_element_data, self.elements)),
+        """
+        Return the layer update.
+
+        The element data is cached by the elements and shared by the
+        updates returned by later calls, as long as the elements do not
+        change. Therefore, the elements of the update must not be modified.
+        """
+        return self.data_and_hash()[0]
+
+    def content_hash(self) -> bytes:
+        """
+        Return a hash of the layer's elements.
+        Layers with equal content hashes produce equal layer updates.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.id.encode())
+        for element in self.elements:
+            h.update(self._get_element_hash(element))
+        return h.digest()
+
+    def data_and_hash(self) -> Tuple[LayerUpdate, bytes]:
+        """
+        Return the layer update and the content hash (see `content_hash()`).
+        As with `data()`, the elements of the update must not be modified.
+        """
+        element_hashes = [
+            element.content_hash() if isinstance(element, E) else None
+            for element in self.elements
+        ]
+        # Compute the orientations of all elements to be rebuilt in one pass.
+        E.cache_ori_quats(
+            element
+            for element, element_hash in zip(self.elements, element_hashes)
+            if element_hash is not None and not element._has_ice_data_cached(element_hash)
         )
 
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.id.encode())
+        elements = []
+        for element, element_hash in zip(self.elements, element_hashes):
+            if isinstance(element, ElementArray):
+                data, element_hash = element._get_ice_data_and_hash()
+                elements.extend(data)
+            elif isinstance(element, E):
+                data, element_hash = element._get_ice_data_and_hash(element_hash)
+                elements.append(data)
+            else:
+                elements.append(self._get_element_data(element))
+                element_hash = self._get_element_hash(element)
+            h.update(element_hash)
+
+        update = LayerUpdate(component=self.component, name=self.name, elements=elements)
+        return update, h.digest()
+
+    @staticmethod
+    def _get_element_hash(element: Union[Element, E, ElementArray]) -> bytes:
+        if isinstance(element, (E, ElementArray)):
+            return element.content_hash()
+        # Ice data, compared by its string representation.
+        return hashlib.blake2b(repr(element).encode(), digest_size=16).digest()
+
     @staticmethod
     def _get_element_data(element: Union[Element, E]):
         if isinstance(element, E):
@@ -49,7 +111,7 @@ class Layer:
 
     def __iadd__(self, elements):
         """Add an element or multiple elements to this layer's elements."""
-        if isinstance(elements, E) or isinstance(elements, Element):
+        if isinstance(elements, (E, Element, ElementArray)):
             self.elements.append(elements)
         else:
             self.elements += elements
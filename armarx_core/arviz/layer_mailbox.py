@@ -0,0 +1,73 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import armarx.viz as viz
+
+LayerUpdateAndHash = Tuple[viz.data.LayerUpdate, Optional[bytes]]
+
+
+class LayerMailbox:
+    """
+    Holds the layer updates to be sent by a background thread, keeping
+    only the newest update of each layer.
+
+    It is not thread-safe. Its owner guards it with a lock.
+    """
+
+    def __init__(self):
+        # The newest update of each layer with its content hash, by component and name.
+        self.updates: Dict[Tuple[str, str], LayerUpdateAndHash] = {}
+        self.interaction_layers: List[str] = []
+        # Whether interaction layers were added since the last `take()`.
+        self.new_interaction_layers = False
+        self.full_resync = False
+
+    def __len__(self) -> int:
+        """The number of queued layer updates."""
+        return len(self.updates)
+
+    def has_pending_work(self) -> bool:
+        """
+        Whether a commit is to be sent: there are queued layer updates,
+        interaction layers added since the last `take()` or a requested
+        full resync.
+        """
+        return bool(self.updates) or self.new_interaction_layers or self.full_resync
+
+    def put(
+        self,
+        updates: Iterable[LayerUpdateAndHash],
+        interaction_layers: Iterable[str] = (),
+        full_resync=False,
+    ):
+        """Queue layer updates, replacing queued updates of the same layers."""
+        for update, content_hash in updates:
+            self.updates[(update.component, update.name)] = (update, content_hash)
+        self.add_interaction_layers(interaction_layers)
+        self.full_resync |= full_resync
+
+    def add_interaction_layers(self, layers: Iterable[str]):
+        for layer in layers:
+            if layer not in self.interaction_layers:
+                self.interaction_layers.append(layer)
+                self.new_interaction_layers = True
+
+    def take(
+        self,
+        keep_interaction_layers=False,
+    ) -> Tuple[List[LayerUpdateAndHash], List[str], bool]:
+        """
+        Remove and return the queued updates, the interaction layers and
+        whether a full resync was requested.
+        :param keep_interaction_layers: If true, the interaction layers
+            are kept for the next commits.
+        """
+        updates = list(self.updates.values())
+        interaction_layers = list(self.interaction_layers)
+        full_resync = self.full_resync
+
+        self.updates = {}
+        if not keep_interaction_layers:
+            self.interaction_layers = []
+        self.new_interaction_layers = False
+        self.full_resync = False
+        return updates, interaction_layers, full_resync
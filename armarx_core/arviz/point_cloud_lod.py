@@ -0,0 +1,280 @@
+"""
+Level of detail for visualizing large point clouds in ArViz.
+
+Usage:
+
+lod = PointCloudLOD("cloud", max_points=50000)
+while running:
+    cloud = receiver.get_point_cloud()  # Any VisionX point cloud.
+    layer.add(lod.update(cloud, viewpoint=camera_position))
+"""
+
+import hashlib
+from typing import Optional
+
+import numpy as np
+
+from armarx_core.arviz.elements.elements import PointCloud
+
+
+def voxel_subsample_indices(
+    positions: np.ndarray,
+    voxel_size: float,
+    viewpoint: Optional[np.ndarray] = None,
+    lod_distance: float = 1000.0,
+) -> np.ndarray:
+    """
+    Select one point per voxel.
+
+    If a viewpoint is given, the voxel size doubles each time the
+    distance to the viewpoint doubles beyond `lod_distance`.
+
+    :param positions: The point positions, shape (N, 3).
+    :return: The sorted indices of the selected points.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    if len(positions) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if viewpoint is None:
+        levels = np.zeros(len(positions), dtype=np.int64)
+        cells = np.floor(positions / voxel_size).astype(np.int64)
+    else:
+        viewpoint = np.asarray(viewpoint, dtype=float)
+        distances = np.linalg.norm(positions - viewpoint, axis=1)
+        levels = np.floor(np.log2(np.maximum(distances / lod_distance, 1.0)))
+        levels = np.minimum(levels, 30).astype(np.int64)
+        cell_sizes = voxel_size * np.exp2(levels)
+        cells = np.floor(positions / cell_sizes[:, np.newaxis]).astype(np.int64)
+
+    cells -= cells.min(axis=0)
+    columns = np.column_stack([levels, cells])
+    dims = columns.max(axis=0) + 1
+    if np.prod(dims.astype(float)) < 2**62:
+        # Combine the columns into a single key, which is much faster to sort.
+        keys = np.ravel_multi_index(columns.T, dims)
+        _, indices = np.unique(keys, return_index=True)
+    else:
+        _, indices = np.unique(columns, axis=0, return_index=True)
+    return np.sort(indices)
+
+
+def stratified_subsample_indices(
+    num_points: int,
+    max_points: int,
+    weights: Optional[np.ndarray] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """
+    Select about `max_points` of `num_points` points by systematic sampling.
+
+    Each point is kept with a probability proportional to its weight
+    (at most 1), but the selected points are spread evenly over the
+    point order. For organized clouds (e.g. of depth cameras), this
+    covers the image evenly.
+
+    :param weights: The point weights, shape (N,). Uniform by default.
+    :return: The sorted indices of the selected points.
+    """
+    if num_points <= max_points:
+        return np.arange(num_points)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    if weights is None:
+        probabilities = np.full(num_points, max_points / num_points)
+    else:
+        weights = np.asarray(weights, dtype=np.float64)
+        probabilities = np.zeros(num_points)
+        # Redistribute the budget of points whose probability is clipped to 1.
+        for _ in range(4):
+            saturated = probabilities >= 1
+            budget = max_points - np.count_nonzero(saturated)
+            free_weight = weights[~saturated].sum()
+            if budget <= 0 or free_weight <= 0:
+                break
+            probabilities[~saturated] = weights[~saturated] * (budget / free_weight)
+            np.minimum(probabilities, 1, out=probabilities)
+
+    cumulative = np.floor(rng.random() + np.cumsum(probabilities))
+    selected = np.diff(cumulative, prepend=0) > 0
+    return np.flatnonzero(selected)[:max_points]
+
+
+class PointCloudLOD:
+    """
+    Thins point clouds to a point budget for display in ArViz.
+
+    Input clouds are structured arrays with a `position` field, e.g.
+    VisionX point clouds (see `armarx_vision.pointclouds`). Points with
+    non-finite positions (e.g. invalid depth pixels) are removed. The
+    colors of the selected points are preserved.
+
+    Methods:
+
+    - "voxel": Keep one point per voxel. The voxel size is adapted such
+      that the number of points fits the budget, but not below
+      `min_voxel_size`. The voxel size found in a frame is the initial
+      guess for the next one.
+    - "random": Stratified random sampling, which is faster.
+
+    If a viewpoint is given, points farther than `lod_distance` from it
+    are thinned more strongly.
+
+    The subsampled cloud is cached and reused as long as the input cloud
+    and the parameters do not change.
+    """
+
+    methods = ("voxel", "random")
+
+    # The minimum voxel size (in mm).
+    min_voxel_size = 1e-3
+
+    def __init__(
+        self,
+        id,
+        max_points: int = 100000,
+        method: str = "voxel",
+        lod_distance: float = 1000.0,
+        seed: Optional[int] = None,
+        **kwargs,
+    ):
+        """
+        :param id: The ID of the point cloud element.
+        :param max_points: The point budget.
+        :param method: The subsampling method, "voxel" or "random".
+        :param lod_distance: The distance to the viewpoint up to which
+            points are kept at full detail.
+        :param seed: The seed of the random sampling.
+        :param kwargs: Further arguments of the `PointCloud` element.
+        """
+        if method not in self.methods:
+            raise ValueError(
+                f"Unknown method '{method}'. Expected one of {self.methods}."
+            )
+
+        self.element = PointCloud(id, **kwargs)
+        self.max_points = max_points
+        self.method = method
+        self.lod_distance = lod_distance
+
+        self.voxel_size: Optional[float] = None
+        self.num_input_points = 0
+
+        self._rng = np.random.default_rng(seed)
+        self._input_key: Optional[bytes] = None
+
+    @property
+    def num_points(self) -> int:
+        return self.element.num_points
+
+    def update(
+        self,
+        cloud: np.ndarray,
+        viewpoint: Optional[np.ndarray] = None,
+    ) -> PointCloud:
+        """
+        Set the element's points to the subsampled cloud.
+
+        :param cloud: A structured array with a `position` field.
+        :param viewpoint: An optional viewpoint for distance-based LOD, shape (3,).
+        :return: The point cloud element.
+        """
+        fields = cloud.dtype.fields
+        if fields is None or "position" not in fields:
+            raise ValueError(
+                "Expected a structured array with a 'position' field, "
+                f"but got dtype {cloud.dtype}."
+            )
+        if viewpoint is not None:
+            viewpoint = np.asarray(viewpoint, dtype=float)
+
+        key = self._make_input_key(cloud, viewpoint)
+        if key == self._input_key:
+            return self.element
+
+        cloud = cloud.reshape(-1)
+        positions = cloud["position"]
+        valid = np.isfinite(positions).all(axis=1)
+        if not valid.all():
+            cloud = cloud[valid]
+            positions = cloud["position"]
+        self.num_input_points = len(cloud)
+
+        if len(cloud) <= self.max_points:
+            self.element.cloud = cloud
+        else:
+            if self.method == "voxel":
+                indices = self._voxel_indices(positions, viewpoint)
+            else:
+                indices = self._random_indices(positions, viewpoint)
+            self.element.cloud = cloud[indices]
+
+        self._input_key = key
+        return self.element
+
+    def reset(self):
+        """Forget the cached cloud and the adapted voxel size."""
+        self._input_key = None
+        self.voxel_size = None
+
+    def _voxel_indices(self, positions, viewpoint):
+        budget = self.max_points
+        min_voxel_size = self._get_min_voxel_size(positions)
+        voxel_size = max(self.voxel_size or self._estimate_voxel_size(positions), min_voxel_size)
+
+        indices = None
+        converged = False
+        for _ in range(8):
+            indices = voxel_subsample_indices(
+                positions,
+                voxel_size,
+                viewpoint=viewpoint,
+                lod_distance=self.lod_distance,
+            )
+            if 0.7 * budget <= len(indices) <= budget:
+                converged = True
+                break
+            if len(indices) < 0.7 * budget and voxel_size <= min_voxel_size:
+                # E.g. duplicate points, which smaller voxels do not separate.
+                break
+            # The number of points on surfaces falls with the squared voxel size.
+            voxel_size *= np.sqrt(max(len(indices), 1) / (0.85 * budget))
+            voxel_size = max(voxel_size, min_voxel_size)
+        # Only a voxel size fitting the budget is a good guess for the next cloud.
+        if converged:
+            self.voxel_size = float(voxel_size)
+
+        if len(indices) > budget:
+            subset = stratified_subsample_indices(len(indices), budget, rng=self._rng)
+            indices = indices[subset]
+        return indices
+
+    def _random_indices(self, positions, viewpoint):
+        weights = None
+        if viewpoint is not None:
+            distances = np.linalg.norm(positions - viewpoint, axis=1)
+            weights = np.maximum(distances / self.lod_distance, 1.0) ** -2
+        return stratified_subsample_indices(
+            len(positions), self.max_points, weights=weights, rng=self._rng
+        )
+
+    def _estimate_voxel_size(self, positions: np.ndarray) -> float:
+        # Assume the points lie on surfaces spanned by the two largest extents.
+        extents = np.sort(positions.max(axis=0) - positions.min(axis=0))
+        area = max(extents[1] * extents[2], 1e-6)
+        return float(np.sqrt(area / self.max_points))
+
+    def _get_min_voxel_size(self, positions: np.ndarray) -> float:
+        # Keep the voxel coordinates well within the int64 range.
+        max_coordinate = float(np.abs(positions).max()) if len(positions) else 0.0
+        return max(self.min_voxel_size, max_coordinate / 2**40)
+
+    def _make_input_key(self, cloud, viewpoint) -> bytes:
+        h = hashlib.blake2b(digest_size=16)
+        params = (self.max_points, self.method, self.lod_distance)
+        h.update(repr((params, cloud.dtype.descr, cloud.shape)).encode())
+        if viewpoint is not None:
+            h.update(viewpoint.tobytes())
+        h.update(np.ascontiguousarray(cloud).reshape(-1).view(np.uint8))
+        return h.digest()
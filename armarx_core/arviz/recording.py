@@ -0,0 +1,676 @@
+"""
+Offline recording and replay of ArViz commits.
+
+Usage:
+
+client = RecordingClient(Client("MyComponent"), "/tmp/arviz_recording")
+...  # Commit as usual.
+client.close_recording()
+
+with ArVizRecordingReader("/tmp/arviz_recording") as recording:
+    ArVizReplayer(recording).replay(Client("Replay"), speed=1.0)
+"""
+
+import collections
+import dataclasses as dc
+import functools
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from armarx_core.slice_loader import load_armarx_slice
+
+load_armarx_slice("RobotAPI", "ArViz/Elements.ice")
+load_armarx_slice("RobotAPI", "ArViz/Component.ice")
+
+import armarx.viz as viz
+
+from armarx_core.arviz import ice_binary
+from armarx_core.arviz.client import Client
+from armarx_core.arviz.interaction_feedback import CommitResult
+from armarx_core.arviz.layer import Layer
+from armarx_core.arviz.stage import Stage
+
+
+logger = logging.getLogger(__name__)
+
+
+FORMAT_NAME = "arviz-recording"
+# Version 1 stored pickled data, which is not read anymore.
+FORMAT_VERSION = 2
+
+METADATA_FILENAME = "recording.json"
+
+# One entry per commit in a chunk's index file.
+INDEX_DTYPE = np.dtype(
+    [
+        ("time_usec", "<i8"),
+        ("offset", "<i8"),
+        ("size", "<i8"),
+    ]
+)
+_index_entry = struct.Struct("<qqq")
+assert _index_entry.size == INDEX_DTYPE.itemsize
+
+# The location of a blob: (chunk, offset, size).
+BlobRef = Tuple[int, int, int]
+_blob_ref = struct.Struct("<qqq")
+_num_refs = struct.Struct("<I")
+
+
+def _chunk_path(path: str, chunk: int, kind: str) -> str:
+    return os.path.join(path, f"{chunk:06d}.{kind}")
+
+
+# Recording files
+
+
+class ArVizRecordingWriter:
+    """
+    Writes ArViz commits to a recording directory.
+
+    A recording consists of chunks. Each chunk is stored in three files:
+
+    - `<chunk>.blobs`: Elements and layers in the encoding of
+      `ice_binary`. Each distinct element and layer is stored only once
+      in the recording, and referenced by the layers and commits
+      containing it.
+    - `<chunk>.commits`: The commits, i.e. the number of their layers
+      followed by references to them.
+    - `<chunk>.index`: One fixed-size entry (`INDEX_DTYPE`) per commit,
+      holding its time and location.
+
+    `recording.json` lists the chunks. A new chunk is started when the
+    current one exceeds `chunk_size_bytes`.
+
+    The writer is not thread-safe; see `ArVizRecorder` for recording from
+    a committing process.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        chunk_size_bytes: int = 256 * 1024 * 1024,
+    ):
+        """
+        :param path: The recording directory. It is created if it does not exist
+            and must not contain a recording yet.
+        :param chunk_size_bytes: The size after which a new chunk is started.
+        """
+        if os.path.isfile(os.path.join(path, METADATA_FILENAME)):
+            raise FileExistsError(f"There is already a recording in '{path}'.")
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.chunk_size_bytes = chunk_size_bytes
+        self.chunks: List[Dict[str, int]] = []
+
+        self.num_commits = 0
+        self.num_elements = 0
+        self.num_stored_elements = 0
+        self._num_bytes_of_finished_chunks = 0
+
+        # Stored blobs by their digest.
+        self._blob_refs: Dict[bytes, BlobRef] = {}
+        # The last recorded layers: (component, name) -> (content hash, ref).
+        self._layer_refs: Dict[Tuple[str, str], Tuple[bytes, BlobRef]] = {}
+
+        self._blobs = None
+        self._commits = None
+        self._index = None
+        self._blobs_size = 0
+        self._commits_size = 0
+
+        self._start_chunk()
+
+    @property
+    def num_bytes(self) -> int:
+        """The number of bytes written to the blobs and commits files."""
+        return self._num_bytes_of_finished_chunks + self._blobs_size + self._commits_size
+
+    def write(
+        self,
+        updates: List[Union[viz.data.LayerUpdate, Tuple[viz.data.LayerUpdate, Optional[bytes]]]],
+        time_usec: int,
+    ):
+        """
+        Append a commit to the recording.
+
+        :param updates: The layer updates, optionally with their content
+            hashes (see `Layer.data_and_hash()`). Layers whose content
+            hash did not change are not serialized again.
+        :param time_usec: The time of the commit.
+        """
+        layer_refs = []
+        for update in updates:
+            update, content_hash = update if isinstance(update, tuple) else (update, None)
+            layer_refs.append(self._write_layer(update, content_hash))
+
+        record = _num_refs.pack(len(layer_refs)) + b"".join(
+            _blob_ref.pack(*ref) for ref in layer_refs
+        )
+        offset = self._commits_size
+        self._commits.write(record)
+        self._commits_size += len(record)
+        self._index.write(_index_entry.pack(time_usec, offset, len(record)))
+
+        chunk = self.chunks[-1]
+        chunk["num_commits"] += 1
+        if chunk["start_usec"] < 0:
+            chunk["start_usec"] = time_usec
+        chunk["end_usec"] = max(chunk["end_usec"], time_usec)
+        self.num_commits += 1
+
+        if self._blobs_size + self._commits_size >= self.chunk_size_bytes:
+            self._finish_chunk()
+            self._start_chunk()
+            self._write_metadata()
+
+    def flush(self):
+        """Flush the files and write the metadata."""
+        if self._blobs is None:
+            return
+        for file in (self._blobs, self._commits, self._index):
+            file.flush()
+        self._write_metadata()
+
+    def close(self):
+        if self._blobs is None:
+            return
+        self._finish_chunk()
+        self._write_metadata()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _write_layer(self, update: viz.data.LayerUpdate, content_hash: Optional[bytes]) -> BlobRef:
+        key = (update.component, update.name)
+        if content_hash is not None:
+            previous = self._layer_refs.get(key, None)
+            if previous is not None and previous[0] == content_hash:
+                return previous[1]
+
+        element_refs = []
+        for element in update.elements:
+            element_refs.append(self._write_blob(ice_binary.encode(element)))
+        self.num_elements += len(element_refs)
+
+        fields = {name: value for name, value in vars(update).items() if name != "elements"}
+        ref = self._write_blob(ice_binary.encode([fields, element_refs]), count=False)
+        if content_hash is not None:
+            self._layer_refs[key] = (content_hash, ref)
+        else:
+            self._layer_refs.pop(key, None)
+        return ref
+
+    def _write_blob(self, blob: bytearray, count=True) -> BlobRef:
+        digest = hashlib.blake2b(blob, digest_size=16).digest()
+        ref = self._blob_refs.get(digest, None)
+        if ref is None:
+            ref = (len(self.chunks) - 1, self._blobs_size, len(blob))
+            self._blobs.write(blob)
+            self._blobs_size += len(blob)
+            self._blob_refs[digest] = ref
+            if count:
+                self.num_stored_elements += 1
+        return ref
+
+    def _start_chunk(self):
+        chunk = len(self.chunks)
+        self._blobs = open(_chunk_path(self.path, chunk, "blobs"), "wb")
+        self._commits = open(_chunk_path(self.path, chunk, "commits"), "wb")
+        self._index = open(_chunk_path(self.path, chunk, "index"), "wb")
+        self._blobs_size = 0
+        self._commits_size = 0
+        self.chunks.append(dict(num_commits=0, start_usec=-1, end_usec=-1))
+
+    def _finish_chunk(self):
+        self._num_bytes_of_finished_chunks += self._blobs_size + self._commits_size
+        self._blobs_size = 0
+        self._commits_size = 0
+        for file in (self._blobs, self._commits, self._index):
+            file.close()
+        self._blobs = self._commits = self._index = None
+
+    def _write_metadata(self):
+        metadata = dict(
+            format=FORMAT_NAME,
+            version=FORMAT_VERSION,
+            chunks=self.chunks,
+        )
+        filename = os.path.join(self.path, METADATA_FILENAME)
+        with open(filename + ".tmp", "w") as file:
+            json.dump(metadata, file, indent=2)
+        os.replace(filename + ".tmp", filename)
+
+
+class ArVizRecordingReader:
+    """
+    Reads a recording written by `ArVizRecordingWriter` or `ArVizRecorder`.
+
+    The chunk files are memory-mapped, so only the commits which are
+    actually read are loaded from disk. Recently read elements are cached,
+    as consecutive commits usually share most of their elements.
+    """
+
+    def __init__(self, path: str, cache_size: int = 65536):
+        with open(os.path.join(path, METADATA_FILENAME)) as file:
+            metadata = json.load(file)
+        if metadata.get("format", None) != FORMAT_NAME:
+            raise ValueError(f"'{path}' does not contain an ArViz recording.")
+        if metadata["version"] != FORMAT_VERSION:
+            raise ValueError(
+                f"The recording in '{path}' has version {metadata['version']},"
+                f" but only version {FORMAT_VERSION} is supported."
+            )
+
+        self.path = path
+        num_chunks = len(metadata["chunks"])
+        indices = [
+            np.fromfile(_chunk_path(path, chunk, "index"), dtype=INDEX_DTYPE)
+            for chunk in range(num_chunks)
+        ]
+        self.index: np.ndarray = (
+            np.concatenate(indices) if indices else np.zeros(0, dtype=INDEX_DTYPE)
+        )
+        self.chunk_of_commit: np.ndarray = np.concatenate(
+            [np.full(len(index), chunk, dtype=np.int32) for chunk, index in enumerate(indices)]
+            or [np.zeros(0, dtype=np.int32)]
+        )
+
+        self._maps: Dict[Tuple[int, str], mmap.mmap] = {}
+        self._lock = threading.Lock()
+        self._load_blob = functools.lru_cache(maxsize=cache_size)(self._load_blob_uncached)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def times_usec(self) -> np.ndarray:
+        return self.index["time_usec"]
+
+    def select(
+        self,
+        start_usec: Optional[int] = None,
+        end_usec: Optional[int] = None,
+    ) -> np.ndarray:
+        """Return the positions of the commits in a time range."""
+        times = self.times_usec
+        mask = np.ones(len(times), dtype=bool)
+        if start_usec is not None:
+            mask &= times >= start_usec
+        if end_usec is not None:
+            mask &= times <= end_usec
+        return np.flatnonzero(mask)
+
+    def read(self, position: int) -> List[viz.data.LayerUpdate]:
+        """Read the layer updates of a commit."""
+        entry = self.index[position]
+        commits = self._map(int(self.chunk_of_commit[position]), "commits")
+        offset = int(entry["offset"])
+        (num_layers,) = _num_refs.unpack_from(commits, offset)
+        layer_refs = [
+            _blob_ref.unpack_from(commits, offset + _num_refs.size + i * _blob_ref.size)
+            for i in range(num_layers)
+        ]
+
+        updates = []
+        for layer_ref in layer_refs:
+            fields, element_refs = self._load_blob(layer_ref)
+            update = viz.data.LayerUpdate()
+            for name, value in fields.items():
+                setattr(update, name, value)
+            update.elements = [self._load_blob(tuple(ref)) for ref in element_refs]
+            updates.append(update)
+        return updates
+
+    def commits(
+        self,
+        start_usec: Optional[int] = None,
+        end_usec: Optional[int] = None,
+    ) -> Iterator[Tuple[int, List[viz.data.LayerUpdate]]]:
+        """Iterate over the commits as (time, layer updates)."""
+        for position in self.select(start_usec, end_usec):
+            yield int(self.times_usec[position]), self.read(position)
+
+    def close(self):
+        self._load_blob.cache_clear()
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _load_blob_uncached(self, ref: BlobRef):
+        chunk, offset, size = ref
+        value, _ = ice_binary.decode(self._map(chunk, "blobs")[offset : offset + size])
+        return value
+
+    def _map(self, chunk: int, kind: str) -> mmap.mmap:
+        with self._lock:
+            mapped = self._maps.get((chunk, kind), None)
+            if mapped is None:
+                with open(_chunk_path(self.path, chunk, kind), "rb") as file:
+                    if os.fstat(file.fileno()).st_size == 0:
+                        return b""
+                    mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[(chunk, kind)] = mapped
+            return mapped
+
+
+# Recording from a client
+
+
+@dc.dataclass
+class ArVizRecorderStatistics:
+    num_recorded: int = 0
+    # Commits dropped because the queue was full.
+    num_dropped: int = 0
+    num_errors: int = 0
+    queue_depth: int = 0
+    num_bytes: int = 0
+    num_elements: int = 0
+    # Distinct elements, which are actually stored.
+    num_stored_elements: int = 0
+
+
+class ArVizRecorder:
+    """
+    Records ArViz commits into a recording on disk (see `ArVizRecordingWriter`).
+
+    `record()` only enqueues the layer updates. They are serialized and
+    written in a background thread. If the queue is full, new commits are
+    dropped and counted in the statistics, unless `block_when_full` is true.
+
+    The layer updates are recorded by reference. Updates built by layers
+    stay valid, as elements build new Ice data when they change. Ice data
+    committed as such and arrays set via `PointCloud.cloud` must not be
+    modified after committing.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        chunk_size_bytes: int = 256 * 1024 * 1024,
+        max_queue_size: int = 1024,
+        block_when_full=False,
+        start=True,
+    ):
+        self.recording = ArVizRecordingWriter(path, chunk_size_bytes=chunk_size_bytes)
+        self.max_queue_size = max_queue_size
+        self.block_when_full = block_when_full
+
+        self._cond = threading.Condition()
+        self._queue: "collections.deque[Tuple[int, List]]" = collections.deque()
+        self._busy = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = ArVizRecorderStatistics()
+
+        if start:
+            self.start()
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="ArVizRecorder", daemon=True)
+        self._thread.start()
+
+    def record(
+        self,
+        updates: List[Union[viz.data.LayerUpdate, Tuple[viz.data.LayerUpdate, Optional[bytes]]]],
+        time_usec: Optional[int] = None,
+    ) -> bool:
+        """
+        Record a commit.
+        :param updates: The layer updates, optionally with their content hashes.
+        :param time_usec: The time of the commit. Now by default.
+        :return: False if the commit was dropped because the queue is full.
+        """
+        if time_usec is None:
+            time_usec = int(time.time() * 1e6)
+        with self._cond:
+            if len(self._queue) >= self.max_queue_size:
+                if not self.block_when_full:
+                    self._stats.num_dropped += 1
+                    return False
+                self._cond.wait_for(
+                    lambda: len(self._queue) < self.max_queue_size or not self._running
+                )
+            self._queue.append((time_usec, list(updates)))
+            self._cond.notify_all()
+        return True
+
+    def statistics(self) -> ArVizRecorderStatistics:
+        with self._cond:
+            return dc.replace(self._stats, queue_depth=len(self._queue))
+
+    def flush(self):
+        """Wait until all queued commits are written and flush the recording."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._queue and not self._busy or not self._running)
+            self.recording.flush()
+
+    def close(self):
+        """Write the queued commits and close the recording."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._cond:
+            items = list(self._queue)
+            self._queue.clear()
+        self._write_items(items)
+        self.recording.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or not self._running)
+                if not self._running:
+                    return
+                items = list(self._queue)
+                self._queue.clear()
+                self._busy = True
+                # Wake up blocked producers.
+                self._cond.notify_all()
+
+            self._write_items(items)
+
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def _write_items(self, items: List[Tuple[int, List]]):
+        recording = self.recording
+        for time_usec, updates in items:
+            try:
+                recording.write(updates, time_usec)
+            except Exception:
+                logger.exception("Failed to record ArViz commit.")
+                with self._cond:
+                    self._stats.num_errors += 1
+                continue
+            with self._cond:
+                self._stats.num_recorded += 1
+        with self._cond:
+            self._stats.num_bytes = recording.num_bytes
+            self._stats.num_elements = recording.num_elements
+            self._stats.num_stored_elements = recording.num_stored_elements
+
+
+class RecordingClient:
+    """
+    Wraps an ArViz client and records all its successful commits.
+
+    It can be used in place of the wrapped client (including stages and
+    `start_async()`). All other attributes are forwarded to it.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        recorder: Union[str, ArVizRecorder],
+    ):
+        """
+        :param client: The client to wrap.
+        :param recorder: The recorder, or the path of a new recording.
+        """
+        if isinstance(recorder, str):
+            recorder = ArVizRecorder(recorder)
+        self.client = client
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def begin_stage(self, commit_on_exit=True) -> Stage:
+        if commit_on_exit:
+            return Stage(self.client.component_name, commit_on_exit=commit_on_exit, client=self)
+        else:
+            return Stage(self.client.component_name)
+
+    def commit(
+        self,
+        layers_or_stages: Union[None, Layer, Stage, List[Union[Layer, Stage]]] = None,
+        full_resync=False,
+    ) -> CommitResult:
+        """See `Client.commit()`."""
+        updates, interaction_layers = self._prepare_commit(layers_or_stages)
+        return self._commit_updates(updates, interaction_layers, full_resync=full_resync)
+
+    def start_async(self, max_rate_hz: Optional[float] = 30.0, on_result=None):
+        """See `Client.start_async()`."""
+        from armarx_core.arviz.async_committer import AsyncCommitter
+
+        return AsyncCommitter(self, max_rate_hz=max_rate_hz, on_result=on_result)
+
+    def _commit_updates(self, updates_and_hashes, interaction_layers, full_resync=False):
+        result = self.client._commit_updates(
+            updates_and_hashes, interaction_layers, full_resync=full_resync
+        )
+        self.recorder.record(updates_and_hashes)
+        return result
+
+    def close_recording(self):
+        self.recorder.close()
+
+
+# Replaying
+
+
+class ArVizReplayer:
+    """
+    Re-commits the commits of a recording to an ArViz storage.
+
+    With `speed=1`, the time between two commits matches the time between
+    their recording; with e.g. `speed=10`, they are replayed ten times
+    faster, and with `speed=None` as fast as possible. If replaying falls
+    behind, all commits which are due are merged into one, keeping the
+    latest update of each layer.
+    """
+
+    def __init__(self, recording: Union[str, ArVizRecordingReader]):
+        if isinstance(recording, str):
+            recording = ArVizRecordingReader(recording)
+        self.recording = recording
+
+    def replay(
+        self,
+        target: Union[Client, Any],
+        speed: Optional[float] = 1.0,
+        start_usec: Optional[int] = None,
+        end_usec: Optional[int] = None,
+        stop: Optional[threading.Event] = None,
+    ) -> int:
+        """
+        Replay the recording.
+
+        :param target: A client or a proxy of an ArViz storage.
+        :param speed: The replay speed relative to the original speed.
+            If None, commits are sent as fast as possible.
+        :param start_usec: If given, skip commits older than this time.
+        :param end_usec: If given, skip commits newer than this time.
+        :param stop: If given, replaying stops when this event is set.
+        :return: The number of sent commits.
+        """
+        recording = self.recording
+        positions = recording.select(start_usec, end_usec)
+        if len(positions) == 0:
+            return 0
+
+        times = recording.times_usec[positions]
+        first_time = int(times[0])
+        start_wall_time = time.time()
+
+        num_sent = 0
+        begin = 0
+        while begin < len(positions):
+            if stop is not None and stop.is_set():
+                break
+
+            if speed is None:
+                end = begin + 1
+            else:
+                # Wait until the next commit is due.
+                due = start_wall_time + (int(times[begin]) - first_time) / 1e6 / speed
+                delay = due - time.time()
+                if delay > 0:
+                    if stop is not None:
+                        if stop.wait(delay):
+                            break
+                    else:
+                        time.sleep(delay)
+                # Send all commits which are due.
+                elapsed_usec = (time.time() - start_wall_time) * speed * 1e6
+                end = begin + 1
+                while end < len(positions) and times[end] - first_time <= elapsed_usec:
+                    end += 1
+
+            updates: Dict[Tuple[str, str], viz.data.LayerUpdate] = {}
+            for position in positions[begin:end]:
+                for update in recording.read(position):
+                    updates[(update.component, update.name)] = update
+            self._send(target, list(updates.values()))
+            num_sent += 1
+
+            begin = end
+
+        return num_sent
+
+    @staticmethod
+    def _send(target, updates: List[viz.data.LayerUpdate]):
+        if isinstance(target, (Client, RecordingClient)):
+            target._commit_updates([(update, None) for update in updates], [])
+        else:
+            input_ = viz.data.CommitInput()
+            input_.updates = updates
+            input_.interactionComponent = ""
+            input_.interactionLayers = []
+            target.commitAndReceiveInteractions(input_)
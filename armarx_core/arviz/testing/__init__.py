@@ -0,0 +1 @@
+from armarx_core.arviz.testing.local_storage import CommitStatistics, LocalArVizStorage
@@ -0,0 +1,164 @@
+import dataclasses as dc
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from armarx_core.slice_loader import load_armarx_slice
+
+load_armarx_slice("RobotAPI", "ArViz/Component.ice")
+
+import armarx.viz as viz
+from armarx import Vector3f
+
+
+@dc.dataclass
+class CommitStatistics:
+    revision: int
+    num_layers: int
+    num_elements: int
+    # The estimated serialized size of the layer updates, or -1 if not measured.
+    payload_bytes: int = -1
+
+
+class LocalArVizStorage(viz.StorageInterface):
+    """
+    An in-process stand-in for the ArViz storage, for tests and benchmarks.
+
+    It keeps the latest update of each layer, records statistics of each
+    commit, and returns interactions queued with `add_interaction()` to the
+    component which requested interactions for their layer.
+
+    It can be passed to the client directly (without Ice):
+
+    storage = LocalArVizStorage()
+    client = Client("Component", storage=storage)
+    """
+
+    def __init__(self, measure_payload_size=True):
+        """
+        :param measure_payload_size: If true, the serialized size of each
+            commit is estimated by traversing its layer updates. Disable this
+            when measuring the time spent in the client.
+        """
+        super().__init__()
+        self.measure_payload_size = measure_payload_size
+
+        self.revision = 0
+        self.layers: Dict[Tuple[str, str], viz.data.LayerUpdate] = {}
+        self.commits: List[CommitStatistics] = []
+
+        self._interactions: List[Tuple[str, viz.data.InteractionFeedback]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def num_commits(self) -> int:
+        return len(self.commits)
+
+    @property
+    def payload_bytes(self) -> int:
+        """The total estimated size of all commits."""
+        return sum(max(stats.payload_bytes, 0) for stats in self.commits)
+
+    def clear(self):
+        """Forget the layers, statistics and queued interactions."""
+        with self._lock:
+            self.layers.clear()
+            self.commits.clear()
+            self._interactions.clear()
+
+    def add_interaction(
+        self,
+        component: str,
+        layer: str,
+        element: str,
+        type: int = viz.data.InteractionFeedbackType.SELECT,
+        transformation: Optional[viz.data.GlobalPose] = None,
+        scale=(1.0, 1.0, 1.0),
+        chosen_context_menu_entry: int = 0,
+    ) -> viz.data.InteractionFeedback:
+        """
+        Queue an interaction, as if a user interacted with an element.
+        It is returned by the next commit requesting interactions for its layer.
+        """
+        feedback = viz.data.InteractionFeedback(
+            type=int(type),
+            component=component,
+            layer=layer,
+            element=element,
+            revision=self.revision,
+            chosenContextMenuEntry=chosen_context_menu_entry,
+            transformation=transformation or viz.data.GlobalPose(qw=1.0),
+            scale=Vector3f(*map(float, scale)),
+        )
+        with self._lock:
+            self._interactions.append((component, feedback))
+        return feedback
+
+    # StorageInterface
+
+    def updateLayers(self, updates: List[viz.data.LayerUpdate], c=None):
+        with self._lock:
+            self._apply(updates)
+
+    def commitAndReceiveInteractions(
+        self,
+        input: viz.data.CommitInput,
+        c=None,
+    ) -> viz.data.CommitResult:
+        with self._lock:
+            self._apply(input.updates)
+
+            layers = set(input.interactionLayers)
+            interactions = []
+            remaining = []
+            for component, feedback in self._interactions:
+                if component == input.interactionComponent and feedback.layer in layers:
+                    interactions.append(feedback)
+                else:
+                    remaining.append((component, feedback))
+            self._interactions = remaining
+
+            return viz.data.CommitResult(revision=self.revision, interactions=interactions)
+
+    def pullUpdatesSince(self, revision: int, c=None) -> viz.data.LayerUpdates:
+        with self._lock:
+            updates = list(self.layers.values()) if revision < self.revision else []
+            return viz.data.LayerUpdates(updates=updates, revision=self.revision)
+
+    def _apply(self, updates: List[viz.data.LayerUpdate]):
+        self.revision += 1
+        for update in updates:
+            self.layers[(update.component, update.name)] = update
+
+        stats = CommitStatistics(
+            revision=self.revision,
+            num_layers=len(updates),
+            num_elements=sum(len(update.elements) for update in updates),
+        )
+        if self.measure_payload_size:
+            stats.payload_bytes = sum(map(_estimate_size, updates))
+        self.commits.append(stats)
+
+
+def _estimate_size(value) -> int:
+    """Estimate the size of Ice data when serialized."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value) + 1
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 4
+    if isinstance(value, (list, tuple)):
+        return 1 + sum(map(_estimate_size, value))
+    if isinstance(value, dict):
+        return 1 + sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    try:
+        fields = vars(value)
+    except TypeError:
+        return 4
+    return sum(map(_estimate_size, fields.values()))
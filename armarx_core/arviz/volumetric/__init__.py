@@ -2,7 +2,7 @@ import numpy as np
 
 from typing import List, Tuple, Union, Callable, Any
 
-from armarx_core.arviz.elements import Box
+from armarx_core.arviz.elements import BoxArray
 from armarx_core.arviz.layer import Layer
 from armarx_core.arviz.volumetric.size_models import SizeModel, FixedScaleSizeModel
 
@@ -79,7 +79,6 @@ class Volumetric:
         self.cmap = cmap
 
         self.size_model = size_model or FixedScaleSizeModel(scale=1.0)
-        self._size_model_context = SizeModel.Context()
 
     def draw_on(
         self,
@@ -100,20 +99,21 @@ class Volumetric:
 
         normalize = plt.Normalize(vmin=vlimits[0], vmax=vlimits[1])
         colors = self.cmap(normalize(ys))
-        colors = (colors * 255).astype(np.int)
+        colors = (colors * 255).astype(int)
         if self.alpha is not None:
             colors[:, -1] = self.alpha
 
         self.size_model.set_value_limits(vlimits[0], vlimits[1])
 
-        for i, (x, y, color) in enumerate(zip(xs, ys, colors)):
-            self._size_model_context.i = i
-            self._size_model_context.x = x
-            self._size_model_context.y = y
+        sizes = self.size_model.get_sizes(voxel_size, xs, ys)
+        (indices,) = np.nonzero(sizes.min(axis=1) > 0)
 
-            size = self.size_model.get_size(
-                voxel_size=voxel_size, context=self._size_model_context
+        layer.add(
+            BoxArray(
+                id_prefix,
+                positions=xs[indices],
+                sizes=sizes[indices],
+                colors=colors[indices],
+                ids=[f"{id_prefix}{i:>04}" for i in indices.tolist()],
             )
-            if size is None or min(size) <= 0:
-                continue
-            layer.add(Box(f"{id_prefix}{i:>04}", position=x, size=size, color=color))
+        )
@@ -24,6 +24,32 @@ class SizeModel(abc.ABC):
     ) -> ty.Optional[np.ndarray]:
         pass
 
+    def get_sizes(
+        self,
+        voxel_size: np.ndarray,
+        xs: np.ndarray,
+        ys: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Get the sizes of all voxels at once.
+
+        Voxels which should not be drawn get a size of zero.
+        Override this with a vectorized implementation if possible.
+
+        :param voxel_size: The voxel size, shape (3,).
+        :param xs: The voxel positions, shape (N, 3).
+        :param ys: The voxel values, shape (N,).
+        :return: The sizes, shape (N, 3).
+        """
+        sizes = np.zeros((len(xs), 3))
+        context = self.Context()
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            context.i, context.x, context.y = i, x, y
+            size = self.get_size(voxel_size, context)
+            if size is not None:
+                sizes[i] = size
+        return sizes
+
     def set_value_limits(
         self,
         vmin: float,
@@ -40,6 +66,9 @@ class FixedScaleSizeModel(SizeModel):
     def get_size(self, voxel_size, context):
         return self.scale * voxel_size
 
+    def get_sizes(self, voxel_size, xs, ys):
+        return np.tile(self.scale * voxel_size, (len(xs), 1))
+
 
 class ValueProportionalSizeModel(SizeModel):
     """
@@ -85,3 +114,16 @@ class ValueProportionalSizeModel(SizeModel):
         )
         size = prop * self.fixed_scale * voxel_size
         return size if min(size) > self.min_absolute_size else np.zeros_like(size)
+
+    def get_sizes(self, voxel_size, xs, ys):
+        prop = rescale(
+            np.asarray(ys, dtype=float),
+            from_lo=self.from_lo,
+            from_hi=self.from_hi,
+            to_lo=self.to_lo_scale,
+            to_hi=self.to_hi_scale,
+            clip=True,
+        )
+        sizes = prop[:, np.newaxis] * self.fixed_scale * voxel_size
+        sizes[sizes.min(axis=1) <= self.min_absolute_size] = 0
+        return sizes
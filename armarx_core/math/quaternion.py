@@ -0,0 +1,101 @@
+"""
+Vectorized quaternion functions.
+
+Quaternions are given as [w, x, y, z] (like in transforms3d).
+All functions accept arrays with arbitrary leading dimensions.
+"""
+
+import numpy as np
+
+
+def mat2quat(mats: np.ndarray) -> np.ndarray:
+    """
+    Convert rotation matrices to unit quaternions.
+
+    :param mats: The rotation matrices, shape (..., 3, 3).
+    :return: The quaternions [w, x, y, z] with w >= 0, shape (..., 4).
+    """
+    mats = np.asarray(mats, dtype=np.float64)
+    assert mats.shape[-2:] == (3, 3), mats.shape
+
+    m00, m01, m02 = mats[..., 0, 0], mats[..., 0, 1], mats[..., 0, 2]
+    m10, m11, m12 = mats[..., 1, 0], mats[..., 1, 1], mats[..., 1, 2]
+    m20, m21, m22 = mats[..., 2, 0], mats[..., 2, 1], mats[..., 2, 2]
+
+    # Four candidates, each numerically stable if its first component is large.
+    candidates = np.stack(
+        [
+            np.stack([1 + m00 + m11 + m22, m21 - m12, m02 - m20, m10 - m01], axis=-1),
+            np.stack([m21 - m12, 1 + m00 - m11 - m22, m01 + m10, m02 + m20], axis=-1),
+            np.stack([m02 - m20, m01 + m10, 1 - m00 + m11 - m22, m12 + m21], axis=-1),
+            np.stack([m10 - m01, m02 + m20, m12 + m21, 1 - m00 - m11 + m22], axis=-1),
+        ],
+        axis=-2,
+    )
+    diagonal = np.stack(
+        [
+            candidates[..., 0, 0],
+            candidates[..., 1, 1],
+            candidates[..., 2, 2],
+            candidates[..., 3, 3],
+        ],
+        axis=-1,
+    )
+    best = np.argmax(diagonal, axis=-1)
+    quats = np.take_along_axis(candidates, best[..., None, None], axis=-2)[..., 0, :]
+    quats /= np.linalg.norm(quats, axis=-1, keepdims=True)
+    return np.where(quats[..., :1] < 0, -quats, quats)
+
+
+def quat2mat(quats: np.ndarray) -> np.ndarray:
+    """
+    Convert quaternions to rotation matrices.
+
+    :param quats: The quaternions [w, x, y, z], shape (..., 4). They are normalized.
+    :return: The rotation matrices, shape (..., 3, 3).
+    """
+    quats = np.asarray(quats, dtype=np.float64)
+    quats = quats / np.linalg.norm(quats, axis=-1, keepdims=True)
+    w, x, y, z = quats[..., 0], quats[..., 1], quats[..., 2], quats[..., 3]
+
+    mats = np.empty(quats.shape[:-1] + (3, 3))
+    mats[..., 0, 0] = 1 - 2 * (y * y + z * z)
+    mats[..., 0, 1] = 2 * (x * y - z * w)
+    mats[..., 0, 2] = 2 * (x * z + y * w)
+    mats[..., 1, 0] = 2 * (x * y + z * w)
+    mats[..., 1, 1] = 1 - 2 * (x * x + z * z)
+    mats[..., 1, 2] = 2 * (y * z - x * w)
+    mats[..., 2, 0] = 2 * (x * z - y * w)
+    mats[..., 2, 1] = 2 * (y * z + x * w)
+    mats[..., 2, 2] = 1 - 2 * (x * x + y * y)
+    return mats
+
+
+def slerp(q0: np.ndarray, q1: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """
+    Spherical linear interpolation between unit quaternions
+    along the shortest path.
+
+    :param q0: The start quaternions, shape (..., 4).
+    :param q1: The end quaternions, shape (..., 4).
+    :param t: The interpolation parameters in [0, 1], shape (...).
+    :return: The interpolated quaternions, shape (..., 4).
+    """
+    q0 = np.asarray(q0, dtype=np.float64)
+    q1 = np.asarray(q1, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)[..., None]
+
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    # Take the shorter path.
+    q1 = np.where(dot < 0, -q1, q1)
+    dot = np.abs(dot)
+
+    # Fall back to linear interpolation for (nearly) equal rotations.
+    linear = dot > 0.9995
+    theta = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_theta = np.where(linear, 1.0, np.sin(theta))
+    w0 = np.where(linear, 1 - t, np.sin((1 - t) * theta) / sin_theta)
+    w1 = np.where(linear, t, np.sin(t * theta) / sin_theta)
+
+    quats = w0 * q0 + w1 * q1
+    return quats / np.linalg.norm(quats, axis=-1, keepdims=True)
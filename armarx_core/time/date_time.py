@@ -1,3 +1,4 @@
+import functools
 import socket
 import time
 
@@ -19,6 +20,12 @@ def time_usec() -> int:
     return int(time.time() * 1e6)
 
 
+@functools.lru_cache(maxsize=None)
+def get_hostname() -> str:
+    """Return the hostname of this machine. It is only resolved once."""
+    return socket.gethostname()
+
+
 class DateTimeIceConverter(IceConverter):
     @classmethod
     def _import_dto(cls):
@@ -31,7 +38,7 @@ class DateTimeIceConverter(IceConverter):
         dto = DateTime()
         dto.timeSinceEpoch.microSeconds = bo
         dto.clockType = ClockTypeEnum.Monotonic
-        dto.hostname = socket.gethostname()
+        dto.hostname = get_hostname()
         return dto
 
 
@@ -115,3 +115,56 @@ def pythonic_from_aron_ice(
     raise TypeError(
         f"Could not handle aron object of type '{type(data)}'.\n" f"dir(a): {dir(data)}"
     )
+
+
+def get_aron_ice_element(
+    data: "armarx.aron.data.dto.GenericData",
+    path: str,
+) -> ty.Optional["armarx.aron.data.dto.GenericData"]:
+    """
+    Get a nested element of an Aron data Ice object without converting it.
+
+    :param data: The Aron data Ice object (usually a dict).
+    :param path: The keys separated by dots, e.g. "pose.position".
+        Integers index into lists.
+    :return: The element, or None if it does not exist.
+    """
+    for key in path.split("."):
+        if data is None:
+            return None
+        try:
+            elements = data.elements
+        except AttributeError:
+            return None
+        if isinstance(elements, dict):
+            data = elements.get(key, None)
+        else:
+            try:
+                data = elements[int(key)]
+            except (ValueError, IndexError):
+                return None
+    return data
+
+
+def pythonic_from_aron_ice_projected(
+    data: "armarx.aron.data.dto.GenericData",
+    paths: ty.Iterable[str],
+) -> ty.Dict[str, ty.Any]:
+    """
+    Convert only some elements of an Aron data Ice object to their pythonic
+    representation. Other elements (e.g. large arrays) are not touched.
+
+    Example:
+
+    pythonic_from_aron_ice_projected(data, ["name", "pose.position"])
+    # {"name": "...", "pose.position": np.array(...)}
+
+    :param data: The Aron data Ice object.
+    :param paths: The paths of the elements (see `get_aron_ice_element()`).
+    :return: A dict mapping the paths to the converted elements
+        (None if they do not exist).
+    """
+    return {
+        path: pythonic_from_aron_ice(get_aron_ice_element(data, path))
+        for path in paths
+    }
@@ -0,0 +1,150 @@
+import asyncio
+import typing as ty
+
+from armarx import armem
+
+from armarx_memory.core import MemoryID, error as armem_error
+from armarx_memory.client.MemoryNameSystem import MemoryNameSystem, ServerProxies
+from armarx_memory.client.AsyncReader import AsyncReader
+from armarx_memory.client.AsyncWriter import AsyncWriter
+from armarx_memory.client.detail.ice_asyncio import wrap_ice_future, gather_dict
+
+
+class AsyncMemoryNameSystem:
+    """
+    An asyncio variant of `MemoryNameSystem` using asynchronous Ice invocations.
+
+    Usage:
+
+    mns = AsyncMemoryNameSystem(MemoryNameSystem.wait_for_mns())
+    memories = await mns.query_latest([robot_id, object_id, human_id])
+    """
+
+    def __init__(
+        self,
+        mns: ty.Union[MemoryNameSystem, MemoryNameSystem.MemoryNameSystemPrx],
+    ):
+        if not isinstance(mns, MemoryNameSystem):
+            mns = MemoryNameSystem(mns)
+        # Holds the proxy and the resolved servers.
+        self.sync = mns
+
+    @property
+    def mns(self) -> MemoryNameSystem.MemoryNameSystemPrx:
+        return self.sync.mns
+
+    @property
+    def servers(self) -> ty.Dict[str, ServerProxies]:
+        return self.sync.servers
+
+    # Server Resolution
+
+    async def update(self):
+        import Ice
+
+        try:
+            result = await wrap_ice_future(self.mns.getAllRegisteredServersAsync())
+        except Ice.NotRegisteredException as e:
+            raise armem_error.ArMemError(e)
+        self.sync.handle_update_result(result)
+
+    async def resolve_server(
+        self,
+        memory_id: MemoryID,
+    ) -> ServerProxies:
+        server = self.sync.get_cached_server(memory_id)
+        if server is None:
+            if self.sync.is_known_missing(memory_id):
+                raise armem_error.CouldNotResolveMemoryServer(memory_id)
+
+            await self.update()
+            server = self.sync.get_cached_server(memory_id)
+            if server is None:
+                self.sync.mark_missing(memory_id)
+                raise armem_error.CouldNotResolveMemoryServer(memory_id)
+
+        return server
+
+    async def wait_for_server(self, memory_id: MemoryID) -> ServerProxies:
+        server = self.sync.get_cached_server(memory_id)
+        if server is None:
+            inputs = self.sync.make_wait_for_server_input(memory_id)
+
+            self.sync.logger.info(f"Waiting for memory server {memory_id} ...")
+            result = await wrap_ice_future(self.mns.waitForServerAsync(inputs))
+            self.sync.logger.info(f"Resolved memory server {memory_id}.")
+            server = self.sync.handle_wait_for_server_result(memory_id, result)
+            self.sync.store_server(memory_id, server)
+
+        return server
+
+    async def get_reader(self, memory_id: MemoryID) -> AsyncReader:
+        return AsyncReader((await self.resolve_server(memory_id)).reading)
+
+    async def wait_for_reader(self, memory_id: MemoryID) -> AsyncReader:
+        return AsyncReader((await self.wait_for_server(memory_id)).reading)
+
+    async def get_writer(self, memory_id: MemoryID) -> AsyncWriter:
+        return AsyncWriter((await self.resolve_server(memory_id)).writing)
+
+    async def wait_for_writer(self, memory_id: MemoryID) -> AsyncWriter:
+        return AsyncWriter((await self.wait_for_server(memory_id)).writing)
+
+    async def wait_for_readers(
+        self,
+        memory_ids: ty.List[MemoryID],
+    ) -> ty.Dict[MemoryID, AsyncReader]:
+        """Wait for the readers of multiple memories concurrently."""
+        return await gather_dict({id_: self.wait_for_reader(id_) for id_ in memory_ids})
+
+    async def wait_for_writers(
+        self,
+        memory_ids: ty.List[MemoryID],
+    ) -> ty.Dict[MemoryID, AsyncWriter]:
+        """Wait for the writers of multiple memories concurrently."""
+        return await gather_dict({id_: self.wait_for_writer(id_) for id_ in memory_ids})
+
+    # System-wide queries
+
+    async def query_latest(
+        self,
+        memory_ids: ty.List[MemoryID],
+    ) -> ty.Dict[MemoryID, armem.data.Memory]:
+        """
+        Query the latest snapshots of the given IDs, which may belong to
+        different memories, concurrently.
+        """
+
+        async def query(memory_id: MemoryID):
+            reader = await self.get_reader(memory_id)
+            return await reader.query_latest(memory_id)
+
+        return await gather_dict({id_: query(id_) for id_ in memory_ids})
+
+    async def resolve_entity_snapshots(
+        self,
+        ids: ty.List[MemoryID],
+    ) -> ty.Dict[MemoryID, armem.data.EntitySnapshot]:
+        """
+        Resolve snapshots from different memories, querying each memory
+        server concurrently (see `MemoryNameSystem.resolve_entity_snapshots()`).
+        """
+        ids_per_memory: ty.Dict[str, ty.List[MemoryID]] = dict()
+        for id_ in ids:
+            ids_per_memory.setdefault(id_.memory_name, []).append(id_)
+
+        async def query(memory_name: str, ids_: ty.List[MemoryID]):
+            reader = await self.get_reader(MemoryID(memory_name))
+            return await reader.query_snapshots(ids_)
+
+        results = await asyncio.gather(
+            *[query(name, ids_) for name, ids_ in ids_per_memory.items()]
+        )
+
+        snapshots = dict()
+        for result in results:
+            snapshots.update(result)
+        return snapshots
+
+    def __bool__(self):
+        return bool(self.mns)
@@ -0,0 +1,113 @@
+import typing as ty
+
+from armarx import armem
+
+from armarx_memory.core import MemoryID
+from armarx_memory.client.Reader import Reader, SnapshotInfo
+from armarx_memory.client.SnapshotSelector import SnapshotSelector
+from armarx_memory.client.detail.ice_asyncio import wrap_ice_future
+
+
+class AsyncReader:
+    """
+    An asyncio variant of `Reader` using asynchronous Ice invocations.
+
+    Queries to different memories can be run concurrently, e.g.:
+
+    robot, objects = await asyncio.gather(
+        robot_reader.query_latest(robot_id),
+        object_reader.query_latest(object_id),
+    )
+    """
+
+    def __init__(
+        self,
+        server: ty.Optional[Reader.ReadingMemoryServerPrx],
+    ):
+        self.server = server
+        # Used to build queries and to process results.
+        self._reader = Reader(server)
+
+    @classmethod
+    def from_reader(cls, reader: Reader) -> "AsyncReader":
+        return cls(reader.server)
+
+    async def query(
+        self,
+        queries: ty.List[armem.query.data.MemoryQuery],
+        with_data=True,
+    ) -> armem.data.Memory:
+        """
+        Perform a memory query. Return the result if successful,
+        otherwise raise an exception.
+        :param queries: The query(s)
+        :param with_data: If false, the instances' data is not transferred.
+        :return: The result, if successful.
+        """
+        inp = self._reader.make_input(queries, with_data=with_data)
+        result = await wrap_ice_future(self.server.queryAsync(inp))
+        return self._reader.handle_result(result)
+
+    async def query_snapshots(
+        self,
+        ids: ty.List[ty.Union[MemoryID, SnapshotSelector]],
+    ) -> ty.Dict[ty.Union[MemoryID, SnapshotSelector], armem.data.EntitySnapshot]:
+        """See `Reader.query_snapshots()`."""
+        memory = await self.query(self._reader.make_snapshots_queries(ids))
+        return self._reader.resolve_snapshots(memory, ids)
+
+    async def query_snapshot(
+        self,
+        snapshot_id: ty.Union[MemoryID, SnapshotSelector],
+    ) -> armem.data.EntitySnapshot:
+        return (await self.query_snapshots([snapshot_id]))[snapshot_id]
+
+    async def query_all(
+        self,
+        with_data=True,
+        history_depth: ty.Optional[int] = None,
+    ) -> armem.data.Memory:
+        return await self.query(
+            self._reader.make_all_queries(history_depth), with_data=with_data
+        )
+
+    async def query_core_segment(
+        self,
+        name: str,
+        regex=False,
+        latest_snapshot=False,
+        with_data=True,
+        history_depth: ty.Optional[int] = None,
+    ) -> armem.data.Memory:
+        return await self.query(
+            self._reader.make_core_segment_queries(
+                name=name,
+                regex=regex,
+                latest_snapshot=latest_snapshot,
+                history_depth=history_depth,
+            ),
+            with_data=with_data,
+        )
+
+    async def query_latest(
+        self,
+        memory_id: ty.Optional[MemoryID] = None,
+        with_data=True,
+    ) -> armem.data.Memory:
+        return await self.query(
+            self._reader.make_latest_queries(memory_id), with_data=with_data
+        )
+
+    async def query_snapshot_infos(
+        self,
+        memory_id: ty.Optional[MemoryID] = None,
+        history_depth: ty.Optional[int] = None,
+    ) -> ty.List[SnapshotInfo]:
+        """See `Reader.query_snapshot_infos()`."""
+        memory = await self.query(
+            self._reader.make_queries(memory_id, history_depth), with_data=False
+        )
+        return self._reader.get_snapshot_infos(memory)
+
+    def __bool__(self):
+        return bool(self.server)
@@ -0,0 +1,43 @@
+from typing import Optional
+
+import armarx.armem as armem
+
+from armarx_memory.core import MemoryID
+from armarx_memory.client.Commit import Commit
+from armarx_memory.client.Writer import Writer
+from armarx_memory.client.detail.ice_asyncio import wrap_ice_future
+
+
+class AsyncWriter:
+    """
+    An asyncio variant of `Writer` using asynchronous Ice invocations.
+    """
+
+    def __init__(
+        self,
+        server: Optional[Writer.WritingMemoryServerPrx] = None,
+    ):
+        self.server = server
+
+    @classmethod
+    def from_writer(cls, writer: Writer) -> "AsyncWriter":
+        return cls(writer.server)
+
+    async def add_provider_segment(
+        self,
+        provider_id: MemoryID,
+        clear_when_exists=False,
+    ):
+        inp = Writer.make_add_segment_input(provider_id, clear_when_exists)
+        results = await wrap_ice_future(self.server.addSegmentsAsync([inp]))
+        return results[0]
+
+    async def commit(
+        self,
+        commit: Commit,
+    ) -> armem.data.CommitResult:
+        ice_commit = Writer.make_ice_commit(commit)
+        return await wrap_ice_future(self.server.commitAsync(ice_commit))
+
+    def __bool__(self):
+        return bool(self.server)
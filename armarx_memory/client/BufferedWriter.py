@@ -0,0 +1,294 @@
+import concurrent.futures
+import logging
+import threading
+import time
+import typing as ty
+
+from armarx_memory.core import MemoryID, error as armem_error
+from armarx_memory.client.Commit import Commit, EntityUpdate
+from armarx_memory.client.Writer import Writer
+
+
+logger = logging.getLogger(__name__)
+
+
+def _resolve(future: concurrent.futures.Future, result=None, exception=None):
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except concurrent.futures.InvalidStateError:
+        logger.warning(f"Future {future} was already resolved.")
+
+
+class _PendingUpdate:
+    def __init__(self, update: EntityUpdate, future: concurrent.futures.Future):
+        self.update = update
+        self.futures = [future]
+
+
+class BufferedWriter:
+    """
+    A writer accumulating entity updates and committing them in batches
+    from a background thread.
+
+    A batch is committed when the buffer holds `max_updates` updates, when
+    the oldest buffered update is older than `max_age_seconds`, or when
+    `flush()` is called. The result of each update (`armem.data.EntityUpdateResult`)
+    is reported through the future returned by `add()`.
+
+    If `coalesce` is true, an update to an entity which already has a
+    buffered update replaces the buffered one. The futures of both updates
+    then receive the result of the newer update.
+
+    At most `max_pending` updates are buffered. When the buffer is full,
+    `add()` blocks until there is space again (back-pressure) or raises a
+    `CommitBufferFull` error if it must not block.
+
+    A future can be cancelled as long as its update is buffered. An update
+    whose futures were all cancelled is not committed.
+
+    Usage:
+
+    with BufferedWriter(mns.wait_for_writer(core_segment_id)) as writer:
+        for pose in poses:
+            future = writer.add(entity_id=entity_id, instances_data=[pose.to_aron_ice()])
+        writer.flush()
+        print(future.result())
+    """
+
+    def __init__(
+        self,
+        writer: Writer,
+        max_updates: int = 64,
+        max_age_seconds: float = 0.01,
+        coalesce: bool = False,
+        max_pending: int = 1024,
+        start: bool = True,
+    ):
+        self.writer = writer
+        self.max_updates = max_updates
+        self.max_age_seconds = max_age_seconds
+        self.coalesce = coalesce
+        self.max_pending = max_pending
+
+        self._cond = threading.Condition()
+        self._buffer: ty.List[_PendingUpdate] = []
+        self._buffer_by_entity: ty.Dict[MemoryID, _PendingUpdate] = dict()
+        self._in_flight: ty.List[_PendingUpdate] = []
+        self._oldest_time: ty.Optional[float] = None
+        self._flush_requested = False
+
+        self._running = False
+        self._thread: ty.Optional[threading.Thread] = None
+
+        if start:
+            self.start()
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name=self.__class__.__name__, daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, flush=True, timeout: ty.Optional[float] = None):
+        """
+        Stop the background thread.
+        :param flush: If true, commit the buffered updates before stopping.
+            Otherwise, their futures are cancelled.
+        :param timeout: Maximal time to wait for the thread to finish.
+        """
+        if flush:
+            self.flush(timeout=timeout)
+
+        with self._cond:
+            self._running = False
+            pending = self._take_buffer()
+            self._cond.notify_all()
+        for p in pending:
+            for future in p.futures:
+                future.cancel()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def add(
+        self,
+        update: ty.Optional[EntityUpdate] = None,
+        block: bool = True,
+        timeout: ty.Optional[float] = None,
+        **kwargs,
+    ) -> concurrent.futures.Future:
+        """
+        Add an update to the buffer.
+
+        :param update: The update. If None, it is constructed from `kwargs`.
+        :param block: Whether to wait for space in the buffer if it is full.
+        :param timeout: Maximal time to wait for space in the buffer.
+        :return: A future holding the `armem.data.EntityUpdateResult` of the update.
+        :raise CommitBufferFull: If the buffer is (still) full and `block`
+            is false or `timeout` expired.
+        :raise ArMemError: If the writer is not running or was stopped
+            while waiting.
+        """
+        if update is None:
+            update = EntityUpdate(**kwargs)
+        future = concurrent.futures.Future()
+
+        with self._cond:
+            if not self._running:
+                raise armem_error.ArMemError(
+                    f"{self.__class__.__name__} is not running."
+                )
+
+            if self.coalesce:
+                pending = self._buffer_by_entity.get(update.entity_id, None)
+                if pending is not None:
+                    pending.update = update
+                    pending.futures.append(future)
+                    return future
+
+            if len(self._buffer) >= self.max_pending:
+                if not block or not self._cond.wait_for(
+                    lambda: len(self._buffer) < self.max_pending or not self._running,
+                    timeout=timeout,
+                ):
+                    raise armem_error.CommitBufferFull(self.max_pending)
+                if not self._running:
+                    raise armem_error.ArMemError(
+                        f"{self.__class__.__name__} was stopped while waiting for space."
+                    )
+
+            pending = _PendingUpdate(update, future)
+            self._buffer.append(pending)
+            if self.coalesce:
+                self._buffer_by_entity[update.entity_id] = pending
+            if self._oldest_time is None:
+                # Let the background thread start waiting for the max age.
+                self._oldest_time = time.time()
+                self._cond.notify_all()
+            elif len(self._buffer) >= self.max_updates:
+                self._cond.notify_all()
+
+        return future
+
+    def commit(self, commit: Commit) -> ty.List[concurrent.futures.Future]:
+        """
+        Add all updates of `commit` to the buffer.
+        :return: The futures of the updates.
+        """
+        return [self.add(update) for update in commit.updates]
+
+    def flush(self, timeout: ty.Optional[float] = None):
+        """
+        Commit all buffered updates and wait until they have been committed.
+        """
+        with self._cond:
+            futures = [
+                future
+                for pending in self._buffer + self._in_flight
+                for future in pending.futures
+            ]
+            if self._buffer:
+                self._flush_requested = True
+                self._cond.notify_all()
+        concurrent.futures.wait(futures, timeout=timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._is_batch_ready():
+                    if self._oldest_time is None:
+                        self._cond.wait()
+                    else:
+                        remaining = self._oldest_time + self.max_age_seconds - time.time()
+                        self._cond.wait(max(remaining, 0.0))
+                if not self._running:
+                    return
+
+                self._in_flight = self._claim(self._take_buffer())
+                self._flush_requested = False
+                self._cond.notify_all()
+
+            try:
+                self._commit(self._in_flight)
+            except Exception:
+                # Never let a batch stop the thread, or later flushes would hang.
+                logger.exception(f"Failed to handle a batch of {len(self._in_flight)} updates.")
+                for pending in self._in_flight:
+                    for future in pending.futures:
+                        _resolve(future, exception=armem_error.ArMemError("Commit failed."))
+
+            with self._cond:
+                self._in_flight = []
+
+    def _is_batch_ready(self) -> bool:
+        if not self._buffer:
+            return False
+        return (
+            self._flush_requested
+            or len(self._buffer) >= self.max_updates
+            or time.time() - self._oldest_time >= self.max_age_seconds
+        )
+
+    def _take_buffer(self) -> ty.List[_PendingUpdate]:
+        buffer = self._buffer
+        self._buffer = []
+        self._buffer_by_entity = dict()
+        self._oldest_time = None
+        return buffer
+
+    @staticmethod
+    def _claim(batch: ty.List[_PendingUpdate]) -> ty.List[_PendingUpdate]:
+        """
+        Mark the futures of a batch as running, so they can no longer be
+        cancelled. Updates whose futures were all cancelled are dropped.
+        """
+        claimed = []
+        for pending in batch:
+            pending.futures = [f for f in pending.futures if f.set_running_or_notify_cancel()]
+            if pending.futures:
+                claimed.append(pending)
+        return claimed
+
+    def _commit(self, batch: ty.List[_PendingUpdate]):
+        if not batch:
+            return
+        commit = Commit(updates=[pending.update for pending in batch])
+        try:
+            result = self.writer.commit(commit)
+        except Exception as e:
+            logger.error(f"Failed to commit {len(batch)} updates: {e}")
+            for pending in batch:
+                for future in pending.futures:
+                    _resolve(future, exception=e)
+            return
+
+        results = list(result.results)
+        for i, pending in enumerate(batch):
+            for future in pending.futures:
+                if i < len(results):
+                    _resolve(future, result=results[i])
+                else:
+                    _resolve(
+                        future,
+                        exception=armem_error.ArMemError(
+                            f"Got {len(results)} results for {len(batch)} updates."
+                        ),
+                    )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop(flush=exc_type is None)
+
+    def __bool__(self):
+        return bool(self.writer)
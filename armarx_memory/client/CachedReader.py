@@ -0,0 +1,277 @@
+import collections
+import dataclasses as dc
+import threading
+import typing as ty
+
+import numpy as np
+
+from armarx import armem
+
+from armarx_memory.core import MemoryID
+from armarx_memory.client.Reader import Reader
+from armarx_memory.client.MemoryListener import MemoryListener
+from armarx_memory.client.SnapshotSelector import SnapshotSelector, SnapshotSelectorMode
+
+
+@dc.dataclass
+class CacheStatistics:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    num_entries: int = 0
+    size_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+
+class CachedReader(Reader):
+    """
+    A reader caching queried snapshots on the client side.
+
+    The cache is a LRU cache keyed by memory IDs with a budget in bytes.
+    Snapshots with a timestamp are immutable, so they are kept until they are
+    evicted. The results of "latest" queries (`query_snapshot()` with an ID
+    without timestamp and `query_latest()`) are only cached if a memory
+    listener is given. They are invalidated as soon as the listener reports
+    an update of the respective entity (or segment).
+
+    Note that cached results are shared between callers and must not be
+    modified.
+
+    Usage:
+
+    listener = MemoryListener("MyListener")
+    reader = CachedReader(mns.wait_for_reader(memory_id).server, listener=listener)
+    snapshot = reader.query_snapshot(entity_id)  # Queries the server.
+    snapshot = reader.query_snapshot(entity_id)  # Hit (until the entity is updated).
+    print(reader.statistics)
+    """
+
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+    _LATEST_SNAPSHOT = "latest_snapshot"
+    _LATEST_MEMORY = "latest_memory"
+    _SNAPSHOT = "snapshot"
+
+    def __init__(
+        self,
+        server: ty.Optional[Reader.ReadingMemoryServerPrx],
+        listener: ty.Optional[MemoryListener] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        super().__init__(server)
+
+        self.listener = listener
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries: ty.MutableMapping[
+            ty.Tuple[str, MemoryID], ty.Tuple[ty.Any, int]
+        ] = collections.OrderedDict()
+        # Latest IDs with their number of invalidations.
+        self._generations: ty.Dict[MemoryID, int] = collections.defaultdict(int)
+        self._subscribed: ty.Set[MemoryID] = set()
+
+        self._statistics = CacheStatistics()
+
+    @classmethod
+    def from_reader(cls, reader: Reader, **kwargs) -> "CachedReader":
+        return cls(reader.server, **kwargs)
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        with self._lock:
+            return dc.replace(
+                self._statistics,
+                num_entries=len(self._entries),
+            )
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def query_snapshots(
+        self,
+        ids: ty.List[ty.Union[MemoryID, SnapshotSelector]],
+    ) -> ty.Dict[ty.Union[MemoryID, SnapshotSelector], armem.data.EntitySnapshot]:
+        result = dict()
+        missing = []
+        generations = dict()
+
+        with self._lock:
+            for id_ in ids:
+                key = self._get_snapshot_key(self._to_selector(id_))
+                value = self._get(key)
+                if value is not None:
+                    result[id_] = value
+                else:
+                    missing.append(id_)
+                    if key is not None and key[0] == self._LATEST_SNAPSHOT:
+                        generations[key] = self._generations[key[1]]
+
+        if not missing:
+            return result
+
+        self._subscribe_latest([key[1] for key in generations])
+        snapshots = super().query_snapshots(missing)
+
+        with self._lock:
+            for id_, snapshot in snapshots.items():
+                selector = self._to_selector(id_)
+                key = self._get_snapshot_key(selector)
+                if key is None:
+                    pass
+                elif key[0] == self._SNAPSHOT:
+                    self._put(key, snapshot)
+                elif self._generations[key[1]] == generations[key]:
+                    # Not invalidated while the query was running.
+                    self._put(key, snapshot)
+
+                # The queried snapshot will not change anymore.
+                if selector.mode != SnapshotSelectorMode.EXACT:
+                    snapshot_id = MemoryID.from_ice(snapshot.id)
+                    self._put((self._SNAPSHOT, snapshot_id), snapshot)
+
+        result.update(snapshots)
+        return result
+
+    def query_latest(
+        self,
+        memory_id: ty.Optional[MemoryID] = None,
+        with_data=True,
+    ) -> armem.data.Memory:
+        if memory_id is None:
+            memory_id = MemoryID()
+        if not with_data:
+            # Metadata queries are cheap and not cached.
+            return super().query_latest(memory_id, with_data=False)
+        if self.listener is None:
+            with self._lock:
+                self._statistics.misses += 1
+            return super().query_latest(memory_id)
+
+        key = (self._LATEST_MEMORY, memory_id)
+        with self._lock:
+            memory = self._get(key)
+            generation = self._generations[memory_id]
+        if memory is not None:
+            return memory
+
+        self._subscribe_latest([memory_id])
+        memory = super().query_latest(memory_id)
+
+        with self._lock:
+            if self._generations[memory_id] == generation:
+                self._put(key, memory)
+        return memory
+
+    def invalidate(self, memory_id: MemoryID):
+        """
+        Invalidate all cached "latest" results affected by an update of `memory_id`.
+        """
+        with self._lock:
+            self._invalidate(memory_id)
+
+    def _get_snapshot_key(
+        self,
+        selector: SnapshotSelector,
+    ) -> ty.Optional[ty.Tuple[str, MemoryID]]:
+        if selector.mode == SnapshotSelectorMode.EXACT:
+            return (
+                self._SNAPSHOT,
+                selector.entity_id.with_timestamp(selector.timestamp_usec),
+            )
+        elif selector.mode == SnapshotSelectorMode.LATEST and self.listener is not None:
+            return self._LATEST_SNAPSHOT, selector.entity_id
+        else:
+            return None
+
+    def _subscribe_latest(self, memory_ids: ty.List[MemoryID]):
+        for memory_id in memory_ids:
+            with self._lock:
+                if memory_id in self._subscribed:
+                    continue
+                self._subscribed.add(memory_id)
+            self.listener.subscribe(memory_id, self._on_memory_updated)
+
+    def _on_memory_updated(self, subscription_id: MemoryID, updated_ids: ty.List[MemoryID]):
+        with self._lock:
+            self._invalidate(subscription_id)
+
+    def _invalidate(self, memory_id: MemoryID):
+        for latest_id in self._subscribed:
+            if memory_id.contains(latest_id) or latest_id.contains(memory_id):
+                self._generations[latest_id] += 1
+                for kind in [self._LATEST_SNAPSHOT, self._LATEST_MEMORY]:
+                    if self._remove((kind, latest_id)):
+                        self._statistics.invalidations += 1
+
+    def _get(self, key):
+        if key is None:
+            self._statistics.misses += 1
+            return None
+        try:
+            value, _ = self._entries[key]
+        except KeyError:
+            self._statistics.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._statistics.hits += 1
+        return value
+
+    def _put(self, key, value):
+        self._remove(key)
+
+        size = estimate_size_bytes(value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self._statistics.size_bytes += size
+
+        while self._statistics.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._statistics.evictions += 1
+
+    def _remove(self, key) -> bool:
+        try:
+            _, size = self._entries.pop(key)
+        except KeyError:
+            return False
+        self._statistics.size_bytes -= size
+        return True
+
+
+def estimate_size_bytes(value: ty.Any, _depth=0) -> int:
+    """
+    Estimate the memory consumed by a (nested) Ice data transfer object,
+    dominated by the size of binary payloads (e.g. Aron NDArrays) and strings.
+    """
+    overhead = 16
+    if _depth > 64:
+        return overhead
+    if value is None or isinstance(value, (bool, int, float)):
+        return 8
+    if isinstance(value, (bytes, bytearray, str)):
+        return overhead + len(value)
+    if isinstance(value, np.ndarray):
+        return overhead + value.nbytes
+    if isinstance(value, (list, tuple)):
+        return overhead + sum(estimate_size_bytes(v, _depth + 1) for v in value)
+    if isinstance(value, dict):
+        return overhead + sum(
+            estimate_size_bytes(k, _depth + 1) + estimate_size_bytes(v, _depth + 1)
+            for k, v in value.items()
+        )
+    try:
+        attributes = vars(value)
+    except TypeError:
+        return overhead
+    return overhead + sum(estimate_size_bytes(v, _depth + 1) for v in attributes.values())
@@ -1,9 +1,29 @@
+import asyncio
+import concurrent.futures
+import logging
+import queue
+import threading
+import time
 import typing as ty
 
 import armarx
 from armarx_memory import client as amc
 
 
+logger = logging.getLogger(__name__)
+
+
+class StreamedSnapshot(ty.NamedTuple):
+    """A snapshot yielded by `EntityStream.listen()`."""
+
+    id: amc.MemoryID
+    instances_data: ty.List[ty.Dict[str, ty.Any]]
+
+    @property
+    def timestamp_usec(self) -> int:
+        return self.id.timestamp_usec
+
+
 class EntityStream:
 
     def __init__(
@@ -13,6 +33,13 @@ class EntityStream:
         self._time_conv = DateTimeIceConverter()
         self._stop = False
 
+    def stop(self):
+        """
+        Stop the current `open()`, `listen()` or `listen_async()`.
+        The stream can be opened or listened to again afterwards.
+        """
+        self._stop = True
+
     def open(
             self,
             reader: amc.Reader,
@@ -20,9 +47,16 @@ class EntityStream:
             memory_callback: ty.Callable[[armarx.armem.data.Memory], bool],
             poll_rate_hz=10,
     ):
+        """
+        Poll the entity for new snapshots and pass them to `memory_callback`.
+
+        See `listen()` for an event-driven alternative that does not
+        query the memory when nothing has changed.
+        """
         from armarx_core.tools.metronome import Metronome
         from armarx_core.time.date_time import time_usec
 
+        self._stop = False
         metronome = Metronome(frequency_hertz=poll_rate_hz)
         time_start = time_usec()
 
@@ -53,26 +87,8 @@ class EntityStream:
             query = make_query()
             memory_data = reader.query(query)
 
-            # Get timestamps.
-            last_timestamp: ty.Optional[int] = None
-            max_timestamp: ty.Optional[int] = None
-
-            def process_instance_data(id_: amc.MemoryID, data_: ty.Dict):
-                nonlocal last_timestamp, max_timestamp
-                if last_timestamp is None:
-                    last_timestamp = id_.timestamp_usec
-                else:
-                    assert last_timestamp < id_.timestamp_usec, (
-                        f"Instances must be processed in order of timestamps, but {last_timestamp} >= "
-                        f"{id_.timestamp_usec}")
-
-                if max_timestamp is None:
-                    max_timestamp = id_.timestamp_usec
-                else:
-                    max_timestamp = max(max_timestamp, id_.timestamp_usec)
-
-            reader.for_each_instance_data(process_instance_data, memory_data)
-
+            # Get timestamps (without converting the data).
+            max_timestamp = self._get_max_timestamp(memory_data)
             if max_timestamp is not None:
                 time_start = max_timestamp + 1
 
@@ -80,3 +96,184 @@ class EntityStream:
 
             if not continue_:
                 self._stop = True
+
+    def listen(
+            self,
+            reader: amc.Reader,
+            listener: amc.MemoryListener,
+            entity_id: amc.MemoryID,
+            max_queue_size=64,
+            coalesce_seconds=0.005,
+    ) -> ty.Iterator[StreamedSnapshot]:
+        """
+        Yield new snapshots of an entity as they are committed.
+
+        Instead of polling, the stream subscribes to `entity_id` at `listener`.
+        The announced snapshot IDs are collected for `coalesce_seconds` and
+        queried together. The resulting snapshots are converted and yielded
+        in order of their timestamps. If the consumer does not keep up,
+        at most `max_queue_size` snapshots are buffered before the stream
+        stops fetching new ones.
+
+        Usage:
+
+        stream = EntityStream()
+        for snapshot in stream.listen(reader, listener, entity_id):
+            print(snapshot.id, snapshot.instances_data)
+            if done:
+                stream.stop()
+
+        :param reader: A reader of the entity's memory.
+        :param listener: The memory listener used to receive updates.
+        :param entity_id: The ID of the entity (or a containing segment).
+        :param max_queue_size: The maximal number of buffered snapshots.
+        :param coalesce_seconds: The time to collect updates before querying them.
+        """
+        self._stop = False
+        snapshots: queue.Queue = queue.Queue(maxsize=max_queue_size)
+
+        def put(snapshot: StreamedSnapshot) -> bool:
+            while not self._stop:
+                try:
+                    snapshots.put(snapshot, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        fetcher = _SnapshotFetcher(reader, put, coalesce_seconds, self)
+        listener.subscribe(entity_id, fetcher.on_update)
+        fetcher.start()
+        try:
+            while not self._stop:
+                try:
+                    yield snapshots.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        finally:
+            self._stop = True
+            listener.unsubscribe(entity_id, fetcher.on_update)
+            fetcher.join()
+
+    async def listen_async(
+            self,
+            reader: amc.Reader,
+            listener: amc.MemoryListener,
+            entity_id: amc.MemoryID,
+            max_queue_size=64,
+            coalesce_seconds=0.005,
+    ) -> ty.AsyncIterator[StreamedSnapshot]:
+        """
+        Like `listen()`, but as asynchronous iterator:
+
+        async for snapshot in stream.listen_async(reader, listener, entity_id):
+            ...
+        """
+        self._stop = False
+        loop = asyncio.get_event_loop()
+        snapshots: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+
+        def put(snapshot: StreamedSnapshot) -> bool:
+            future = asyncio.run_coroutine_threadsafe(snapshots.put(snapshot), loop)
+            while True:
+                try:
+                    future.result(timeout=0.1)
+                    return True
+                except concurrent.futures.TimeoutError:
+                    if self._stop:
+                        future.cancel()
+                        return False
+
+        fetcher = _SnapshotFetcher(reader, put, coalesce_seconds, self)
+        listener.subscribe(entity_id, fetcher.on_update)
+        fetcher.start()
+        try:
+            while not self._stop:
+                try:
+                    yield await asyncio.wait_for(snapshots.get(), timeout=0.1)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._stop = True
+            listener.unsubscribe(entity_id, fetcher.on_update)
+            await loop.run_in_executor(None, fetcher.join)
+
+    @staticmethod
+    def _get_max_timestamp(memory: armarx.armem.data.Memory) -> ty.Optional[int]:
+        timestamps = [
+            t.timeSinceEpoch.microSeconds
+            for core in memory.coreSegments.values()
+            for prov in core.providerSegments.values()
+            for entity in prov.entities.values()
+            for t in entity.history.keys()
+        ]
+        return max(timestamps) if timestamps else None
+
+
+class _SnapshotFetcher:
+    """
+    Collects snapshot IDs announced by a memory listener and fetches them
+    in a background thread.
+    """
+
+    def __init__(
+            self,
+            reader: amc.Reader,
+            put: ty.Callable[[StreamedSnapshot], bool],
+            coalesce_seconds: float,
+            stream: EntityStream,
+    ):
+        self.reader = reader
+        self.put = put
+        self.coalesce_seconds = coalesce_seconds
+        self.stream = stream
+
+        self._cond = threading.Condition()
+        self._pending: ty.Dict[amc.MemoryID, None] = dict()  # Ordered set.
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def join(self):
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join()
+
+    def on_update(self, subscription_id: amc.MemoryID, updated_ids: ty.List[amc.MemoryID]):
+        with self._cond:
+            for id_ in updated_ids:
+                self._pending[id_.with_instance_index(-1)] = None
+            self._cond.notify_all()
+
+    def _run(self):
+        from armarx_memory.aron.conversion import from_aron
+
+        while not self.stream._stop:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._pending or self.stream._stop, timeout=0.1
+                )
+                if not self._pending:
+                    continue
+
+            # Collect further updates arriving shortly after.
+            time.sleep(self.coalesce_seconds)
+            with self._cond:
+                snapshot_ids = list(self._pending)
+                self._pending = dict()
+
+            try:
+                snapshots = self.reader.query_snapshots(snapshot_ids)
+            except Exception as e:
+                logger.error(f"Failed to query updated snapshots {snapshot_ids}: {e}")
+                continue
+
+            for snapshot_id in sorted(snapshots, key=lambda i: i.timestamp_usec):
+                snapshot = snapshots[snapshot_id]
+                streamed = StreamedSnapshot(
+                    id=snapshot_id,
+                    instances_data=[from_aron(i.data) for i in snapshot.instances],
+                )
+                if not self.put(streamed):
+                    return
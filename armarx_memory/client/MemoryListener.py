@@ -1,3 +1,9 @@
+import asyncio
+import collections
+import concurrent.futures
+import dataclasses as dc
+import inspect
+import threading
 import typing as ty
 import logging
 
@@ -14,7 +20,95 @@ from armarx_memory.core.MemoryID import MemoryID
 logger = logging.getLogger(__file__)
 
 
+@dc.dataclass
+class SubscriptionStatistics:
+    """Dispatch statistics of one subscribed memory ID."""
+
+    num_callbacks: int = 0
+    # Number of notifications waiting to be dispatched.
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    num_dispatched: int = 0
+    num_errors: int = 0
+
+
+class _Subscription:
+    """
+    The callbacks of one subscribed ID and their pending notifications.
+
+    Notifications of a subscription are dispatched one after another,
+    so its callbacks observe updates in the order they were received.
+    """
+
+    def __init__(self, subscription_id: MemoryID):
+        self.id = subscription_id
+        self.callbacks: ty.List["MemoryListener.Callback"] = []
+
+        self.lock = threading.Lock()
+        self.pending: ty.Deque[ty.List[MemoryID]] = collections.deque()
+        self.running = False
+        self.stats = SubscriptionStatistics()
+
+    def push(self, snapshot_ids: ty.List[MemoryID]) -> bool:
+        """Enqueue a notification. Return true if a drain must be started."""
+        with self.lock:
+            self.pending.append(snapshot_ids)
+            depth = len(self.pending)
+            self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
+            if self.running:
+                return False
+            self.running = True
+            return True
+
+    def pop(self) -> ty.Optional[ty.List[MemoryID]]:
+        """Dequeue a notification. Return None and stop draining if there is none."""
+        with self.lock:
+            if not self.pending:
+                self.running = False
+                return None
+            return self.pending.popleft()
+
+    def count_dispatched(self, num_errors=0):
+        """Count a dispatched notification and the errors of its callbacks."""
+        with self.lock:
+            self.stats.num_dispatched += 1
+            self.stats.num_errors += num_errors
+
+    def statistics(self) -> SubscriptionStatistics:
+        with self.lock:
+            return dc.replace(
+                self.stats,
+                num_callbacks=len(self.callbacks),
+                queue_depth=len(self.pending),
+            )
+
+
+class _SubscriptionNode:
+    """A node of the subscription trie."""
+
+    def __init__(self):
+        self.children: ty.Dict[str, "_SubscriptionNode"] = {}
+        self.subscriptions: ty.Dict[MemoryID, _Subscription] = {}
+
+    def __bool__(self):
+        return bool(self.children or self.subscriptions)
+
+
 class MemoryListener(armem.client.MemoryListenerInterface):
+    """
+    Receives memory updates and notifies the subscribed callbacks.
+
+    Subscriptions are stored in a trie over memory, core segment,
+    provider segment and entity names, so routing an update only visits
+    the subscriptions containing it.
+
+    By default, callbacks are called directly in the thread receiving
+    the update. If an `executor` (e.g. a `ThreadPoolExecutor`) or an
+    asyncio `loop` is given, callbacks are dispatched there instead, so
+    slow callbacks do not block other subscriptions. Callbacks of the
+    same subscribed ID are still called in order. With a `loop`, callbacks
+    may also be coroutine functions.
+    """
 
     Callback = ty.Callable[[MemoryID, ty.List[MemoryID]], None]
     UpdatedSnapshotIDs = ty.List[ty.Union[MemoryID, "armarx.armem.data.MemoryID"]]
@@ -26,7 +120,11 @@ class MemoryListener(armem.client.MemoryListenerInterface):
         name: ty.Optional[str] = None,
         register=True,
         log_fn=None,
+        executor: ty.Optional[concurrent.futures.Executor] = None,
+        loop: ty.Optional[asyncio.AbstractEventLoop] = None,
     ):
+        assert executor is None or loop is None, "Specify either an executor or a loop."
+
         self.name = name
         self.proxy = None
 
@@ -37,8 +135,17 @@ class MemoryListener(armem.client.MemoryListenerInterface):
 
         self.log_fn = log_fn
 
+        self.executor = executor
+        self.loop = loop
+
         self.subscriptions: ty.Dict[MemoryID, ty.List["MemoryListener.Callback"]] = {}
 
+        self._lock = threading.RLock()
+        self._root = _SubscriptionNode()
+        self._used_topics: ty.Set[str] = set()
+        # Topics of subscriptions made before registering at Ice.
+        self._pending_topics: ty.List[str] = []
+
         if register:
             self.register()
 
@@ -46,12 +153,28 @@ class MemoryListener(armem.client.MemoryListenerInterface):
         self.log_fn(f"Register {self.__class__.__name__} '{self.name}' ...")
 
         self.proxy = ice_manager.register_object(self, self.name)
+
+        pending_topics, self._pending_topics = self._pending_topics, []
+        for topic_name in pending_topics:
+            self._use_topic(topic_name)
         return self.proxy
 
     def use_topic_of_id(self, memory_id: MemoryID):
         topic_name = self.TopicNameFormat.format(memory_name=memory_id.memory_name)
+        if self.proxy is None:
+            # Not registered at Ice (yet), e.g. when notified by a local
+            # memory system. The topic is used once registered.
+            if topic_name not in self._pending_topics:
+                self._pending_topics.append(topic_name)
+            return
+        self._use_topic(topic_name)
+
+    def _use_topic(self, topic_name: str):
+        if topic_name in self._used_topics:
+            return
         self.log_fn(f"'{self.name}': Use topic '{topic_name}'.")
         ice_manager.using_topic(self.proxy, topic_name)
+        self._used_topics.add(topic_name)
 
     def subscribe(self, subscription_id: MemoryID, callback: Callback):
         """
@@ -61,10 +184,50 @@ class MemoryListener(armem.client.MemoryListenerInterface):
         """
         self.log_fn(f"'{self.name}': Subscribe to {subscription_id}.")
         self.use_topic_of_id(memory_id=subscription_id)
-        if subscription_id not in self.subscriptions:
-            self.subscriptions[subscription_id] = [callback]
-        else:
-            self.subscriptions[subscription_id].append(callback)
+
+        with self._lock:
+            node = self._root
+            for name in self._get_route(subscription_id):
+                node = node.children.setdefault(name, _SubscriptionNode())
+
+            subscription = node.subscriptions.get(subscription_id, None)
+            if subscription is None:
+                subscription = _Subscription(subscription_id)
+                node.subscriptions[subscription_id] = subscription
+                self.subscriptions[subscription_id] = subscription.callbacks
+            subscription.callbacks.append(callback)
+
+    def unsubscribe(self, subscription_id: MemoryID, callback: Callback):
+        """
+        Remove a callback subscribed by `subscribe()`.
+        :param subscription_id: The subscribed ID.
+        :param callback: The callback.
+        """
+        with self._lock:
+            path = [self._root]
+            for name in self._get_route(subscription_id):
+                node = path[-1].children.get(name, None)
+                if node is None:
+                    return
+                path.append(node)
+
+            subscription = path[-1].subscriptions.get(subscription_id, None)
+            if subscription is None:
+                return
+            if callback in subscription.callbacks:
+                subscription.callbacks.remove(callback)
+            if subscription.callbacks:
+                return
+
+            path[-1].subscriptions.pop(subscription_id)
+            self.subscriptions.pop(subscription_id, None)
+
+            # Prune empty nodes.
+            route = self._get_route(subscription_id)
+            for depth in range(len(route), 0, -1):
+                if path[depth]:
+                    break
+                path[depth - 1].children.pop(route[depth - 1])
 
     def updated(self, updated_snapshot_ids: UpdatedSnapshotIDs):
         """
@@ -79,19 +242,119 @@ class MemoryListener(armem.client.MemoryListenerInterface):
         for id in updated_snapshot_ids:
             assert isinstance(id, MemoryID)
 
-        for subscribed_id, callbacks in self.subscriptions.items():
-            # Split by subscribed id
-            matching_snapshot_ids = [
-                updated_snapshot_id
-                for updated_snapshot_id in updated_snapshot_ids
-                if subscribed_id.contains(updated_snapshot_id)
-            ]
-            # Call callbacks
-            if len(matching_snapshot_ids) > 0:
-                for callback in callbacks:
-                    callback(subscribed_id, matching_snapshot_ids)
+        # Split by subscribed id
+        matching_snapshot_ids: ty.Dict[MemoryID, ty.Tuple[_Subscription, ty.List[MemoryID]]] = {}
+        with self._lock:
+            for updated_snapshot_id in updated_snapshot_ids:
+                for subscription in self._find_subscriptions(updated_snapshot_id):
+                    entry = matching_snapshot_ids.get(subscription.id, None)
+                    if entry is None:
+                        matching_snapshot_ids[subscription.id] = (subscription, [updated_snapshot_id])
+                    else:
+                        entry[1].append(updated_snapshot_id)
+
+        # Call callbacks
+        for subscription, snapshot_ids in matching_snapshot_ids.values():
+            self._dispatch(subscription, snapshot_ids)
 
     def memoryUpdated(self, updated_snapshot_ids: ty.List[armem.data.MemoryID], c=None):
         """Called via the MemoryListenerTopic."""
         updated_snapshot_ids = MemoryID.from_ice(updated_snapshot_ids)
         self.updated(updated_snapshot_ids)
+
+    def statistics(self) -> ty.Dict[MemoryID, SubscriptionStatistics]:
+        """Return the dispatch statistics of all subscriptions."""
+        with self._lock:
+            subscriptions = list(self._iterate_subscriptions(self._root))
+        return {s.id: s.statistics() for s in subscriptions}
+
+    def queue_depths(self) -> ty.Dict[MemoryID, int]:
+        """Return the number of pending notifications of all subscriptions."""
+        return {id_: stats.queue_depth for id_, stats in self.statistics().items()}
+
+    @staticmethod
+    def _get_route(memory_id: MemoryID) -> ty.List[str]:
+        """
+        Return the leading non-empty names of an ID.
+        Like in `MemoryID.contains()`, names after an empty one are ignored.
+        """
+        route = []
+        for name in (
+            memory_id.memory_name,
+            memory_id.core_segment_name,
+            memory_id.provider_segment_name,
+            memory_id.entity_name,
+        ):
+            if not name:
+                break
+            route.append(name)
+        return route
+
+    def _find_subscriptions(self, snapshot_id: MemoryID) -> ty.Iterable[_Subscription]:
+        node = self._root
+        route = self._get_route(snapshot_id)
+        for depth in range(len(route) + 1):
+            if depth == 4:
+                # Subscriptions of entities may restrict timestamps and instances.
+                for subscription in node.subscriptions.values():
+                    if subscription.id.contains(snapshot_id):
+                        yield subscription
+            else:
+                yield from node.subscriptions.values()
+
+            if depth < len(route):
+                node = node.children.get(route[depth], None)
+                if node is None:
+                    return
+
+    def _iterate_subscriptions(self, node: _SubscriptionNode) -> ty.Iterable[_Subscription]:
+        yield from node.subscriptions.values()
+        for child in node.children.values():
+            yield from self._iterate_subscriptions(child)
+
+    def _dispatch(self, subscription: _Subscription, snapshot_ids: ty.List[MemoryID]):
+        if self.executor is None and self.loop is None:
+            subscription.count_dispatched()
+            for callback in list(subscription.callbacks):
+                callback(subscription.id, snapshot_ids)
+            return
+
+        if not subscription.push(snapshot_ids):
+            # Already being drained.
+            return
+        if self.executor is not None:
+            self.executor.submit(self._drain, subscription)
+        else:
+            self.loop.call_soon_threadsafe(
+                lambda: self.loop.create_task(self._drain_async(subscription))
+            )
+
+    def _drain(self, subscription: _Subscription):
+        while True:
+            snapshot_ids = subscription.pop()
+            if snapshot_ids is None:
+                return
+            num_errors = 0
+            for callback in list(subscription.callbacks):
+                try:
+                    callback(subscription.id, snapshot_ids)
+                except Exception:
+                    num_errors += 1
+                    logger.exception(f"Error in callback of subscription {subscription.id}.")
+            subscription.count_dispatched(num_errors)
+
+    async def _drain_async(self, subscription: _Subscription):
+        while True:
+            snapshot_ids = subscription.pop()
+            if snapshot_ids is None:
+                return
+            num_errors = 0
+            for callback in list(subscription.callbacks):
+                try:
+                    result = callback(subscription.id, snapshot_ids)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:
+                    num_errors += 1
+                    logger.exception(f"Error in callback of subscription {subscription.id}.")
+            subscription.count_dispatched(num_errors)
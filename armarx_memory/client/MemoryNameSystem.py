@@ -1,5 +1,10 @@
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional
+import concurrent.futures
+import contextlib
+import dataclasses as dc
 import logging
+import threading
+import time
 
 import armarx
 from armarx_core import slice_loader
@@ -30,6 +35,19 @@ class ServerProxies:
         return cls(reading=server.reading, writing=server.writing)
 
 
+@dc.dataclass
+class SnapshotResolution:
+    """The result of `MemoryNameSystem.resolve_entity_snapshots_detailed()`."""
+
+    snapshots: Dict[MemoryID, "armem.data.EntitySnapshot"] = dc.field(default_factory=dict)
+    # The errors of memory servers which could not be queried, by memory name.
+    errors: Dict[str, Exception] = dc.field(default_factory=dict)
+
+    @property
+    def success(self) -> bool:
+        return not self.errors
+
+
 class MemoryNameSystem:
 
     cls_logger = logging.getLogger(__file__)
@@ -73,13 +91,34 @@ class MemoryNameSystem:
         self,
         mns: Optional[MemoryNameSystemPrx],
         logger=None,
+        ttl_seconds: Optional[float] = None,
+        negative_ttl_seconds: float = 1.0,
     ):
+        """
+        :param mns: The proxy of the memory name system.
+        :param logger: The logger.
+        :param ttl_seconds: How long resolved servers are cached.
+            If None, they are cached until they are invalidated.
+        :param negative_ttl_seconds: How long a memory name that could not
+            be resolved is reported as unresolvable without asking the MNS again.
+        """
 
         self.mns = mns
         self.servers: Dict[str, ServerProxies] = {}
 
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+
         self.logger = logger or self.cls_logger
 
+        # Time (monotonic) when the servers were resolved.
+        self._resolved_at: Dict[str, float] = {}
+        # Time (monotonic) when the memory names were not found.
+        self._missing_at: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        # Serializes update() calls caused by cache misses.
+        self._update_lock = threading.Lock()
+
     # Server Resolution
 
     def update(self):
@@ -90,59 +129,210 @@ class MemoryNameSystem:
             result = self.mns.getAllRegisteredServers()
         except Ice.NotRegisteredException as e:
             raise armem_error.ArMemError(e)
-        if result.success:
-            # Do some implicit type check
-            self.servers = {
-                name: ServerProxies.from_ice(server)
-                for name, server in result.servers.items()
-            }
-        else:
-            raise armem_error.ArMemError(
-                f"MemoryNameSystem query failed: {result.errorMessage}"
-            )
+        self.handle_update_result(result)
 
     def resolve_server(
         self,
         memory_id: MemoryID,
     ) -> ServerProxies:
-
-        server = self.servers.get(memory_id.memory_name, None)
-
+        server = self.get_cached_server(memory_id)
         if server is None:
-            self.update()
-            server = self.servers.get(memory_id.memory_name, None)
-            if server is None:
+            if self.is_known_missing(memory_id):
                 raise armem_error.CouldNotResolveMemoryServer(memory_id)
 
+            with self._update_lock:
+                # Another thread may have updated in the meantime.
+                server = self.get_cached_server(memory_id)
+                if server is None:
+                    self.update()
+                    server = self.get_cached_server(memory_id)
+                    if server is None:
+                        self.mark_missing(memory_id)
+                        raise armem_error.CouldNotResolveMemoryServer(memory_id)
+
         assert server is not None
         return server
 
     def wait_for_server(self, memory_id: MemoryID) -> ServerProxies:
 
-        server = self.servers.get(memory_id.memory_name, None)
+        server = self.get_cached_server(memory_id)
         if server is None:
-            inputs = armem.mns.dto.WaitForServerInput(
-                name=memory_id.memory_name,
-            )
+            inputs = self.make_wait_for_server_input(memory_id)
 
             self.logger.info(f"Waiting for memory server {memory_id} ...")
             result: armem.mns.dto.WaitForServerResult = self.mns.waitForServer(inputs)
             self.logger.info(f"Resolved memory server {memory_id}.")
-            if result.success:
-                if result.server.reading or result.server.writing:
-                    server = ServerProxies.from_ice(result.server)
-                else:
-                    raise armem_error.CouldNotResolveMemoryServer(
-                        memory_id, f"Returned proxy is null: {result.proxy}"
-                    )
-            else:
-                raise armem_error.CouldNotResolveMemoryServer(
-                    memory_id, result.errorMessage
-                )
+            server = self.handle_wait_for_server_result(memory_id, result)
+            self.store_server(memory_id, server)
 
         assert server is not None
         return server
 
+    def invalidate(self, memory_id: Optional[MemoryID] = None):
+        """
+        Remove a resolved server from the cache, e.g. after its proxy failed.
+        The server will be resolved again on its next use.
+        :param memory_id: An ID of the memory. If None, all servers are removed.
+        """
+        with self._lock:
+            if memory_id is None:
+                self.servers = {}
+                self._resolved_at.clear()
+                self._missing_at.clear()
+            else:
+                self.servers.pop(memory_id.memory_name, None)
+                self._resolved_at.pop(memory_id.memory_name, None)
+                self._missing_at.pop(memory_id.memory_name, None)
+
+    @contextlib.contextmanager
+    def invalidating(self, memory_id: MemoryID):
+        """
+        Invalidate the memory's server if an Ice error occurs in the context.
+
+        Usage:
+
+        with mns.invalidating(memory_id):
+            mns.get_reader(memory_id).query_latest(memory_id)
+        """
+        import Ice
+
+        try:
+            yield
+        except (
+            Ice.ConnectFailedException,
+            Ice.ConnectionLostException,
+            Ice.ObjectNotExistException,
+            Ice.NoEndpointException,
+            Ice.NotRegisteredException,
+        ):
+            self.invalidate(memory_id)
+            raise
+
+    def prewarm(
+        self,
+        memory_ids: Iterable[MemoryID],
+        wait=False,
+        max_workers: int = 8,
+    ) -> Dict[str, ServerProxies]:
+        """
+        Resolve the servers of multiple memories in advance.
+
+        All registered servers are fetched with a single update. If `wait`
+        is true, the servers of the remaining memories are waited for
+        concurrently.
+
+        :param memory_ids: IDs of the memories.
+        :param wait: Whether to wait for servers which are not registered yet.
+        :param max_workers: The number of threads waiting for servers.
+        :return: The resolved servers by memory name.
+        """
+        memory_ids = {id_.memory_name: MemoryID(id_.memory_name) for id_ in memory_ids}
+
+        if any(self.get_cached_server(id_) is None for id_ in memory_ids.values()):
+            with self._update_lock:
+                self.update()
+
+        missing = [id_ for id_ in memory_ids.values() if self.get_cached_server(id_) is None]
+        if wait and missing:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(max_workers, len(missing))
+            ) as executor:
+                for future in [executor.submit(self.wait_for_server, id_) for id_ in missing]:
+                    future.result()
+
+        resolved = {name: self.get_cached_server(id_) for name, id_ in memory_ids.items()}
+        return {name: server for name, server in resolved.items() if server is not None}
+
+    # Server Cache (also used by the AsyncMemoryNameSystem)
+
+    def get_cached_server(self, memory_id: MemoryID) -> Optional[ServerProxies]:
+        """
+        Return the cached server of the memory without contacting the MNS.
+        :return: The server, or None if it is not cached or has expired.
+        """
+        name = memory_id.memory_name
+        with self._lock:
+            server = self.servers.get(name, None)
+            if server is not None and self.ttl_seconds is not None:
+                resolved_at = self._resolved_at.get(name, None)
+                if resolved_at is not None and time.monotonic() - resolved_at > self.ttl_seconds:
+                    self.servers.pop(name)
+                    self._resolved_at.pop(name)
+                    return None
+            return server
+
+    def store_server(self, memory_id: MemoryID, server: ServerProxies):
+        """Cache the resolved server of the memory."""
+        with self._lock:
+            self.servers[memory_id.memory_name] = server
+            self._resolved_at[memory_id.memory_name] = time.monotonic()
+            self._missing_at.pop(memory_id.memory_name, None)
+
+    def is_known_missing(self, memory_id: MemoryID) -> bool:
+        """
+        Whether the memory could not be resolved during the last
+        `negative_ttl_seconds` (see `mark_missing()`).
+        """
+        with self._lock:
+            missing_at = self._missing_at.get(memory_id.memory_name, None)
+            return (
+                missing_at is not None
+                and time.monotonic() - missing_at <= self.negative_ttl_seconds
+            )
+
+    def mark_missing(self, memory_id: MemoryID):
+        """Remember that the memory could not be resolved."""
+        with self._lock:
+            self._missing_at[memory_id.memory_name] = time.monotonic()
+
+    def handle_update_result(
+        self,
+        result: "armem.mns.dto.GetAllRegisteredServersResult",
+    ):
+        """Cache the servers returned by `getAllRegisteredServers()`."""
+        if result.success:
+            # Do some implicit type check
+            servers = {
+                name: ServerProxies.from_ice(server)
+                for name, server in result.servers.items()
+            }
+            now = time.monotonic()
+            with self._lock:
+                self.servers = servers
+                self._resolved_at = {name: now for name in servers}
+                for name in servers:
+                    self._missing_at.pop(name, None)
+        else:
+            raise armem_error.ArMemError(
+                f"MemoryNameSystem query failed: {result.errorMessage}"
+            )
+
+    @staticmethod
+    def make_wait_for_server_input(
+        memory_id: MemoryID,
+    ) -> "armem.mns.dto.WaitForServerInput":
+        return armem.mns.dto.WaitForServerInput(
+            name=memory_id.memory_name,
+        )
+
+    @staticmethod
+    def handle_wait_for_server_result(
+        memory_id: MemoryID,
+        result: "armem.mns.dto.WaitForServerResult",
+    ) -> ServerProxies:
+        """Return the server returned by `waitForServer()`, or raise an error."""
+        if result.success:
+            if result.server.reading or result.server.writing:
+                return ServerProxies.from_ice(result.server)
+            else:
+                raise armem_error.CouldNotResolveMemoryServer(
+                    memory_id, f"Returned proxy is null: {result.server}"
+                )
+        else:
+            raise armem_error.CouldNotResolveMemoryServer(
+                memory_id, result.errorMessage
+            )
+
     def get_reader(self, memory_id: MemoryID) -> Reader:
         return Reader(self.resolve_server(memory_id).reading)
 
@@ -150,7 +340,7 @@ class MemoryNameSystem:
         return Reader(self.wait_for_server(memory_id).reading)
 
     def get_all_readers(self, update=True) -> Dict[str, Reader]:
-        return self._get_all_clients(Reader, update)
+        return self._get_all_clients(lambda server: Reader(server.reading), update)
 
     def get_writer(self, memory_id: MemoryID) -> Writer:
         return Writer(self.resolve_server(memory_id).writing)
@@ -159,7 +349,7 @@ class MemoryNameSystem:
         return Writer(self.wait_for_server(memory_id).writing)
 
     def get_all_writers(self, update=True) -> Dict[str, Writer]:
-        return self._get_all_clients(Writer, update)
+        return self._get_all_clients(lambda server: Writer(server.writing), update)
 
     # System-wide queries
 
@@ -176,45 +366,96 @@ class MemoryNameSystem:
     def resolve_entity_snapshots(
         self,
         ids: List[MemoryID],
+        timeout_seconds: Optional[float] = None,
     ) -> Dict[MemoryID, "armem.data.EntitySnapshot"]:
-        errors = ""
-        error_counter = 0
+        """
+        Resolve snapshots which may belong to different memories.
 
-        ids_per_memory = dict()
-        for id in ids:
-            if id.memory_name in ids_per_memory:
-                ids_per_memory[id.memory_name].append(id)
-            else:
-                ids_per_memory[id.memory_name] = [id]
+        The memory servers are queried concurrently. Snapshots of servers
+        which failed are missing in the result, and the errors are logged.
+        Use `resolve_entity_snapshots_detailed()` to handle them yourself.
 
-        result = dict()
-        for memory_name, ids in ids_per_memory.items():
-            reader = self.get_reader(memory_id=MemoryID(memory_name))
-            try:
-                snapshots = reader.query_snapshots(ids)
-                result = {**result, **snapshots}  # Merge dicts
-            except RuntimeError as e:
-                error_counter += 1
+        :param ids: The snapshot IDs.
+        :param timeout_seconds: The maximal time to wait for all servers together.
+        :return: The resolved snapshots.
+        """
+        resolution = self.resolve_entity_snapshots_detailed(ids, timeout_seconds)
+
+        if resolution.errors:
+            errors = ""
+            for error_counter, (memory_name, e) in enumerate(resolution.errors.items(), start=1):
                 errors += f"\n#{error_counter}\n"
-                errors += f"Failed to retrieve IDs {ids} from query result: \n{e}"
+                errors += f"Failed to retrieve snapshots from memory '{memory_name}': \n{e}"
 
-        if errors:
             self.logger.info(
-                f"{self.__class__.__name__}.{self.resolve_entity_instance.__name__}:"
+                f"{self.__class__.__name__}.{self.resolve_entity_snapshots.__name__}:"
                 f"The following errors may affect your result: \n{errors}\n\n"
                 + "When resolving entity snapshots: \n- {}".format(
                     "\n- ".join(map(str, ids))
                 )
             )
 
-        return result
+        return resolution.snapshots
+
+    def resolve_entity_snapshots_detailed(
+        self,
+        ids: List[MemoryID],
+        timeout_seconds: Optional[float] = None,
+    ) -> "SnapshotResolution":
+        """
+        Like `resolve_entity_snapshots()`, but return the errors per memory.
+
+        The queries to all memory servers are sent before waiting for the
+        first result, so the call takes about as long as the slowest server.
+        """
+        ids_per_memory: Dict[str, List[MemoryID]] = dict()
+        for id in ids:
+            ids_per_memory.setdefault(id.memory_name, []).append(id)
+
+        resolution = SnapshotResolution()
+
+        # Send all queries.
+        pending = dict()
+        for memory_name, memory_ids in ids_per_memory.items():
+            memory_id = MemoryID(memory_name)
+            try:
+                with self.invalidating(memory_id):
+                    reader = self.get_reader(memory_id)
+                    inp = reader.make_input(reader.make_snapshots_queries(memory_ids))
+                    pending[memory_name] = (reader, memory_ids, reader.server.queryAsync(inp))
+            except Exception as e:
+                resolution.errors[memory_name] = e
+
+        # Collect the results.
+        import Ice
+
+        deadline = None if timeout_seconds is None else time.monotonic() + timeout_seconds
+        for memory_name, (reader, memory_ids, future) in pending.items():
+            try:
+                with self.invalidating(MemoryID(memory_name)):
+                    timeout = None
+                    if deadline is not None:
+                        timeout = deadline - time.monotonic()
+                        if timeout <= 0 and not future.done():
+                            raise Ice.TimeoutException()
+                        # Ice waits without limit for a timeout of 0.
+                        timeout = max(timeout, 1e-3)
+                    memory = reader.handle_result(future.result(timeout))
+                resolution.snapshots.update(reader.resolve_snapshots(memory, memory_ids))
+            except Exception as e:
+                future.cancel()
+                resolution.errors[memory_name] = e
+
+        return resolution
 
     # ToDo: System-wide commits
 
-    def _get_all_clients(self, client_cls, update: bool):
+    def _get_all_clients(self, make_client: Callable[[ServerProxies], object], update: bool):
         if update:
             self.update()
-        return {name: client_cls(server) for name, server in self.servers}
+        with self._lock:
+            servers = dict(self.servers)
+        return {name: make_client(server) for name, server in servers.items()}
 
     def __bool__(self):
         return bool(self.mns)
@@ -0,0 +1,253 @@
+import threading
+import typing as ty
+
+import numpy as np
+
+from armarx_core.math import quaternion
+from armarx_memory.core import MemoryID, DateTimeIceConverter, time_usec
+from armarx_memory.client.Reader import Reader
+from armarx_memory.client.TimeSeries import TimeSeries
+
+from armarx import armem
+from armarx.core.time.dto import Duration
+
+
+date_time_conv = DateTimeIceConverter()
+
+
+class PoseInterpolator:
+    """
+    Provides the pose of an entity at arbitrary points in time by
+    interpolating between its snapshots.
+
+    Translations are interpolated linearly and rotations by slerp.
+    Snapshots are fetched on demand and kept in a sliding window, so
+    evaluating many nearby times only queries the memory when the window
+    does not bracket them yet. Times before the first or after the latest
+    snapshot are clamped to the respective snapshot.
+
+    Usage:
+
+    interpolator = PoseInterpolator(reader, object_instance_id, pose_field="pose")
+    pose = interpolator.pose_at(t_usec)  # (4, 4)
+    poses = interpolator.poses_at(times_usec)  # (N, 4, 4)
+    """
+
+    def __init__(
+        self,
+        reader: Reader,
+        entity_id: MemoryID,
+        pose_field: str = "pose",
+        instance_index: int = 0,
+        prefetch_usec: int = 1000000,
+        max_window_usec: ty.Optional[int] = 60000000,
+    ):
+        """
+        :param reader: The reader of the entity's memory.
+        :param entity_id: The entity ID.
+        :param pose_field: The path of the 4x4 pose in the instance data
+            (nested keys separated by dots).
+        :param instance_index: The index of the instance in each snapshot.
+        :param prefetch_usec: How far beyond the requested times snapshots are fetched.
+        :param max_window_usec: How much history is kept in the window.
+            If None, the window is never shrunk.
+        """
+        self.reader = reader
+        self.entity_id = entity_id
+        self.pose_field = pose_field
+        self.instance_index = instance_index
+        self.prefetch_usec = prefetch_usec
+        self.max_window_usec = max_window_usec
+
+        self._lock = threading.Lock()
+        # The cached window of snapshots, sorted by time.
+        self._timestamps = np.zeros(0, dtype=np.int64)
+        self._translations = np.zeros((0, 3))
+        self._quats = np.zeros((0, 4))
+
+        self.num_queries = 0
+
+    def pose_at(self, time_usec: int) -> np.ndarray:
+        """Return the interpolated pose at the given time as 4x4 matrix."""
+        return self.poses_at(np.array([time_usec]))[0]
+
+    def poses_at(self, times_usec: ty.Union[np.ndarray, ty.List[int]]) -> np.ndarray:
+        """
+        Return the interpolated poses at the given times.
+
+        At most two queries are sent, however many times are given.
+
+        :param times_usec: The times in microseconds, shape (N,).
+        :return: The poses as 4x4 matrices, shape (N, 4, 4).
+        """
+        times_usec = np.asarray(times_usec, dtype=np.int64)
+        if len(times_usec) == 0:
+            return np.zeros((0, 4, 4))
+
+        with self._lock:
+            t_min, t_max = int(times_usec.min()), int(times_usec.max())
+            if not self._brackets(t_min, t_max):
+                self._fetch(t_min, t_max)
+            if len(self._timestamps) == 0:
+                raise LookupError(f"Entity {self.entity_id} has no snapshot before {t_max}.")
+
+            timestamps, translations, quats = self._timestamps, self._translations, self._quats
+
+        return self._interpolate(timestamps, translations, quats, times_usec)
+
+    def clear(self):
+        """Drop the cached window."""
+        with self._lock:
+            self._set_window(
+                np.zeros(0, dtype=np.int64), np.zeros((0, 3)), np.zeros((0, 4))
+            )
+
+    def _brackets(self, t_min: int, t_max: int) -> bool:
+        timestamps = self._timestamps
+        return len(timestamps) > 0 and timestamps[0] <= t_min and t_max <= timestamps[-1]
+
+    def _fetch(self, t_min: int, t_max: int):
+        timestamps = self._timestamps
+        if len(timestamps) > 0 and timestamps[0] <= t_min <= timestamps[-1]:
+            # Only extend the window to the future.
+            start = int(timestamps[-1]) + 1
+        else:
+            start = t_min
+        end = t_max + self.prefetch_usec
+
+        series = self._query(self._make_range_queries(start, end, before=start))
+        if (len(series) == 0 or series.timestamps_usec[-1] < t_max) and end < time_usec():
+            # The next snapshot may be newer than the prefetched range.
+            series = self._concat(series, self._query_next(end))
+
+        self._merge(series, contiguous=start != t_min)
+
+    def _make_range_queries(
+        self, start: int, end: int, before: ty.Optional[int] = None
+    ) -> ty.List[armem.query.data.EntityQuery]:
+        qd = self.reader.qd
+        q_entities = [
+            qd.entity.TimeRange(
+                minTimestamp=date_time_conv.to_ice(start),
+                maxTimestamp=date_time_conv.to_ice(end),
+            )
+        ]
+        if before is not None:
+            # The snapshot bracketing `start` from below.
+            q_entities.append(
+                qd.entity.BeforeOrAtTime(timestamp=date_time_conv.to_ice(before))
+            )
+        return q_entities
+
+    def _query_next(self, time_usec_: int) -> TimeSeries:
+        """Query the earliest snapshot after the given time, if any."""
+        # Yields at most the snapshots right before and after the timestamp.
+        q_entity = self.reader.qd.entity.TimeApprox(
+            timestamp=date_time_conv.to_ice(time_usec_ + 1),
+            eps=Duration(microSeconds=-1),  # No limit.
+        )
+        series = self._query([q_entity])
+        return series.slice(time_usec_ + 1, np.iinfo(np.int64).max)
+
+    def _query(self, q_entities: ty.List[armem.query.data.EntityQuery]) -> TimeSeries:
+        qd = self.reader.qd
+        q_prov = qd.provider.Single(
+            entityName=self.entity_id.entity_name, entityQueries=q_entities
+        )
+        q_core = qd.core.Single(
+            providerSegmentName=self.entity_id.provider_segment_name,
+            providerSegmentQueries=[q_prov],
+        )
+        q_memory = qd.memory.Single(
+            coreSegmentName=self.entity_id.core_segment_name,
+            coreSegmentQueries=[q_core],
+        )
+        memory = self.reader.query([q_memory])
+        self.num_queries += 1
+
+        entity = self._get_entity(memory)
+        if entity is None:
+            return TimeSeries(columns={self.pose_field: np.zeros((0, 4, 4))})
+        return TimeSeries.from_entity(entity, [self.pose_field], self.instance_index)
+
+    def _get_entity(self, memory: armem.data.Memory) -> ty.Optional[armem.data.Entity]:
+        try:
+            return (
+                memory.coreSegments[self.entity_id.core_segment_name]
+                .providerSegments[self.entity_id.provider_segment_name]
+                .entities[self.entity_id.entity_name]
+            )
+        except KeyError:
+            return None
+
+    @staticmethod
+    def _concat(a: TimeSeries, b: TimeSeries) -> TimeSeries:
+        return TimeSeries(
+            timestamps_usec=np.concatenate([a.timestamps_usec, b.timestamps_usec]),
+            columns={
+                path: np.concatenate([column.reshape(-1, 4, 4), b[path].reshape(-1, 4, 4)])
+                for path, column in a.columns.items()
+            },
+        )
+
+    def _merge(self, series: TimeSeries, contiguous: bool):
+        poses = series[self.pose_field].reshape(-1, 4, 4)
+        timestamps = series.timestamps_usec
+        translations = poses[:, :3, 3].astype(np.float64)
+        quats = quaternion.mat2quat(poses[:, :3, :3])
+
+        if contiguous:
+            # The new snapshots directly follow the window.
+            new = timestamps > self._timestamps[-1]
+            timestamps = np.concatenate([self._timestamps, timestamps[new]])
+            translations = np.concatenate([self._translations, translations[new]])
+            quats = np.concatenate([self._quats, quats[new]])
+
+        if self.max_window_usec is not None and len(timestamps) > 0:
+            # Keep the latest snapshot older than the window start, so
+            # times at the window start stay bracketed.
+            first = max(
+                0,
+                int(np.searchsorted(timestamps, timestamps[-1] - self.max_window_usec)) - 1,
+            )
+            timestamps, translations, quats = (
+                timestamps[first:],
+                translations[first:],
+                quats[first:],
+            )
+
+        self._set_window(timestamps, translations, quats)
+
+    def _set_window(self, timestamps, translations, quats):
+        self._timestamps = timestamps
+        self._translations = translations
+        self._quats = quats
+
+    @staticmethod
+    def _interpolate(
+        timestamps: np.ndarray,
+        translations: np.ndarray,
+        quats: np.ndarray,
+        times_usec: np.ndarray,
+    ) -> np.ndarray:
+        num = len(timestamps)
+        poses = np.zeros((len(times_usec), 4, 4))
+        poses[:, 3, 3] = 1
+
+        if num == 1:
+            poses[:, :3, :3] = quaternion.quat2mat(quats[0])
+            poses[:, :3, 3] = translations[0]
+            return poses
+
+        lower = np.clip(np.searchsorted(timestamps, times_usec, side="right") - 1, 0, num - 2)
+        upper = lower + 1
+        span = (timestamps[upper] - timestamps[lower]).astype(np.float64)
+        alpha = np.clip((times_usec - timestamps[lower]) / span, 0.0, 1.0)
+
+        poses[:, :3, 3] = (
+            translations[lower] * (1 - alpha)[:, None] + translations[upper] * alpha[:, None]
+        )
+        poses[:, :3, :3] = quaternion.quat2mat(
+            quaternion.slerp(quats[lower], quats[upper], alpha)
+        )
+        return poses
@@ -1,3 +1,4 @@
+import dataclasses as dc
 import typing as ty
 
 from armarx_core import slice_loader
@@ -6,12 +7,48 @@ slice_loader.load_armarx_slice("RobotAPI", "armem/query.ice")
 
 from armarx import armem
 from armarx.armem import data as dto  # The ice type namespace.
+from armarx.core.time.dto import Duration
 
-from armarx_memory.core import MemoryID
+from armarx_memory.core import MemoryID, DateTimeIceConverter
 from armarx_memory.aron.aron_ice_types import AronIceTypes
+from armarx_memory.client.TimeSeries import TimeSeries
+from armarx_memory.client.detail.coalescing import SingleFlight, make_fingerprint
+from armarx_memory.client.SnapshotSelector import (
+    SnapshotIndex,
+    SnapshotSelector,
+    SnapshotSelectorMode,
+)
+
+date_time_conv = DateTimeIceConverter()
+
+
+@dc.dataclass
+class SnapshotInfo:
+    """
+    Metadata of an entity snapshot, available without its data.
+
+    The data sizes of the instances are not included, as the servers do
+    not report them in queries without data.
+    """
+
+    id: MemoryID
+    num_instances: int
+
+    @property
+    def timestamp_usec(self) -> int:
+        return self.id.timestamp_usec
 
 
 class Reader:
+    """
+    Queries a memory server.
+
+    If `coalesce` is true, identical queries issued concurrently (e.g. the
+    same `query_latest()` from several threads) share one server call and
+    its result. With a positive `freshness_seconds`, a result is also
+    shared with identical queries made within that time after it arrived.
+    Callers then receive the same result object, so they must not modify it.
+    """
 
     ReadingMemoryServerPrx = "armem.server.ReadingMemoryInterfacePrx"
     qd = armem.query.data
@@ -19,23 +56,55 @@ class Reader:
     def __init__(
         self,
         server: ty.Optional[ReadingMemoryServerPrx],
+        coalesce: bool = False,
+        freshness_seconds: float = 0.0,
     ):
 
         self.server = server
+        self._single_flight: ty.Optional[SingleFlight[armem.data.Memory]] = (
+            SingleFlight(freshness_seconds) if coalesce or freshness_seconds > 0 else None
+        )
 
     def query(
         self,
         queries: ty.List[armem.query.data.MemoryQuery],
+        with_data=True,
     ) -> armem.data.Memory:
         """
         Perform a memory query. Return the result if successful,
         otherwise raise an exception.
         :param queries: The query(s)
+        :param with_data: If false, only the structure and the IDs are
+            transferred, but not the instances' data.
         :return: The result, if successful.
         """
 
-        inp = self.qd.Input(memoryQueries=queries, withData=True)
-        result = self.server.query(inp)
+        inp = self.make_input(queries, with_data=with_data)
+        if self._single_flight is None:
+            return self.handle_result(self.server.query(inp))
+
+        return self._single_flight.call(
+            make_fingerprint(inp), lambda: self.handle_result(self.server.query(inp))
+        )
+
+    @property
+    def num_coalesced_queries(self) -> int:
+        """The number of queries answered by the result of another query."""
+        return self._single_flight.num_coalesced if self._single_flight is not None else 0
+
+    def make_input(
+        self,
+        queries: ty.List[armem.query.data.MemoryQuery],
+        with_data=True,
+    ) -> armem.query.data.Input:
+        return self.qd.Input(memoryQueries=queries, withData=with_data)
+
+    @staticmethod
+    def handle_result(result: armem.query.data.Result) -> armem.data.Memory:
+        """
+        Return the memory of a query result if successful,
+        otherwise raise an exception.
+        """
         if not result.success:
             raise RuntimeError(f"Memory query failed. Reason:\n{result.errorMessage}")
         else:
@@ -43,79 +112,158 @@ class Reader:
 
     def query_snapshots(
         self,
-        ids: ty.List[MemoryID],
-    ) -> ty.Dict[MemoryID, armem.data.EntitySnapshot]:
+        ids: ty.List[ty.Union[MemoryID, SnapshotSelector]],
+    ) -> ty.Dict[ty.Union[MemoryID, SnapshotSelector], armem.data.EntitySnapshot]:
         """
-        Query snapshots corresponding to ty.List of memory IDs.
+        Query snapshots corresponding to ty.List of memory IDs or snapshot selectors.
 
         Each ID can refer to an entity, a snapshot or an instance. When not
         referring to an entity snapshot, the latest snapshot will be queried.
+        Use a `SnapshotSelector` to select e.g. the n-th latest snapshot or
+        the snapshot nearest before or after a point in time.
 
         All memory IDs must refer to the memory this reader is reading from.
         If an ID refers to another memory, the query will not find it and it
-        will not be part of the result.
+        will not be part of the result. The same holds for IDs whose snapshot
+        does not exist.
 
-        :param ids: The entity, snapshot or instance IDs.
+        The IDs are grouped by entity, such that one query is sent per entity,
+        and the snapshots of each entity are resolved using a timestamp index.
+
+        :param ids: The entity, snapshot or instance IDs, or snapshot selectors.
         :return: The query result, if successful.
         """
+        memory = self.query(self.make_snapshots_queries(ids))
+        return self.resolve_snapshots(memory, ids)
 
-        qs_memory = []
-        for snapshot_id in ids:
-            if snapshot_id.timestamp_usec >= 0:
-                ice_id = snapshot_id.to_ice()
-                q_entity = self.qd.entity.Single(timestamp=ice_id.timestamp)
-            else:
-                q_entity = self.qd.entity.Single()  # Latest
+    def make_snapshots_queries(
+        self,
+        ids: ty.List[ty.Union[MemoryID, SnapshotSelector]],
+    ) -> ty.List[armem.query.data.MemoryQuery]:
+        """
+        Make the queries required to resolve the given IDs or selectors
+        (one memory query per entity).
+        """
+        entity_queries: ty.Dict[ty.Tuple[str, str, str], ty.Dict] = dict()
+        for selector in map(self._to_selector, ids):
+            key = self._get_entity_key(selector.entity_id)
+            queries = entity_queries.setdefault(key, dict())
+            query_key = (selector.mode, selector.timestamp_usec, selector.n)
+            if query_key not in queries:
+                queries[query_key] = self._make_entity_query(selector)
 
+        qs_memory = []
+        for (core_name, prov_name, entity_name), queries in entity_queries.items():
             q_prov = self.qd.provider.Single(
-                entityName=snapshot_id.entity_name, entityQueries=[q_entity]
+                entityName=entity_name, entityQueries=list(queries.values())
             )
             q_core = self.qd.core.Single(
-                providerSegmentName=snapshot_id.provider_segment_name,
+                providerSegmentName=prov_name,
                 providerSegmentQueries=[q_prov],
             )
             q_memory = self.qd.memory.Single(
-                coreSegmentName=snapshot_id.core_segment_name,
+                coreSegmentName=core_name,
                 coreSegmentQueries=[q_core],
             )
             qs_memory.append(q_memory)
+        return qs_memory
 
-        memory = self.query(qs_memory)
+    @classmethod
+    def resolve_snapshots(
+        cls,
+        memory: armem.data.Memory,
+        ids: ty.List[ty.Union[MemoryID, SnapshotSelector]],
+    ) -> ty.Dict[ty.Union[MemoryID, SnapshotSelector], armem.data.EntitySnapshot]:
+        """
+        Find the snapshots referred to by `ids` in a query result,
+        e.g. of a query made by `make_snapshots_queries()`.
+        """
+        indices: ty.Dict[ty.Tuple[str, str, str], ty.Optional[SnapshotIndex]] = dict()
 
         snapshots = dict()
-        for snapshot_id in ids:
-            entity = (
-                memory.coreSegments[snapshot_id.core_segment_name]
-                .providerSegments[snapshot_id.provider_segment_name]
-                .entities[snapshot_id.entity_name]
-            )
-
-            # TODO: Quick and dirty fix: Iterate over all history entries
-            # TODO: And fix that if timestamp is -2 you want to have the secondlast element
-            if snapshot_id.timestamp_usec >= 0:
-                for datetime, entry in entity.history.items():
-                    if (
-                        snapshot_id.timestamp_usec
-                        == datetime.timeSinceEpoch.microSeconds
-                    ):
-                        snapshots[snapshot_id] = entry
-                        break
-            else:
-                snapshots[snapshot_id] = entity.history[
-                    sorted(
-                        entity.history.keys(),
-                        key=lambda x: x.timeSinceEpoch.microSeconds,
-                    )[-1]
-                ]
-
-            # snapshots[snapshot_id] = entity.history[
-            #    ice_id.timestamp
-            #    if snapshot_id.timestamp_usec >= 0
-            #    else max()
-            # ]
+        for id_ in ids:
+            selector = cls._to_selector(id_)
+            key = cls._get_entity_key(selector.entity_id)
+            try:
+                index = indices[key]
+            except KeyError:
+                index = indices[key] = cls._make_snapshot_index(memory, key)
+
+            snapshot = selector.select(index) if index is not None else None
+            if snapshot is not None:
+                snapshots[id_] = snapshot
 
         return snapshots
 
+    def _make_entity_query(
+        self,
+        selector: SnapshotSelector,
+    ) -> armem.query.data.EntityQuery:
+        Mode = SnapshotSelectorMode
+        if selector.mode == Mode.EXACT:
+            return self.qd.entity.Single(
+                timestamp=date_time_conv.to_ice(selector.timestamp_usec)
+            )
+        elif selector.mode == Mode.LATEST:
+            return self.qd.entity.Single()  # Latest
+        elif selector.mode == Mode.NTH_LATEST:
+            # Query all of the n latest snapshots, such that the n-th latest
+            # one can be found even if other queries add older snapshots.
+            return self.qd.entity.IndexRange(first=-selector.n, last=-1)
+        elif selector.mode == Mode.BEFORE:
+            return self.qd.entity.BeforeOrAtTime(
+                timestamp=date_time_conv.to_ice(selector.timestamp_usec)
+            )
+        elif selector.mode == Mode.AFTER:
+            # Yields at most the snapshots right before and at or after the
+            # timestamp, of which the index picks the latter.
+            return self.qd.entity.TimeApprox(
+                timestamp=date_time_conv.to_ice(selector.timestamp_usec),
+                eps=Duration(microSeconds=-1),  # No limit.
+            )
+        else:
+            raise ValueError(f"Unexpected snapshot selector mode {selector.mode}.")
+
+    @staticmethod
+    def _to_selector(id_: ty.Union[MemoryID, SnapshotSelector]) -> SnapshotSelector:
+        if isinstance(id_, SnapshotSelector):
+            return id_
+        return SnapshotSelector.from_memory_id(id_)
+
+    @staticmethod
+    def _get_entity_key(memory_id: MemoryID) -> ty.Tuple[str, str, str]:
+        return (
+            memory_id.core_segment_name,
+            memory_id.provider_segment_name,
+            memory_id.entity_name,
+        )
+
+    @classmethod
+    def _make_snapshot_index(
+        cls,
+        memory: armem.data.Memory,
+        key: ty.Tuple[str, str, str],
+    ) -> ty.Optional[SnapshotIndex]:
+        entity = cls._get_entity(memory, key)
+        if entity is None:
+            return None
+        return SnapshotIndex(entity)
+
+    @staticmethod
+    def _get_entity(
+        memory: armem.data.Memory,
+        key: ty.Tuple[str, str, str],
+    ) -> ty.Optional[armem.data.Entity]:
+        core_name, prov_name, entity_name = key
+        try:
+            return (
+                memory.coreSegments[core_name]
+                .providerSegments[prov_name]
+                .entities[entity_name]
+            )
+        except KeyError:
+            return None
+
     def query_snapshot(
         self,
         snapshot_id: MemoryID,
@@ -125,26 +273,45 @@ class Reader:
 
     def query_all(
         self,
+        with_data=True,
+        history_depth: ty.Optional[int] = None,
     ) -> armem.data.Memory:
+        return self.query(self.make_all_queries(history_depth), with_data=with_data)
 
-        q_entity = self.qd.entity.All()
-        q_prov = self.qd.provider.All(entityQueries=[q_entity])
-        q_core = self.qd.core.All(providerSegmentQueries=[q_prov])
-        q_memory = self.qd.memory.All(coreSegmentQueries=[q_core])
-        memory = self.query([q_memory])
-        return memory
+    def make_all_queries(
+        self,
+        history_depth: ty.Optional[int] = None,
+    ) -> ty.List[armem.query.data.MemoryQuery]:
+        return self.make_queries(MemoryID(), history_depth=history_depth)
 
     def query_core_segment(
         self,
         name: str,
         regex=False,
         latest_snapshot=False,
+        with_data=True,
+        history_depth: ty.Optional[int] = None,
     ) -> armem.data.Memory:
-
+        return self.query(
+            self.make_core_segment_queries(
+                name=name,
+                regex=regex,
+                latest_snapshot=latest_snapshot,
+                history_depth=history_depth,
+            ),
+            with_data=with_data,
+        )
+
+    def make_core_segment_queries(
+        self,
+        name: str,
+        regex=False,
+        latest_snapshot=False,
+        history_depth: ty.Optional[int] = None,
+    ) -> ty.List[armem.query.data.MemoryQuery]:
         if latest_snapshot:
-            q_entity = self.qd.entity.Single()  # Latest
-        else:
-            q_entity = self.qd.entity.All()
+            history_depth = 1
+        q_entity = self._make_history_query(history_depth)
         q_prov = self.qd.provider.All(entityQueries=[q_entity])
         q_core = self.qd.core.All(providerSegmentQueries=[q_prov])
         if regex:
@@ -155,17 +322,44 @@ class Reader:
             q_memory = self.qd.memory.Single(
                 coreSegmentName=name, coreSegmentQueries=[q_core]
             )
-        memory = self.query([q_memory])
-        return memory
+        return [q_memory]
 
     def query_latest(
         self,
         memory_id: ty.Optional[MemoryID] = None,
+        with_data=True,
     ) -> armem.data.Memory:
+        return self.query(self.make_latest_queries(memory_id), with_data=with_data)
+
+    def make_latest_queries(
+        self,
+        memory_id: ty.Optional[MemoryID] = None,
+    ) -> ty.List[armem.query.data.MemoryQuery]:
+        return self.make_queries(memory_id, history_depth=1)
+
+    def make_queries(
+        self,
+        memory_id: ty.Optional[MemoryID] = None,
+        history_depth: ty.Optional[int] = None,
+    ) -> ty.List[armem.query.data.MemoryQuery]:
+        """
+        Make queries for everything below `memory_id`.
+        :param memory_id: The ID of a memory, segment or entity. If None, query everything.
+        :param history_depth: If given, only the latest `history_depth` snapshots
+            of each entity are queried.
+        """
+        return self._make_queries_for_entity_query(
+            memory_id, self._make_history_query(history_depth)
+        )
+
+    def _make_queries_for_entity_query(
+        self,
+        memory_id: ty.Optional[MemoryID],
+        q_entity: armem.query.data.EntityQuery,
+    ) -> ty.List[armem.query.data.MemoryQuery]:
         if memory_id is None:
             memory_id = MemoryID()
 
-        q_entity = self.qd.entity.Single()  # Latest
         if memory_id.entity_name:
             q_prov = self.qd.provider.Single(
                 entityName=memory_id.entity_name, entityQueries=[q_entity]
@@ -188,9 +382,109 @@ class Reader:
         else:
             q_memory = self.qd.memory.All(coreSegmentQueries=[q_core])
 
-        memory = self.query([q_memory])
-        return memory
+        return [q_memory]
+
+    def _make_history_query(
+        self,
+        history_depth: ty.Optional[int] = None,
+    ) -> armem.query.data.EntityQuery:
+        if history_depth is None:
+            return self.qd.entity.All()
+        elif history_depth == 1:
+            return self.qd.entity.Single()  # Latest
+        else:
+            assert history_depth > 0, history_depth
+            return self.qd.entity.IndexRange(first=-history_depth, last=-1)
+
+    # Metadata
+
+    def query_snapshot_infos(
+        self,
+        memory_id: ty.Optional[MemoryID] = None,
+        history_depth: ty.Optional[int] = None,
+    ) -> ty.List[SnapshotInfo]:
+        """
+        Query the IDs and number of instances of the snapshots below `memory_id`
+        without transferring their data.
+        :param memory_id: The ID of a memory, segment or entity. If None, query everything.
+        :param history_depth: If given, only the latest `history_depth` snapshots
+            of each entity are queried.
+        """
+        memory = self.query(self.make_queries(memory_id, history_depth), with_data=False)
+        return self.get_snapshot_infos(memory)
+
+    def query_snapshot_ids(
+        self,
+        memory_id: ty.Optional[MemoryID] = None,
+        history_depth: ty.Optional[int] = None,
+    ) -> ty.List[MemoryID]:
+        """Like `query_snapshot_infos()`, but only return the snapshot IDs."""
+        return [info.id for info in self.query_snapshot_infos(memory_id, history_depth)]
+
+    def query_timestamps(
+        self,
+        entity_id: MemoryID,
+        history_depth: ty.Optional[int] = None,
+    ) -> ty.List[int]:
+        """Return the sorted timestamps [us] of an entity's snapshots."""
+        memory = self.query(self.make_queries(entity_id, history_depth), with_data=False)
+        return sorted(
+            t.timeSinceEpoch.microSeconds
+            for core in memory.coreSegments.values()
+            for prov in core.providerSegments.values()
+            for entity in prov.entities.values()
+            for t in entity.history.keys()
+        )
+
+    def query_time_series(
+        self,
+        entity_id: MemoryID,
+        fields: ty.List[str],
+        start_usec: int = -1,
+        end_usec: int = -1,
+        instance_index: int = 0,
+    ) -> TimeSeries:
+        """
+        Query the history of an entity in a time range as columnar arrays.
+
+        Example:
 
+        series = reader.query_time_series(object_id, ["pose", "confidence"])
+        plt.plot(series.timestamps_sec, series["confidence"])
+
+        :param entity_id: The entity ID.
+        :param fields: The field paths to extract, with nested keys separated by dots.
+        :param start_usec: The start of the time range. If -1, start at the oldest snapshot.
+        :param end_usec: The end of the time range. If -1, end at the latest snapshot.
+        :param instance_index: The index of the instance in each snapshot.
+        :return: The time series (see `TimeSeries.from_entity()`).
+        """
+        q_entity = self.qd.entity.TimeRange(
+            minTimestamp=date_time_conv.to_ice(start_usec),
+            maxTimestamp=date_time_conv.to_ice(end_usec),
+        )
+        memory = self.query(self._make_queries_for_entity_query(entity_id, q_entity))
+
+        entity = self._get_entity(memory, self._get_entity_key(entity_id))
+        if entity is None:
+            return TimeSeries.from_entity(dto.Entity(history={}), fields, instance_index)
+        return TimeSeries.from_entity(entity, fields, instance_index)
+
+    @staticmethod
+    def get_snapshot_infos(
+        memory: armem.data.Memory,
+    ) -> ty.List[SnapshotInfo]:
+        """Collect the snapshot infos of a query result."""
+        return [
+            SnapshotInfo(
+                id=MemoryID.from_ice(snapshot.id),
+                num_instances=len(snapshot.instances),
+            )
+            for core in memory.coreSegments.values()
+            for prov in core.providerSegments.values()
+            for entity in prov.entities.values()
+            for snapshot in entity.history.values()
+        ]
 
     @classmethod
     def for_each_instance_data(
@@ -205,6 +499,7 @@ class Reader:
             dto.EntityInstance,
         ],
         discard_none=False,
+        fields: ty.Optional[ty.List[str]] = None,
     ) -> ty.List[ty.Any]:
         """
         Call `fn` on the data of each entity instance in `data`.
@@ -225,16 +520,25 @@ class Reader:
         :param fn: The function to call on each instance data.
         :param data: The data structure (e.g. the result of a query).
         :param discard_none: If true, None return values are excluded from the result list.
+        :param fields: If given, only these keys are converted and passed to `fn`.
+            Nested keys are separated by dots, e.g. "pose.position".
+            Missing keys are mapped to None.
         :return: The values returned by the calls to `fn`.
         """
-        from armarx_memory.aron.conversion.pythonic_from_to_aron_ice import pythonic_from_aron_ice
+        from armarx_memory.aron.conversion.pythonic_from_to_aron_ice import (
+            pythonic_from_aron_ice,
+            pythonic_from_aron_ice_projected,
+        )
 
         def convert_and_fn(id_, data_):
-            pythonic_data: ty.Dict[str, ty.Any] = pythonic_from_aron_ice(data_)
+            if fields is None:
+                pythonic_data: ty.Dict[str, ty.Any] = pythonic_from_aron_ice(data_)
+            else:
+                pythonic_data = pythonic_from_aron_ice_projected(data_, fields)
             memory_id = MemoryID.from_ice(id_)
             return fn(memory_id, pythonic_data)
 
-        return cls.for_each_instance_data_ice(convert_and_fn, data)
+        return cls.for_each_instance_data_ice(convert_and_fn, data, discard_none=discard_none)
 
     @classmethod
     def for_each_instance_data_ice(
@@ -0,0 +1,159 @@
+import bisect
+import dataclasses as dc
+import enum
+import typing as ty
+
+from armarx_memory.core import MemoryID
+from armarx_memory.core.time import INVALID_TIME_USEC
+
+
+class SnapshotSelectorMode(enum.Enum):
+    EXACT = "exact"
+    LATEST = "latest"
+    NTH_LATEST = "nth_latest"
+    BEFORE = "before"
+    AFTER = "after"
+
+
+@dc.dataclass(frozen=True)
+class SnapshotSelector:
+    """
+    Selects a single snapshot of an entity.
+
+    Usage:
+
+    entity_id = MemoryID("Object", "Instance", "provider", "entity")
+    snapshots = reader.query_snapshots([
+        SnapshotSelector.latest(entity_id),
+        SnapshotSelector.nth_latest(entity_id, 2),  # The second latest snapshot.
+        SnapshotSelector.before(entity_id, time_usec),  # The latest snapshot at or before `time_usec`.
+        SnapshotSelector.after(entity_id, time_usec),  # The earliest snapshot at or after `time_usec`.
+    ])
+    """
+
+    entity_id: MemoryID
+    mode: SnapshotSelectorMode = SnapshotSelectorMode.LATEST
+    timestamp_usec: int = INVALID_TIME_USEC
+    n: int = 1
+
+    @classmethod
+    def exact(cls, snapshot_id: MemoryID) -> "SnapshotSelector":
+        return cls(
+            entity_id=cls._to_entity_id(snapshot_id),
+            mode=SnapshotSelectorMode.EXACT,
+            timestamp_usec=snapshot_id.timestamp_usec,
+        )
+
+    @classmethod
+    def latest(cls, entity_id: MemoryID) -> "SnapshotSelector":
+        return cls(
+            entity_id=cls._to_entity_id(entity_id), mode=SnapshotSelectorMode.LATEST
+        )
+
+    @classmethod
+    def nth_latest(cls, entity_id: MemoryID, n: int) -> "SnapshotSelector":
+        """
+        Select the n-th latest snapshot, i.e. n = 1 is the latest snapshot,
+        n = 2 the second latest and so on.
+        """
+        if n < 1:
+            raise ValueError(f"Expected n >= 1, but got n = {n}.")
+        return cls(
+            entity_id=cls._to_entity_id(entity_id),
+            mode=SnapshotSelectorMode.NTH_LATEST,
+            n=n,
+        )
+
+    @classmethod
+    def before(cls, entity_id: MemoryID, time_usec: int) -> "SnapshotSelector":
+        """Select the latest snapshot at or before `time_usec`."""
+        return cls(
+            entity_id=cls._to_entity_id(entity_id),
+            mode=SnapshotSelectorMode.BEFORE,
+            timestamp_usec=time_usec,
+        )
+
+    @classmethod
+    def after(cls, entity_id: MemoryID, time_usec: int) -> "SnapshotSelector":
+        """Select the earliest snapshot at or after `time_usec`."""
+        return cls(
+            entity_id=cls._to_entity_id(entity_id),
+            mode=SnapshotSelectorMode.AFTER,
+            timestamp_usec=time_usec,
+        )
+
+    @classmethod
+    def from_memory_id(cls, memory_id: MemoryID) -> "SnapshotSelector":
+        """
+        Select the snapshot referred to by `memory_id` if it has a timestamp,
+        and the latest snapshot of its entity otherwise.
+        """
+        if memory_id.timestamp_usec >= 0:
+            return cls.exact(memory_id)
+        else:
+            return cls.latest(memory_id)
+
+    def select(self, index: "SnapshotIndex") -> ty.Optional[ty.Any]:
+        """
+        Select the snapshot from the given index.
+        :return: The snapshot, or None if there is no matching snapshot.
+        """
+        Mode = SnapshotSelectorMode
+        if self.mode == Mode.EXACT:
+            return index.exact(self.timestamp_usec)
+        elif self.mode == Mode.LATEST:
+            return index.nth_latest(1)
+        elif self.mode == Mode.NTH_LATEST:
+            return index.nth_latest(self.n)
+        elif self.mode == Mode.BEFORE:
+            return index.before(self.timestamp_usec)
+        elif self.mode == Mode.AFTER:
+            return index.after(self.timestamp_usec)
+        else:
+            raise ValueError(f"Unexpected snapshot selector mode {self.mode}.")
+
+    @staticmethod
+    def _to_entity_id(memory_id: MemoryID) -> MemoryID:
+        return MemoryID(
+            memory_id.memory_name,
+            memory_id.core_segment_name,
+            memory_id.provider_segment_name,
+            memory_id.entity_name,
+        )
+
+
+class SnapshotIndex:
+    """
+    Index of the snapshots of an entity (`armem.data.Entity`) by their timestamps.
+
+    Building the index costs O(h log h) for an entity history of length h,
+    afterwards each lookup costs O(log h).
+    """
+
+    def __init__(self, entity: "armarx.armem.data.Entity"):
+        self.snapshots: ty.Dict[int, "armarx.armem.data.EntitySnapshot"] = {
+            time.timeSinceEpoch.microSeconds: snapshot
+            for time, snapshot in entity.history.items()
+        }
+        self.timestamps: ty.List[int] = sorted(self.snapshots)
+
+    def exact(self, time_usec: int):
+        return self.snapshots.get(time_usec, None)
+
+    def nth_latest(self, n: int):
+        if n < 1 or n > len(self.timestamps):
+            return None
+        return self.snapshots[self.timestamps[-n]]
+
+    def before(self, time_usec: int):
+        i = bisect.bisect_right(self.timestamps, time_usec)
+        return self.snapshots[self.timestamps[i - 1]] if i > 0 else None
+
+    def after(self, time_usec: int):
+        i = bisect.bisect_left(self.timestamps, time_usec)
+        return (
+            self.snapshots[self.timestamps[i]] if i < len(self.timestamps) else None
+        )
+
+    def __len__(self):
+        return len(self.timestamps)
@@ -0,0 +1,146 @@
+import dataclasses as dc
+import typing as ty
+
+import numpy as np
+
+from armarx import armem
+
+from armarx_memory.aron.aron_ice_types import AronIceTypes
+from armarx_memory.aron.conversion.pythonic_from_to_aron_ice import (
+    get_aron_ice_element,
+    pythonic_from_aron_ice,
+)
+
+
+@dc.dataclass
+class TimeSeries:
+    """
+    The history of an entity in columnar form.
+
+    Example:
+
+    series = reader.query_time_series(entity_id, ["pose", "confidence"])
+    series.timestamps_usec  # (T,) int64
+    series["pose"]  # (T, 4, 4)
+    series["confidence"]  # (T,)
+    """
+
+    # The timestamps of the snapshots in microseconds, sorted ascending.
+    timestamps_usec: np.ndarray = dc.field(
+        default_factory=lambda: np.zeros(0, dtype=np.int64)
+    )
+    # The stacked values by field path. The first axis corresponds to the timestamps.
+    columns: ty.Dict[str, np.ndarray] = dc.field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.timestamps_usec)
+
+    def __getitem__(self, path: str) -> np.ndarray:
+        return self.columns[path]
+
+    @property
+    def timestamps_sec(self) -> np.ndarray:
+        return self.timestamps_usec * 1e-6
+
+    def slice(self, start_usec: int, end_usec: int) -> "TimeSeries":
+        """Return the part of the series in [start_usec, end_usec]."""
+        begin = np.searchsorted(self.timestamps_usec, start_usec, side="left")
+        end = np.searchsorted(self.timestamps_usec, end_usec, side="right")
+        return TimeSeries(
+            timestamps_usec=self.timestamps_usec[begin:end],
+            columns={path: column[begin:end] for path, column in self.columns.items()},
+        )
+
+    @classmethod
+    def from_entity(
+        cls,
+        entity: armem.data.Entity,
+        fields: ty.List[str],
+        instance_index: int = 0,
+    ) -> "TimeSeries":
+        """
+        Build a time series from the Ice DTO of an entity.
+
+        Only the given fields are converted. For each field, an array is
+        allocated for the whole history once the first value was seen,
+        and the values are written to it directly.
+
+        Values of floating point fields which are missing in a snapshot are
+        set to NaN. Missing values of other fields cause a ValueError.
+
+        :param entity: The entity, e.g. from a query result.
+        :param fields: The field paths, with nested keys separated by dots.
+        :param instance_index: The index of the instance in each snapshot.
+        :return: The time series.
+        """
+        history = list(entity.history.values())
+        timestamps = np.fromiter(
+            (s.id.timestamp.timeSinceEpoch.microSeconds for s in history),
+            dtype=np.int64,
+            count=len(history),
+        )
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+
+        num = len(history)
+        columns: ty.Dict[str, ty.Optional[np.ndarray]] = {path: None for path in fields}
+        missing: ty.Dict[str, ty.List[int]] = {path: [] for path in fields}
+
+        for row, index in enumerate(order):
+            snapshot = history[index]
+            try:
+                data = snapshot.instances[instance_index].data
+            except IndexError:
+                data = None
+
+            for path in fields:
+                value = _to_numpy(get_aron_ice_element(data, path))
+                if value is None:
+                    missing[path].append(row)
+                    continue
+
+                column = columns[path]
+                if column is None:
+                    column = np.empty((num, *value.shape), dtype=value.dtype)
+                    columns[path] = column
+                elif value.shape != column.shape[1:]:
+                    raise ValueError(
+                        f"Field '{path}' has shape {value.shape} at {timestamps[row]},"
+                        f" but {column.shape[1:]} before."
+                    )
+                column[row] = value
+
+        for path in fields:
+            column = columns[path]
+            if column is None:
+                columns[path] = np.full(num, np.nan)
+            elif missing[path]:
+                if not np.issubdtype(column.dtype, np.floating):
+                    raise ValueError(
+                        f"Field '{path}' of type {column.dtype} is missing"
+                        f" in {len(missing[path])} of {num} snapshots."
+                    )
+                column[missing[path]] = np.nan
+
+        return cls(timestamps_usec=timestamps, columns=columns)
+
+
+_SCALAR_DTYPES = (
+    (AronIceTypes.Double, np.float64),
+    (AronIceTypes.Float, np.float32),
+    (AronIceTypes.Long, np.int64),
+    (AronIceTypes.Int, np.int32),
+    (AronIceTypes.Bool, np.bool_),
+)
+
+
+def _to_numpy(element) -> ty.Optional[np.ndarray]:
+    if element is None:
+        return None
+
+    for ice_type, dtype in _SCALAR_DTYPES:
+        if isinstance(element, ice_type):
+            return np.asarray(element.value, dtype=dtype)
+
+    # Arrays and containers (e.g. lists of numbers).
+    return np.asarray(pythonic_from_aron_ice(element))
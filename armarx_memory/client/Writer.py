@@ -22,27 +22,42 @@ class Writer:
         clear_when_exists=False,
     ):
 
+        inp = self.make_add_segment_input(provider_id, clear_when_exists)
+        results = self.server.addSegments([inp])
+        return results[0]
+
+    @staticmethod
+    def make_add_segment_input(
+        provider_id: MemoryID,
+        clear_when_exists=False,
+    ) -> armem.data.AddSegmentInput:
         inp = armem.data.AddSegmentInput()
         inp.coreSegmentName = provider_id.core_segment_name
         inp.providerSegmentName = provider_id.provider_segment_name
         inp.clearWhenExists = clear_when_exists
-        results = self.server.addSegments([inp])
-        return results[0]
+        return inp
 
     def commit(
         self,
         commit: Commit,
     ):
 
-        time_sent = time_usec()
-        for update in commit.updates:
-            update.time_sent_usec = time_sent
-
-        ice_commit = commit.to_ice()
+        ice_commit = self.make_ice_commit(commit)
 
         ice_result = self.server.commit(ice_commit)
 
         return ice_result
 
+    @staticmethod
+    def make_ice_commit(
+        commit: Commit,
+    ) -> armem.data.Commit:
+        """Set the time sent of the commit's updates and convert it to Ice."""
+        time_sent = time_usec()
+        for update in commit.updates:
+            update.time_sent_usec = time_sent
+
+        return commit.to_ice()
+
     def __bool__(self):
         return bool(self.server)
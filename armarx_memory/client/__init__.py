@@ -1,7 +1,16 @@
-from .Reader import Reader
+from .Reader import Reader, SnapshotInfo
+from .TimeSeries import TimeSeries
+from .PoseInterpolator import PoseInterpolator
 from .Writer import Writer
-from .MemoryNameSystem import MemoryNameSystem
+from .MemoryNameSystem import MemoryNameSystem, SnapshotResolution
 from .Commit import Commit, EntityUpdate
-from .MemoryListener import MemoryListener
+from .MemoryListener import MemoryListener, SubscriptionStatistics
 from .Commit import MemoryID
-from .EntityStream import EntityStream
+from .EntityStream import EntityStream, StreamedSnapshot
+from .SnapshotSelector import SnapshotSelector, SnapshotSelectorMode
+from .CachedReader import CachedReader, CacheStatistics
+from .BufferedWriter import BufferedWriter
+from .AsyncReader import AsyncReader
+from .AsyncWriter import AsyncWriter
+from .AsyncMemoryNameSystem import AsyncMemoryNameSystem
+from .detail.ice_asyncio import gather_dict
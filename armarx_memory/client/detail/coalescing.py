@@ -0,0 +1,98 @@
+import concurrent.futures
+import threading
+import time
+import typing as ty
+
+
+T = ty.TypeVar("T")
+
+
+def make_fingerprint(value) -> ty.Hashable:
+    """
+    Make a hashable, canonical representation of an Ice DTO (e.g. a query
+    input), such that equal DTOs have equal fingerprints.
+    """
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(make_fingerprint(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, make_fingerprint(v)) for k, v in value.items()))
+    try:
+        fields = vars(value)
+    except TypeError:
+        # E.g. enums.
+        return type(value).__qualname__, str(value)
+    return (type(value).__qualname__,) + tuple(
+        (name, make_fingerprint(v)) for name, v in sorted(fields.items())
+    )
+
+
+class SingleFlight(ty.Generic[T]):
+    """
+    Coalesces identical concurrent calls into one.
+
+    While a call for a key is in flight, further calls for the same key
+    wait for it and receive the same result (or exception). If
+    `freshness_seconds` is positive, a completed result is also shared with
+    calls made within that time after its completion.
+    """
+
+    def __init__(self, freshness_seconds: float = 0.0):
+        self.freshness_seconds = freshness_seconds
+
+        self._lock = threading.Lock()
+        self._in_flight: ty.Dict[ty.Hashable, concurrent.futures.Future] = {}
+        # Completed results: key -> (completion time, future).
+        self._fresh: ty.Dict[ty.Hashable, ty.Tuple[float, concurrent.futures.Future]] = {}
+
+        self.num_calls = 0
+        self.num_coalesced = 0
+
+    def call(self, key: ty.Hashable, fn: ty.Callable[[], T]) -> T:
+        with self._lock:
+            future = self._in_flight.get(key, None)
+            if future is None and self.freshness_seconds > 0:
+                future = self._get_fresh(key)
+            if future is not None:
+                self.num_coalesced += 1
+                leader = False
+            else:
+                future = self._in_flight[key] = concurrent.futures.Future()
+                self.num_calls += 1
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if self.freshness_seconds > 0 and future.exception() is None:
+                    now = time.monotonic()
+                    # Drop expired results, so they do not accumulate.
+                    self._fresh = {
+                        k: v
+                        for k, v in self._fresh.items()
+                        if now - v[0] <= self.freshness_seconds
+                    }
+                    self._fresh[key] = (now, future)
+        return future.result()
+
+    def clear(self):
+        """Forget the completed results."""
+        with self._lock:
+            self._fresh.clear()
+
+    def _get_fresh(self, key: ty.Hashable) -> ty.Optional[concurrent.futures.Future]:
+        entry = self._fresh.get(key, None)
+        if entry is None:
+            return None
+        completed, future = entry
+        if time.monotonic() - completed > self.freshness_seconds:
+            return None
+        return future
@@ -0,0 +1,70 @@
+import asyncio
+import typing as ty
+
+
+K = ty.TypeVar("K")
+
+
+def wrap_ice_future(
+    ice_future: "Ice.Future",
+    loop: ty.Optional[asyncio.AbstractEventLoop] = None,
+) -> asyncio.Future:
+    """
+    Wrap the future returned by an asynchronous Ice invocation
+    (e.g. `proxy.queryAsync()`) in an asyncio future.
+
+    The Ice future is completed by an Ice thread, so its result is
+    transferred to the event loop in a thread-safe way.
+
+    :param ice_future: The Ice future.
+    :param loop: The event loop. Defaults to the current event loop.
+    :return: An asyncio future holding the result of the Ice future.
+    """
+    loop = loop or asyncio.get_event_loop()
+    future = loop.create_future()
+
+    def transfer(done: "Ice.Future"):
+        if future.cancelled():
+            return
+        try:
+            future.set_result(done.result())
+        except Exception as e:
+            future.set_exception(e)
+
+    def on_done(done: "Ice.Future"):
+        loop.call_soon_threadsafe(transfer, done)
+
+    def on_cancelled(f: asyncio.Future):
+        if f.cancelled():
+            ice_future.cancel()
+
+    future.add_done_callback(on_cancelled)
+    ice_future.add_done_callback(on_done)
+    return future
+
+
+async def gather_dict(
+    awaitables: ty.Dict[K, ty.Awaitable],
+    return_exceptions=False,
+) -> ty.Dict[K, ty.Any]:
+    """
+    Await the values of a dict concurrently (see `asyncio.gather()`).
+
+    Example:
+
+    results = await gather_dict({
+        "robot": robot_reader.query_latest(robot_id),
+        "objects": object_reader.query_latest(object_id),
+    })
+    robot_memory = results["robot"]
+
+    :param awaitables: The awaitables.
+    :param return_exceptions: If true, exceptions are returned as results
+        instead of being raised.
+    :return: A dict mapping the keys to the results of the awaitables.
+    """
+    keys = list(awaitables.keys())
+    results = await asyncio.gather(
+        *awaitables.values(), return_exceptions=return_exceptions
+    )
+    return dict(zip(keys, results))
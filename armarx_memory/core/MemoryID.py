@@ -1,5 +1,6 @@
 import copy
 import enum
+import sys
 
 import armarx
 from armarx_core import slice_loader
@@ -14,7 +15,35 @@ from armarx_memory.core.time import DateTimeIceConverter
 date_time_conv = DateTimeIceConverter()
 
 
+_NAME_FIELDS = (
+    "memory_name",
+    "core_segment_name",
+    "provider_segment_name",
+    "entity_name",
+)
+_FIELDS = _NAME_FIELDS + ("timestamp_usec", "instance_index")
+
+_set = object.__setattr__
+
+
+def _intern(name):
+    return sys.intern(name) if type(name) is str else name
+
+
 class MemoryID(ice_twin.IceTwin):
+    """
+    The ID of a memory, segment, entity, snapshot or instance.
+
+    IDs are compact (no `__dict__`), their names are interned and their
+    hash and Ice DTO are computed lazily and cached. Assigning a field
+    (also via the `set_*()` functions) invalidates the caches. Note that
+    an ID used as a dict key or in a set must not be modified, as it would
+    not be found anymore; use the `with_*()` functions to derive new IDs
+    instead.
+    """
+
+    __slots__ = _FIELDS + ("_hash", "_ice")
+
     def __init__(
         self,
         memory_name: str = "",
@@ -24,12 +53,46 @@ class MemoryID(ice_twin.IceTwin):
         timestamp_usec: int = date_time.INVALID_TIME_USEC,
         instance_index: int = -1,
     ):
-        self.memory_name = memory_name
-        self.core_segment_name = core_segment_name
-        self.provider_segment_name = provider_segment_name
-        self.entity_name = entity_name
-        self.timestamp_usec = timestamp_usec
-        self.instance_index = instance_index
+        _set(self, "memory_name", _intern(memory_name))
+        _set(self, "core_segment_name", _intern(core_segment_name))
+        _set(self, "provider_segment_name", _intern(provider_segment_name))
+        _set(self, "entity_name", _intern(entity_name))
+        _set(self, "timestamp_usec", timestamp_usec)
+        _set(self, "instance_index", instance_index)
+        _set(self, "_hash", None)
+        _set(self, "_ice", None)
+
+    def __setattr__(self, name, value):
+        if name in _NAME_FIELDS:
+            value = _intern(value)
+        _set(self, name, value)
+        if name in _FIELDS:
+            _set(self, "_hash", None)
+            _set(self, "_ice", None)
+
+    def _copy_with(self, name: str, value) -> "MemoryID":
+        c = object.__new__(self.__class__)
+        for field in _FIELDS:
+            _set(c, field, getattr(self, field))
+        _set(c, name, value)
+        _set(c, "_hash", None)
+        _set(c, "_ice", None)
+        return c
+
+    def __copy__(self) -> "MemoryID":
+        c = self._copy_with("instance_index", self.instance_index)
+        # Copies are equal, so they can share the hash.
+        _set(c, "_hash", self._hash)
+        return c
+
+    def __deepcopy__(self, memo) -> "MemoryID":
+        return self.__copy__()
+
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in _FIELDS)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
 
     @classmethod
     def from_string(cls, string: str):
@@ -83,34 +146,22 @@ class MemoryID(ice_twin.IceTwin):
         self.instance_index = id.instance_index
 
     def with_memory_name(self, name: str) -> "MemoryID":
-        c = copy.copy(self)
-        c.memory_name = name
-        return c
+        return self._copy_with("memory_name", _intern(name))
 
     def with_core_segment_name(self, name: str) -> "MemoryID":
-        c = copy.copy(self)
-        c.core_segment_name = name
-        return c
+        return self._copy_with("core_segment_name", _intern(name))
 
     def with_provider_segment_name(self, name: str) -> "MemoryID":
-        c = copy.copy(self)
-        c.provider_segment_name = name
-        return c
+        return self._copy_with("provider_segment_name", _intern(name))
 
     def with_entity_name(self, name: str) -> "MemoryID":
-        c = copy.copy(self)
-        c.entity_name = name
-        return c
+        return self._copy_with("entity_name", _intern(name))
 
     def with_timestamp(self, time_usec: int) -> "MemoryID":
-        c = copy.copy(self)
-        c.timestamp_usec = time_usec
-        return c
+        return self._copy_with("timestamp_usec", time_usec)
 
     def with_instance_index(self, index: int) -> "MemoryID":
-        c = copy.copy(self)
-        c.instance_index = index
-        return c
+        return self._copy_with("instance_index", index)
 
     def contains(self, id: "MemoryID"):
         general = self
@@ -145,25 +196,47 @@ class MemoryID(ice_twin.IceTwin):
         elif general.instance_index != specific.instance_index:
             return False
 
+        return True
+
     def __eq__(self, other):
+        if other is self:
+            return True
         if other is None or not isinstance(other, MemoryID):
             return False
+        if (
+            self._hash is not None
+            and other._hash is not None
+            and self._hash != other._hash
+        ):
+            return False
 
         return (
-            other.memory_name == self.memory_name
-            and other.core_segment_name == self.core_segment_name
-            and other.provider_segment_name == self.provider_segment_name
-            and other.entity_name == self.entity_name
-            and other.instance_index == self.instance_index
+            other.entity_name == self.entity_name
             and other.timestamp_usec == self.timestamp_usec
+            and other.instance_index == self.instance_index
+            and other.provider_segment_name == self.provider_segment_name
+            and other.core_segment_name == self.core_segment_name
+            and other.memory_name == self.memory_name
         )
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
     def __hash__(self):
-        # Just use two values to make has computation more efficient.
-        return hash((self.timestamp_usec, self.instance_index, self.entity_name))
+        h = self._hash
+        if h is None:
+            h = hash(
+                (
+                    self.memory_name,
+                    self.core_segment_name,
+                    self.provider_segment_name,
+                    self.entity_name,
+                    self.timestamp_usec,
+                    self.instance_index,
+                )
+            )
+            _set(self, "_hash", h)
+        return h
 
     def __repr__(self):
         return "<{} {}>".format(self.__class__.__name__, self.__str__())
@@ -206,10 +279,27 @@ class MemoryID(ice_twin.IceTwin):
             self.instance_index,
         ]
 
+    def to_ice(self) -> "armem.data.MemoryID":
+        """
+        Return the Ice DTO of this ID.
+
+        The DTO is converted once and cached until a field is changed.
+        Each call returns a copy, which the caller may modify.
+        """
+        ice = self._ice
+        if ice is None:
+            ice = super().to_ice()
+            _set(self, "_ice", ice)
+
+        dto = copy.copy(ice)
+        dto.timestamp = copy.copy(ice.timestamp)
+        dto.timestamp.timeSinceEpoch = copy.copy(ice.timestamp.timeSinceEpoch)
+        return dto
+
     def _get_ice_cls(self):
         return armem.data.MemoryID
 
-    def _set_to_ice(self, ice: "armem.data.Commit"):
+    def _set_to_ice(self, ice: "armem.data.MemoryID"):
         ice.memoryName = self.memory_name
         ice.coreSegmentName = self.core_segment_name
         ice.providerSegmentName = self.provider_segment_name
@@ -218,13 +308,14 @@ class MemoryID(ice_twin.IceTwin):
         ice.instanceIndex = self.instance_index
 
     def _set_from_ice(self, ice):
-        self.memory_name = ice.memoryName
-        self.core_segment_name = ice.coreSegmentName
-        self.provider_segment_name = ice.providerSegmentName
-        self.entity_name = ice.entityName
-        self.timestamp_usec = date_time_conv.from_ice(ice.timestamp)
-        self.instance_index = ice.instanceIndex
-
+        self.__init__(
+            ice.memoryName,
+            ice.coreSegmentName,
+            ice.providerSegmentName,
+            ice.entityName,
+            date_time_conv.from_ice(ice.timestamp),
+            ice.instanceIndex,
+        )
 
     @classmethod
     def from_aron_ice(cls, aron: "armarx.aron.data.dto.GenericData") -> "MemoryID":
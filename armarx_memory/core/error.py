@@ -14,3 +14,10 @@ class CouldNotResolveMemoryServer(ArMemError):
             f"\nMemory server for {memory_id} is not registered."
             + ("\n" + msg if msg else "")
         )
+
+
+class CommitBufferFull(ArMemError):
+    def __init__(self, max_pending: int):
+        super().__init__(
+            f"The commit buffer is full ({max_pending} pending updates)."
+        )
@@ -28,6 +28,9 @@ class IceTwin:
             dto.data = self.data
     """
 
+    # Allows subclasses to define __slots__.
+    __slots__ = ()
+
     @classmethod
     def from_ice(cls, ice):
         if isinstance(ice, list):
@@ -0,0 +1,331 @@
+import collections
+import dataclasses as dc
+import logging
+import threading
+import typing as ty
+
+from armarx_memory.core import MemoryID, DateTimeIceConverter, time_usec
+from armarx_memory.client.Commit import Commit, EntityUpdate
+from armarx_memory.client.MemoryListener import MemoryListener
+from armarx_memory.client.Reader import Reader
+from armarx_memory.client.Writer import Writer
+from armarx_memory.recording.Recording import RecordedUpdate, RecordingWriter
+
+
+logger = logging.getLogger(__name__)
+
+date_time_conv = DateTimeIceConverter()
+
+
+@dc.dataclass
+class RecorderStatistics:
+    num_recorded: int = 0
+    # Items dropped because the queue was full.
+    num_dropped: int = 0
+    num_errors: int = 0
+    queue_depth: int = 0
+    num_bytes: int = 0
+
+
+class _TeeWriter(Writer):
+    """A writer recording the successfully committed updates."""
+
+    def __init__(self, writer: Writer, recorder: "MemoryRecorder"):
+        super().__init__(writer.server)
+        self.recorder = recorder
+
+    def commit(self, commit: Commit):
+        result = super().commit(commit)
+        updates = [
+            update
+            for update, update_result in zip(commit.updates, result.results)
+            if update_result.success
+        ]
+        if updates:
+            self.recorder.record_commit(Commit(updates))
+        return result
+
+
+class MemoryRecorder:
+    """
+    Records memory contents into a recording on disk (see `RecordingWriter`).
+
+    Snapshots can be recorded
+
+    - from commits, by calling `record_commit()` or committing through
+      the writer returned by `tee()`,
+    - from memory updates, by `follow()`ing memory IDs with a listener,
+    - from query results, by calling `record_memory()` or by `poll()`ing
+      memory IDs periodically.
+
+    The producers only enqueue their items. Encoding and writing happen in a
+    background thread, so recording does not block them. If the queue is
+    full (the disk cannot keep up), new items are dropped and counted in
+    the statistics, unless `block_when_full` is true. Note that committed
+    data is recorded by reference, so it must not be modified afterwards.
+
+    Snapshots which have already been recorded (e.g. when polling an
+    entity which has not changed) are skipped. Queried snapshots are
+    recorded in order of their timestamps per entity, and snapshots older
+    than the latest recorded one of their entity are skipped as well.
+
+    Usage:
+
+    with MemoryRecorder("/tmp/recording") as recorder:
+        recorder.follow(listener, mns.wait_for_reader(core_id), [core_id])
+        ...
+    """
+
+    def __init__(
+        self,
+        path: str,
+        chunk_size_bytes: int = 256 * 1024 * 1024,
+        max_queue_size: int = 4096,
+        block_when_full: bool = False,
+        start: bool = True,
+    ):
+        self.recording = RecordingWriter(path, chunk_size_bytes=chunk_size_bytes)
+        self.max_queue_size = max_queue_size
+        self.block_when_full = block_when_full
+
+        self._cond = threading.Condition()
+        self._queue: ty.Deque[ty.Tuple[str, ty.Any]] = collections.deque()
+        self._stats = RecorderStatistics()
+        self._running = False
+        self._busy = False
+        self._thread: ty.Optional[threading.Thread] = None
+
+        # The latest recorded timestamp of each entity.
+        self._latest: ty.Dict[MemoryID, int] = {}
+
+        self._followed: ty.List[ty.Tuple[MemoryListener, MemoryID, MemoryListener.Callback]] = []
+        self._polling = threading.Event()
+        self._poll_threads: ty.List[threading.Thread] = []
+
+        if start:
+            self.start()
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="MemoryRecorder", daemon=True)
+        self._thread.start()
+
+    def record_commit(self, commit: ty.Union[Commit, ty.List[EntityUpdate]]) -> bool:
+        """
+        Record the updates of a commit.
+        :return: False if the commit was dropped because the queue is full.
+        """
+        updates = commit.updates if isinstance(commit, Commit) else commit
+        return self._put("updates", list(updates))
+
+    def record_memory(self, memory: "armarx.armem.data.Memory") -> bool:
+        """
+        Record all snapshots in a query result.
+        :return: False if the result was dropped because the queue is full.
+        """
+        return self._put("memory", memory)
+
+    def tee(self, writer: Writer) -> Writer:
+        """Return a writer to the same server recording all successful commits."""
+        return _TeeWriter(writer, self)
+
+    def follow(
+        self,
+        listener: MemoryListener,
+        reader: Reader,
+        memory_ids: ty.Iterable[MemoryID],
+    ):
+        """
+        Record all snapshots committed below the given memory IDs.
+
+        The updated snapshots are queried by `reader` from the background thread.
+        """
+
+        def callback(subscription_id: MemoryID, snapshot_ids: ty.List[MemoryID]):
+            self._put("snapshot_ids", (reader, snapshot_ids))
+
+        for memory_id in memory_ids:
+            listener.subscribe(memory_id, callback)
+            self._followed.append((listener, memory_id, callback))
+
+    def poll(
+        self,
+        reader: Reader,
+        memory_ids: ty.Iterable[MemoryID],
+        period_seconds: float = 1.0,
+        history_depth: ty.Optional[int] = 1,
+    ):
+        """
+        Periodically query and record the snapshots below the given memory IDs.
+
+        :param history_depth: How many of the latest snapshots of each
+            entity are queried. If None, the whole history is queried.
+        """
+        memory_ids = list(memory_ids)
+
+        def run():
+            while not self._polling.is_set():
+                for memory_id in memory_ids:
+                    try:
+                        memory = reader.query(reader.make_queries(memory_id, history_depth))
+                    except Exception:
+                        logger.exception(f"Failed to query {memory_id}.")
+                    else:
+                        self.record_memory(memory)
+                self._polling.wait(period_seconds)
+
+        thread = threading.Thread(target=run, name="MemoryRecorder.poll", daemon=True)
+        thread.start()
+        self._poll_threads.append(thread)
+
+    def statistics(self) -> RecorderStatistics:
+        with self._cond:
+            return dc.replace(self._stats, queue_depth=len(self._queue))
+
+    def flush(self):
+        """Wait until all queued items are written and flush the recording."""
+        with self._cond:
+            self._cond.wait_for(lambda: not self._queue and not self._busy or not self._running)
+            self.recording.flush()
+
+    def close(self):
+        """Stop following and polling, write the queued items and close the recording."""
+        for listener, memory_id, callback in self._followed:
+            listener.unsubscribe(memory_id, callback)
+        self._followed = []
+        self._polling.set()
+        for thread in self._poll_threads:
+            thread.join()
+        self._poll_threads = []
+
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._cond:
+            items = list(self._queue)
+            self._queue.clear()
+        self._write_items(items)
+        self.recording.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _put(self, kind: str, item) -> bool:
+        with self._cond:
+            if len(self._queue) >= self.max_queue_size:
+                if not self.block_when_full:
+                    self._stats.num_dropped += 1
+                    return False
+                self._cond.wait_for(
+                    lambda: len(self._queue) < self.max_queue_size or not self._running
+                )
+            self._queue.append((kind, item))
+            self._cond.notify_all()
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or not self._running)
+                if not self._running:
+                    return
+                items = list(self._queue)
+                self._queue.clear()
+                self._busy = True
+                # Wake up blocked producers.
+                self._cond.notify_all()
+
+            self._write_items(items)
+
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def _write_items(self, items: ty.Iterable[ty.Tuple[str, ty.Any]]):
+        for kind, item in items:
+            # Committed updates are always new, while queried snapshots
+            # may have been recorded before.
+            skip_recorded = kind != "updates"
+            try:
+                for update in self._convert(kind, item):
+                    latest = self._latest.get(update.entity_id, -1)
+                    if skip_recorded and latest >= update.referenced_time_usec:
+                        continue
+                    self.recording.write(update)
+                    self._latest[update.entity_id] = max(latest, update.referenced_time_usec)
+                    with self._cond:
+                        self._stats.num_recorded += 1
+            except Exception:
+                logger.exception(f"Failed to record {kind}.")
+                with self._cond:
+                    self._stats.num_errors += 1
+        with self._cond:
+            self._stats.num_bytes = self.recording.num_bytes
+
+    def _convert(self, kind: str, item) -> ty.Iterable[RecordedUpdate]:
+        if kind == "updates":
+            now = time_usec()
+            for update in item:
+                yield RecordedUpdate(
+                    entity_id=update.entity_id,
+                    referenced_time_usec=update.referenced_time_usec,
+                    instances_data=update.instances_data,
+                    confidence=update.confidence,
+                    sent_time_usec=(
+                        update.time_sent_usec if update.time_sent_usec is not None else now
+                    ),
+                )
+
+        elif kind == "memory":
+            yield from self._convert_memory(item)
+
+        elif kind == "snapshot_ids":
+            reader, snapshot_ids = item
+            snapshots = reader.query_snapshots(
+                [id_.with_instance_index(-1) for id_ in snapshot_ids]
+            )
+            yield from map(self._convert_snapshot, self._sorted_by_time(snapshots.values()))
+
+        else:
+            raise ValueError(f"Unexpected item kind '{kind}'.")
+
+    def _convert_memory(self, memory) -> ty.Iterable[RecordedUpdate]:
+        for core in memory.coreSegments.values():
+            for prov in core.providerSegments.values():
+                for entity in prov.entities.values():
+                    # The history of a query result is not ordered.
+                    for snapshot in self._sorted_by_time(entity.history.values()):
+                        yield self._convert_snapshot(snapshot)
+
+    @staticmethod
+    def _sorted_by_time(snapshots) -> ty.List["armarx.armem.data.EntitySnapshot"]:
+        return sorted(snapshots, key=lambda s: s.id.timestamp.timeSinceEpoch.microSeconds)
+
+    @staticmethod
+    def _convert_snapshot(snapshot: "armarx.armem.data.EntitySnapshot") -> RecordedUpdate:
+        snapshot_id = MemoryID.from_ice(snapshot.id)
+        update = RecordedUpdate(
+            entity_id=MemoryID(
+                snapshot_id.memory_name,
+                snapshot_id.core_segment_name,
+                snapshot_id.provider_segment_name,
+                snapshot_id.entity_name,
+            ),
+            referenced_time_usec=snapshot_id.timestamp_usec,
+            instances_data=[instance.data for instance in snapshot.instances],
+        )
+        if snapshot.instances:
+            metadata = snapshot.instances[0].metadata
+            update.confidence = metadata.confidence
+            update.sent_time_usec = date_time_conv.from_ice(metadata.sentTime)
+            update.arrived_time_usec = date_time_conv.from_ice(metadata.arrivedTime)
+        return update
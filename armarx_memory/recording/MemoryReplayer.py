@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+import typing as ty
+
+from armarx_memory.core import MemoryID, time_usec
+from armarx_memory.client.Commit import Commit
+from armarx_memory.client.MemoryNameSystem import MemoryNameSystem
+from armarx_memory.client.Writer import Writer
+from armarx_memory.recording.Recording import RecordingReader
+
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryReplayer:
+    """
+    Re-commits the snapshots of a recording to memory servers.
+
+    Snapshots are committed in the order of their referenced times. With
+    `speed=1`, the time between two commits matches the time between their
+    snapshots; with e.g. `speed=10`, they are replayed ten times faster, and
+    with `speed=None` as fast as possible. If replaying falls behind,
+    all snapshots which are due are sent in one commit.
+
+    Usage:
+
+    with RecordingReader("/tmp/recording") as recording:
+        replayer = MemoryReplayer(recording)
+        replayer.replay(mns, speed=2.0, memory_id=MemoryID("Vision"))
+    """
+
+    def __init__(
+        self,
+        recording: ty.Union[str, RecordingReader],
+    ):
+        if isinstance(recording, str):
+            recording = RecordingReader(recording)
+        self.recording = recording
+
+    def replay(
+        self,
+        target: ty.Union[Writer, MemoryNameSystem],
+        speed: ty.Optional[float] = 1.0,
+        start_usec: ty.Optional[int] = None,
+        end_usec: ty.Optional[int] = None,
+        memory_id: ty.Optional[MemoryID] = None,
+        retime: bool = False,
+        add_provider_segments: bool = True,
+        stop: ty.Optional[threading.Event] = None,
+    ) -> int:
+        """
+        Replay the recording.
+
+        :param target: The writer to commit to, or a memory name system
+            to get the writers of the recorded memories from.
+        :param speed: The replay speed relative to the original speed.
+            If None, snapshots are committed as fast as possible.
+        :param start_usec: If given, skip snapshots older than this time.
+        :param end_usec: If given, skip snapshots newer than this time.
+        :param memory_id: If given, only replay the snapshots below this ID.
+        :param retime: If true, the referenced times are shifted such that
+            the replay appears to happen now.
+        :param add_provider_segments: If true, the recorded provider
+            segments are added before replaying.
+        :param stop: If given, replaying stops when this event is set.
+        :return: The number of committed snapshots.
+        """
+        recording = self.recording
+        positions = recording.select(start_usec, end_usec, memory_id)
+        if len(positions) == 0:
+            return 0
+
+        writers: ty.Dict[str, Writer] = {}
+
+        def get_writer(memory_name: str) -> Writer:
+            writer = writers.get(memory_name, None)
+            if writer is None:
+                if isinstance(target, Writer):
+                    writer = target
+                else:
+                    writer = target.wait_for_writer(MemoryID(memory_name))
+                writers[memory_name] = writer
+            return writer
+
+        if add_provider_segments:
+            self._add_provider_segments(positions, get_writer)
+
+        times = recording.index["time_usec"][positions]
+        first_time = int(times[0])
+        start_wall_time = time.time()
+        time_offset = time_usec() - first_time if retime else 0
+
+        num_committed = 0
+        begin = 0
+        while begin < len(positions):
+            if stop is not None and stop.is_set():
+                break
+
+            if speed is None:
+                end = begin + 1
+            else:
+                # Wait until the next snapshot is due.
+                due = start_wall_time + (int(times[begin]) - first_time) / 1e6 / speed
+                delay = due - time.time()
+                if delay > 0:
+                    if stop is not None:
+                        if stop.wait(delay):
+                            break
+                    else:
+                        time.sleep(delay)
+                # Send all snapshots which are due.
+                elapsed_usec = (time.time() - start_wall_time) * speed * 1e6
+                end = begin + 1
+                while end < len(positions) and times[end] - first_time <= elapsed_usec:
+                    end += 1
+
+            commits: ty.Dict[str, Commit] = {}
+            for position in positions[begin:end]:
+                update = recording.read(position)
+                commit = commits.setdefault(update.entity_id.memory_name, Commit())
+                commit.add(
+                    update.to_entity_update(
+                        update.referenced_time_usec + time_offset if retime else None
+                    )
+                )
+            for memory_name, commit in commits.items():
+                result = get_writer(memory_name).commit(commit)
+                for update_result in result.results:
+                    if update_result.success:
+                        num_committed += 1
+                    else:
+                        logger.warning(f"Failed to replay snapshot: {update_result.errorMessage}")
+
+            begin = end
+
+        return num_committed
+
+    def _add_provider_segments(self, positions, get_writer: ty.Callable[[str], Writer]):
+        entities = set(self.recording.index["entity"][positions].tolist())
+        provider_ids = {
+            MemoryID(id_.memory_name, id_.core_segment_name, id_.provider_segment_name)
+            for id_ in (self.recording.entities[entity] for entity in entities)
+        }
+        for provider_id in sorted(provider_ids, key=str):
+            result = get_writer(provider_id.memory_name).add_provider_segment(provider_id)
+            if not result.success:
+                logger.warning(
+                    f"Failed to add provider segment {provider_id}: {result.errorMessage}"
+                )
@@ -0,0 +1,439 @@
+import dataclasses as dc
+import json
+import mmap
+import os
+import struct
+import threading
+import typing as ty
+
+import numpy as np
+
+from armarx_memory.aron.aron_ice_types import AronIceTypes
+from armarx_memory.core import MemoryID
+from armarx_memory.client.Commit import EntityUpdate
+from armarx_memory.recording import aron_binary
+
+
+FORMAT_NAME = "armem-recording"
+FORMAT_VERSION = 1
+
+METADATA_FILENAME = "recording.json"
+
+# One entry per record in a chunk's index file.
+INDEX_DTYPE = np.dtype(
+    [
+        ("time_usec", "<i8"),
+        ("offset", "<i8"),
+        ("size", "<i8"),
+        ("entity", "<i4"),
+    ]
+)
+_index_entry = struct.Struct("<qqqi")
+assert _index_entry.size == INDEX_DTYPE.itemsize
+
+# Referenced, sent and arrived time, confidence, number of instances.
+_record_header = struct.Struct("<qqqdI")
+
+# Alignment of NDArray payloads in the arrays file.
+ARRAY_ALIGNMENT = 64
+
+
+@dc.dataclass
+class RecordedUpdate:
+    """An entity snapshot stored in a recording."""
+
+    entity_id: MemoryID
+    referenced_time_usec: int
+    instances_data: ty.List[AronIceTypes.Data]
+    confidence: float = 1.0
+    # -1 if unknown.
+    sent_time_usec: int = -1
+    arrived_time_usec: int = -1
+
+    @property
+    def snapshot_id(self) -> MemoryID:
+        return self.entity_id.with_timestamp(self.referenced_time_usec)
+
+    def to_entity_update(self, referenced_time_usec: ty.Optional[int] = None) -> EntityUpdate:
+        """
+        Make an entity update re-committing this snapshot.
+        :param referenced_time_usec: If given, overrides the referenced time.
+        """
+        return EntityUpdate(
+            entity_id=self.entity_id,
+            instances_data=self.instances_data,
+            referenced_time_usec=(
+                self.referenced_time_usec if referenced_time_usec is None else referenced_time_usec
+            ),
+            confidence=self.confidence,
+        )
+
+
+def _chunk_path(path: str, chunk: int, kind: str) -> str:
+    return os.path.join(path, f"{chunk:06d}.{kind}")
+
+
+class RecordingWriter:
+    """
+    Writes entity snapshots to a recording directory.
+
+    A recording consists of chunks. Each chunk is stored in three files:
+
+    - `<chunk>.records`: The snapshots, i.e. their times, confidence and
+      the instances' data in the encoding of `aron_binary`.
+    - `<chunk>.arrays`: The raw bytes of all NDArrays, aligned such that
+      they can be used directly from a memory-mapped file.
+    - `<chunk>.index`: One fixed-size entry (`INDEX_DTYPE`) per record,
+      holding its referenced time, entity and location.
+
+    `recording.json` lists the recorded entities and the chunks. A new chunk
+    is started when the current one exceeds `chunk_size_bytes`.
+
+    The writer is not thread-safe; see `MemoryRecorder` for recording from
+    multiple threads.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        chunk_size_bytes: int = 256 * 1024 * 1024,
+    ):
+        """
+        :param path: The recording directory. It is created if it does not exist
+            and must not contain a recording yet.
+        :param chunk_size_bytes: The size after which a new chunk is started.
+        """
+        if os.path.isfile(os.path.join(path, METADATA_FILENAME)):
+            raise FileExistsError(f"There is already a recording in '{path}'.")
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.chunk_size_bytes = chunk_size_bytes
+
+        self.entities: ty.List[MemoryID] = []
+        self._entity_indices: ty.Dict[ty.Tuple[str, str, str, str], int] = {}
+        self.chunks: ty.List[ty.Dict[str, int]] = []
+
+        self.num_records = 0
+        self._num_bytes_of_finished_chunks = 0
+
+        self._records = None
+        self._arrays = None
+        self._index = None
+        self._records_size = 0
+        self._arrays_size = 0
+        self._buffer = bytearray()
+
+        self._start_chunk()
+
+    @property
+    def num_bytes(self) -> int:
+        """The number of bytes written to the records and arrays files."""
+        return self._num_bytes_of_finished_chunks + self._records_size + self._arrays_size
+
+    def write(self, update: RecordedUpdate):
+        """Append a snapshot to the recording."""
+        entity_index = self._get_entity_index(update.entity_id)
+
+        buffer = self._buffer
+        del buffer[:]
+        buffer += _record_header.pack(
+            update.referenced_time_usec,
+            update.sent_time_usec,
+            update.arrived_time_usec,
+            update.confidence,
+            len(update.instances_data),
+        )
+        for data in update.instances_data:
+            aron_binary.encode(data, self._store_array, out=buffer)
+
+        offset = self._records_size
+        self._records.write(buffer)
+        self._records_size += len(buffer)
+        self._index.write(
+            _index_entry.pack(update.referenced_time_usec, offset, len(buffer), entity_index)
+        )
+
+        chunk = self.chunks[-1]
+        chunk["num_records"] += 1
+        if chunk["start_usec"] < 0 or update.referenced_time_usec < chunk["start_usec"]:
+            chunk["start_usec"] = update.referenced_time_usec
+        chunk["end_usec"] = max(chunk["end_usec"], update.referenced_time_usec)
+        self.num_records += 1
+
+        if self._records_size + self._arrays_size >= self.chunk_size_bytes:
+            self._finish_chunk()
+            self._start_chunk()
+            self._write_metadata()
+
+    def flush(self):
+        """Flush the files and write the metadata."""
+        if self._records is None:
+            return
+        for file in (self._records, self._arrays, self._index):
+            file.flush()
+        self._write_metadata()
+
+    def close(self):
+        if self._records is None:
+            return
+        self._finish_chunk()
+        self._write_metadata()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _get_entity_index(self, entity_id: MemoryID) -> int:
+        key = (
+            entity_id.memory_name,
+            entity_id.core_segment_name,
+            entity_id.provider_segment_name,
+            entity_id.entity_name,
+        )
+        index = self._entity_indices.get(key, None)
+        if index is None:
+            index = self._entity_indices[key] = len(self.entities)
+            self.entities.append(MemoryID(*key))
+        return index
+
+    def _store_array(self, data: bytes) -> int:
+        padding = -self._arrays_size % ARRAY_ALIGNMENT
+        if padding:
+            self._arrays.write(bytes(padding))
+        offset = self._arrays_size + padding
+        self._arrays.write(data)
+        self._arrays_size = offset + len(data)
+        return offset
+
+    def _start_chunk(self):
+        chunk = len(self.chunks)
+        self._records = open(_chunk_path(self.path, chunk, "records"), "wb")
+        self._arrays = open(_chunk_path(self.path, chunk, "arrays"), "wb")
+        self._index = open(_chunk_path(self.path, chunk, "index"), "wb")
+        self._records_size = 0
+        self._arrays_size = 0
+        self.chunks.append(dict(num_records=0, start_usec=-1, end_usec=-1))
+
+    def _finish_chunk(self):
+        self._num_bytes_of_finished_chunks += self._records_size + self._arrays_size
+        self._records_size = 0
+        self._arrays_size = 0
+        for file in (self._records, self._arrays, self._index):
+            file.close()
+        self._records = self._arrays = self._index = None
+
+    def _write_metadata(self):
+        metadata = dict(
+            format=FORMAT_NAME,
+            version=FORMAT_VERSION,
+            entities=[
+                [id_.memory_name, id_.core_segment_name, id_.provider_segment_name, id_.entity_name]
+                for id_ in self.entities
+            ],
+            chunks=self.chunks,
+        )
+        filename = os.path.join(self.path, METADATA_FILENAME)
+        with open(filename + ".tmp", "w") as file:
+            json.dump(metadata, file, indent=2)
+        os.replace(filename + ".tmp", filename)
+
+
+class _Chunk:
+    def __init__(self, path: str, chunk: int):
+        self.path = path
+        self.chunk = chunk
+        self._lock = threading.Lock()
+        self._records: ty.Optional[memoryview] = None
+        self._arrays: ty.Optional[memoryview] = None
+        self._mmaps: ty.List[mmap.mmap] = []
+
+    @property
+    def records(self) -> memoryview:
+        if self._records is None:
+            self._records = self._map("records")
+        return self._records
+
+    @property
+    def arrays(self) -> memoryview:
+        if self._arrays is None:
+            self._arrays = self._map("arrays")
+        return self._arrays
+
+    def _map(self, kind: str) -> memoryview:
+        with self._lock, open(_chunk_path(self.path, self.chunk, kind), "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return memoryview(b"")
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmaps.append(mapped)
+            return memoryview(mapped)
+
+    def close(self):
+        # Views handed out by `RecordingReader.read(copy_arrays=False)` may
+        # still be in use. Their maps are closed when they are garbage collected.
+        for view in (self._records, self._arrays):
+            if view is not None:
+                try:
+                    view.release()
+                except BufferError:
+                    pass
+        self._records = self._arrays = None
+        for mapped in self._mmaps:
+            try:
+                mapped.close()
+            except BufferError:
+                pass
+        self._mmaps = []
+
+
+class RecordingReader:
+    """
+    Reads a recording written by `RecordingWriter` or `MemoryRecorder`.
+
+    The chunk files are memory-mapped, so only the records which are
+    actually read are loaded from disk.
+
+    Usage:
+
+    with RecordingReader(path) as recording:
+        for update in recording.updates(memory_id=MemoryID("Vision", "Image")):
+            print(update.snapshot_id)
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, METADATA_FILENAME)) as file:
+            metadata = json.load(file)
+        if metadata.get("format", None) != FORMAT_NAME:
+            raise ValueError(f"'{path}' does not contain a memory recording.")
+        if metadata["version"] > FORMAT_VERSION:
+            raise ValueError(
+                f"The recording in '{path}' has version {metadata['version']},"
+                f" but only versions up to {FORMAT_VERSION} are supported."
+            )
+
+        self.path = path
+        self.entities: ty.List[MemoryID] = [MemoryID(*names) for names in metadata["entities"]]
+
+        self._chunks = [_Chunk(path, chunk) for chunk in range(len(metadata["chunks"]))]
+        indices = [
+            np.fromfile(_chunk_path(path, chunk, "index"), dtype=INDEX_DTYPE)
+            for chunk in range(len(self._chunks))
+        ]
+        # Records written after the metadata (e.g. if the recording was
+        # not closed properly) refer to unknown entities.
+        indices = [index[index["entity"] < len(self.entities)] for index in indices]
+
+        self.index: np.ndarray = (
+            np.concatenate(indices) if indices else np.zeros(0, dtype=INDEX_DTYPE)
+        )
+        self.chunk_of_record: np.ndarray = np.concatenate(
+            [np.full(len(index), chunk, dtype=np.int32) for chunk, index in enumerate(indices)]
+            or [np.zeros(0, dtype=np.int32)]
+        )
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def start_usec(self) -> int:
+        return int(self.index["time_usec"].min()) if len(self) else -1
+
+    @property
+    def end_usec(self) -> int:
+        return int(self.index["time_usec"].max()) if len(self) else -1
+
+    def select(
+        self,
+        start_usec: ty.Optional[int] = None,
+        end_usec: ty.Optional[int] = None,
+        memory_id: ty.Optional[MemoryID] = None,
+    ) -> np.ndarray:
+        """
+        Return the positions of the records in a time range and below a
+        memory ID, ordered by their referenced time.
+
+        :param start_usec: If given, skip records older than this time.
+        :param end_usec: If given, skip records newer than this time.
+        :param memory_id: If given, skip records of entities not contained in this ID.
+        """
+        times = self.index["time_usec"]
+        mask = np.ones(len(times), dtype=bool)
+        if start_usec is not None:
+            mask &= times >= start_usec
+        if end_usec is not None:
+            mask &= times <= end_usec
+        if memory_id is not None:
+            entities = [i for i, id_ in enumerate(self.entities) if memory_id.contains(id_)]
+            mask &= np.isin(self.index["entity"], entities)
+
+        positions = np.flatnonzero(mask)
+        return positions[np.argsort(times[positions], kind="stable")]
+
+    def read(self, position: int, copy_arrays=True) -> RecordedUpdate:
+        """
+        Read a record.
+
+        :param position: The position of the record.
+        :param copy_arrays: If false, the data of NDArrays are views of the
+            memory-mapped arrays file instead of `bytes`. This avoids copying
+            large arrays, but the views must not be used after `close()`.
+        """
+        entry = self.index[position]
+        chunk = self._chunks[self.chunk_of_record[position]]
+        records, arrays = chunk.records, chunk.arrays
+
+        if copy_arrays:
+
+            def load_array(offset: int, size: int):
+                return bytes(arrays[offset : offset + size])
+
+        else:
+
+            def load_array(offset: int, size: int):
+                return arrays[offset : offset + size]
+
+        offset = int(entry["offset"])
+        referenced, sent, arrived, confidence, num_instances = _record_header.unpack_from(
+            records, offset
+        )
+        offset += _record_header.size
+
+        instances_data = []
+        for _ in range(num_instances):
+            data, offset = aron_binary.decode(records, load_array, offset)
+            instances_data.append(data)
+
+        return RecordedUpdate(
+            entity_id=self.entities[int(entry["entity"])],
+            referenced_time_usec=referenced,
+            instances_data=instances_data,
+            confidence=confidence,
+            sent_time_usec=sent,
+            arrived_time_usec=arrived,
+        )
+
+    def updates(
+        self,
+        start_usec: ty.Optional[int] = None,
+        end_usec: ty.Optional[int] = None,
+        memory_id: ty.Optional[MemoryID] = None,
+        copy_arrays=True,
+    ) -> ty.Iterator[RecordedUpdate]:
+        """Read the records selected by `select()` in time order."""
+        for position in self.select(start_usec, end_usec, memory_id):
+            yield self.read(position, copy_arrays=copy_arrays)
+
+    def __iter__(self) -> ty.Iterator[RecordedUpdate]:
+        return self.updates()
+
+    def close(self):
+        for chunk in self._chunks:
+            chunk.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,3 @@
+from .Recording import RecordedUpdate, RecordingReader, RecordingWriter
+from .MemoryRecorder import MemoryRecorder, RecorderStatistics
+from .MemoryReplayer import MemoryReplayer
@@ -0,0 +1,192 @@
+"""
+A compact binary encoding of Aron Ice data used by memory recordings.
+
+Each value is encoded as a one-byte tag followed by its payload (little
+endian). The raw bytes of NDArrays are not embedded: they are handed to a
+`store_array` function, which stores them elsewhere (e.g. in a separate,
+memory-mapped file) and returns their offset. When decoding, `load_array`
+is called with that offset and the number of bytes.
+"""
+
+import struct
+import typing as ty
+
+from armarx_memory.aron.aron_ice_types import AronIceTypes
+
+
+StoreArray = ty.Callable[[bytes], int]
+LoadArray = ty.Callable[[int, int], ty.Union[bytes, memoryview]]
+
+
+_NONE = 0
+_STRING = 1
+_BOOL = 2
+_INT = 3
+_LONG = 4
+_FLOAT = 5
+_DOUBLE = 6
+_LIST = 7
+_DICT = 8
+_NDARRAY = 9
+
+_tag = struct.Struct("<B")
+_size = struct.Struct("<I")
+_int = struct.Struct("<i")
+_long = struct.Struct("<q")
+_float = struct.Struct("<f")
+_double = struct.Struct("<d")
+_array_ref = struct.Struct("<QQ")
+
+
+def encode(
+    data: ty.Optional[AronIceTypes.Data],
+    store_array: StoreArray,
+    out: ty.Optional[bytearray] = None,
+) -> bytearray:
+    """
+    Encode Aron Ice data.
+
+    :param data: The Aron Ice data.
+    :param store_array: Stores the bytes of an NDArray and returns their offset.
+    :param out: If given, the encoding is appended to this buffer.
+    :return: The buffer holding the encoding.
+    """
+    if out is None:
+        out = bytearray()
+    _encode(data, out, store_array)
+    return out
+
+
+def decode(
+    buffer: ty.Union[bytes, memoryview],
+    load_array: LoadArray,
+    offset: int = 0,
+) -> ty.Tuple[ty.Optional[AronIceTypes.Data], int]:
+    """
+    Decode Aron Ice data encoded by `encode()`.
+
+    :param buffer: The buffer holding the encoding.
+    :param load_array: Returns the bytes of an NDArray given their offset and size.
+    :param offset: The position of the encoding in `buffer`.
+    :return: The Aron Ice data and the position after its encoding.
+    """
+    return _decode(buffer, offset, load_array)
+
+
+def _encode_str(value: str, out: bytearray):
+    encoded = value.encode("utf-8")
+    out += _size.pack(len(encoded))
+    out += encoded
+
+
+def _encode(data, out: bytearray, store_array: StoreArray):
+    if data is None:
+        out += _tag.pack(_NONE)
+
+    elif isinstance(data, AronIceTypes.Dict):
+        out += _tag.pack(_DICT)
+        out += _size.pack(len(data.elements))
+        for key, value in data.elements.items():
+            _encode_str(key, out)
+            _encode(value, out, store_array)
+
+    elif isinstance(data, AronIceTypes.List):
+        out += _tag.pack(_LIST)
+        out += _size.pack(len(data.elements))
+        for value in data.elements:
+            _encode(value, out, store_array)
+
+    elif isinstance(data, AronIceTypes.NDArray):
+        try:
+            shape = data.shape
+        except AttributeError:
+            shape = data.dimensions
+        out += _tag.pack(_NDARRAY)
+        out += _size.pack(len(shape))
+        out += struct.pack(f"<{len(shape)}i", *shape)
+        _encode_str(data.type, out)
+        out += _array_ref.pack(store_array(data.data), len(data.data))
+
+    elif isinstance(data, AronIceTypes.String):
+        out += _tag.pack(_STRING)
+        _encode_str(data.value, out)
+    elif isinstance(data, AronIceTypes.Bool):
+        out += _tag.pack(_BOOL)
+        out += _tag.pack(1 if data.value else 0)
+    elif isinstance(data, AronIceTypes.Int):
+        out += _tag.pack(_INT)
+        out += _int.pack(data.value)
+    elif isinstance(data, AronIceTypes.Long):
+        out += _tag.pack(_LONG)
+        out += _long.pack(data.value)
+    elif isinstance(data, AronIceTypes.Float):
+        out += _tag.pack(_FLOAT)
+        out += _float.pack(data.value)
+    elif isinstance(data, AronIceTypes.Double):
+        out += _tag.pack(_DOUBLE)
+        out += _double.pack(data.value)
+
+    else:
+        raise TypeError(f"Cannot encode data of type {type(data)}: {data}")
+
+
+def _decode_str(buffer, offset: int) -> ty.Tuple[str, int]:
+    (size,) = _size.unpack_from(buffer, offset)
+    offset += _size.size
+    return str(buffer[offset : offset + size], "utf-8"), offset + size
+
+
+def _decode(buffer, offset: int, load_array: LoadArray):
+    tag = buffer[offset]
+    offset += 1
+
+    if tag == _NONE:
+        return None, offset
+
+    elif tag == _DICT:
+        (size,) = _size.unpack_from(buffer, offset)
+        offset += _size.size
+        elements = {}
+        for _ in range(size):
+            key, offset = _decode_str(buffer, offset)
+            elements[key], offset = _decode(buffer, offset, load_array)
+        return AronIceTypes.dict(elements), offset
+
+    elif tag == _LIST:
+        (size,) = _size.unpack_from(buffer, offset)
+        offset += _size.size
+        elements = []
+        for _ in range(size):
+            value, offset = _decode(buffer, offset, load_array)
+            elements.append(value)
+        return AronIceTypes.list(elements), offset
+
+    elif tag == _NDARRAY:
+        (ndim,) = _size.unpack_from(buffer, offset)
+        offset += _size.size
+        shape = list(struct.unpack_from(f"<{ndim}i", buffer, offset))
+        offset += 4 * ndim
+        type_, offset = _decode_str(buffer, offset)
+        array_offset, num_bytes = _array_ref.unpack_from(buffer, offset)
+        offset += _array_ref.size
+        data = AronIceTypes.NDArray(
+            shape=shape, type=type_, data=load_array(array_offset, num_bytes)
+        )
+        return data, offset
+
+    elif tag == _STRING:
+        value, offset = _decode_str(buffer, offset)
+        return AronIceTypes.string(value), offset
+    elif tag == _BOOL:
+        return AronIceTypes.bool(bool(buffer[offset])), offset + 1
+    elif tag == _INT:
+        return AronIceTypes.int(_int.unpack_from(buffer, offset)[0]), offset + _int.size
+    elif tag == _LONG:
+        return AronIceTypes.long(_long.unpack_from(buffer, offset)[0]), offset + _long.size
+    elif tag == _FLOAT:
+        return AronIceTypes.float(_float.unpack_from(buffer, offset)[0]), offset + _float.size
+    elif tag == _DOUBLE:
+        return AronIceTypes.double(_double.unpack_from(buffer, offset)[0]), offset + _double.size
+
+    else:
+        raise ValueError(f"Invalid tag {tag} at position {offset - 1}.")
@@ -106,7 +106,7 @@ class BaseWriter(BaseClient, ABC):
             referenced_time_usec=referenced_time_usec,
             instances_data=[to_aron(kwargs)],
         )
-        return self.writer.commit(commit.to_ice())
+        return self.writer.commit(commit)
 
     @classmethod
     def from_mns(cls, mns: MemoryNameSystem = None, wait=True):
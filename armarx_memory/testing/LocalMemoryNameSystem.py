@@ -0,0 +1,86 @@
+import threading
+import typing as ty
+
+from armarx_core import slice_loader
+
+slice_loader.load_armarx_slice("RobotAPI", "armem/mns/MemoryNameSystemInterface.ice")
+
+from armarx import armem
+
+
+class LocalMemoryNameSystem(armem.mns.MemoryNameSystemInterface):
+    """
+    A pure-Python memory name system for local testing and benchmarking.
+
+    `waitForServer()` is dispatched asynchronously, so waiting clients
+    do not block the adapter's threads.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.servers: ty.Dict[str, armem.mns.dto.MemoryServerInterfaces] = {}
+        self._lock = threading.Lock()
+        # Futures of clients waiting for a server, by memory name.
+        self._waiting: ty.Dict[str, ty.List["Ice.Future"]] = {}
+
+    def register(self, name: str, server: armem.mns.dto.MemoryServerInterfaces):
+        with self._lock:
+            self.servers[name] = server
+            waiting = self._waiting.pop(name, [])
+        for future in waiting:
+            future.set_result(armem.mns.dto.WaitForServerResult(success=True, server=server))
+
+    def unregister(self, name: str):
+        with self._lock:
+            self.servers.pop(name, None)
+
+    # MemoryNameSystemInterface
+
+    def registerServer(self, inp, c=None):
+        with self._lock:
+            exists = inp.name in self.servers
+        if exists and not inp.existOk:
+            return armem.mns.dto.RegisterServerResult(
+                success=False, errorMessage=f"Memory '{inp.name}' is already registered."
+            )
+        self.register(inp.name, inp.server)
+        return armem.mns.dto.RegisterServerResult(success=True)
+
+    def removeServer(self, inp, c=None):
+        with self._lock:
+            removed = self.servers.pop(inp.name, None)
+        if removed is None:
+            return armem.mns.dto.RemoveServerResult(
+                success=False, errorMessage=f"Memory '{inp.name}' is not registered."
+            )
+        return armem.mns.dto.RemoveServerResult(success=True)
+
+    def getAllRegisteredServers(self, c=None):
+        with self._lock:
+            servers = dict(self.servers)
+        return armem.mns.dto.GetAllRegisteredServersResult(success=True, servers=servers)
+
+    def resolveServer(self, inp, c=None):
+        with self._lock:
+            server = self.servers.get(inp.name, None)
+        if server is None:
+            return armem.mns.dto.ResolveServerResult(
+                success=False, errorMessage=f"Memory '{inp.name}' is not registered."
+            )
+        return armem.mns.dto.ResolveServerResult(success=True, server=server)
+
+    def waitForServer(self, inp, c=None):
+        import Ice
+
+        future = Ice.Future()
+        with self._lock:
+            server = self.servers.get(inp.name, None)
+            if server is None:
+                self._waiting.setdefault(inp.name, []).append(future)
+        if server is not None:
+            future.set_result(armem.mns.dto.WaitForServerResult(success=True, server=server))
+
+        if c is None:
+            # Called directly, not via Ice.
+            return future.result()
+        return future
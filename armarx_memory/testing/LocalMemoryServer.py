@@ -0,0 +1,390 @@
+import bisect
+import logging
+import re
+import threading
+import typing as ty
+
+from armarx_core import slice_loader
+
+slice_loader.load_armarx_slice("RobotAPI", "armem/server/MemoryInterface.ice")
+slice_loader.load_armarx_slice("RobotAPI", "armem/client/MemoryListenerInterface.ice")
+
+from armarx import armem
+
+from armarx_memory.core import MemoryID, DateTimeIceConverter, time_usec
+
+
+logger = logging.getLogger(__name__)
+
+date_time_conv = DateTimeIceConverter()
+
+qd = armem.query.data
+
+# A listener is either a (local) `MemoryListener` or a proxy of one.
+Listener = ty.Union["armarx_memory.client.MemoryListener", armem.client.MemoryListenerInterfacePrx]
+
+
+class _Entity:
+    """The history of an entity, indexed by timestamp."""
+
+    def __init__(self):
+        self.timestamps: ty.List[int] = []  # Sorted.
+        self.snapshots: ty.Dict[int, armem.data.EntitySnapshot] = {}
+
+    def add(self, timestamp: int, snapshot: armem.data.EntitySnapshot):
+        if timestamp not in self.snapshots:
+            bisect.insort(self.timestamps, timestamp)
+        self.snapshots[timestamp] = snapshot
+
+    def select(self, query: armem.query.data.EntityQuery) -> ty.List[int]:
+        """Return the timestamps selected by an entity query."""
+        ts = self.timestamps
+        if not ts:
+            return []
+
+        if isinstance(query, qd.entity.All):
+            return ts
+
+        elif isinstance(query, qd.entity.Single):
+            t = _usec(query.timestamp)
+            if t is None:
+                return ts[-1:]  # Latest
+            return [t] if t in self.snapshots else []
+
+        elif isinstance(query, qd.entity.TimeRange):
+            t_min, t_max = _usec(query.minTimestamp), _usec(query.maxTimestamp)
+            begin = 0 if t_min is None else bisect.bisect_left(ts, t_min)
+            end = len(ts) if t_max is None else bisect.bisect_right(ts, t_max)
+            return ts[begin:end]
+
+        elif isinstance(query, qd.entity.IndexRange):
+            first, last = query.first, query.last
+            first = first + len(ts) if first < 0 else first
+            last = last + len(ts) if last < 0 else last
+            return ts[max(first, 0):last + 1]
+
+        elif isinstance(query, qd.entity.BeforeOrAtTime):
+            t = _usec(query.timestamp)
+            end = len(ts) if t is None else bisect.bisect_right(ts, t)
+            return ts[end - 1:end] if end > 0 else []
+
+        elif isinstance(query, qd.entity.BeforeTime):
+            t = _usec(query.timestamp)
+            end = len(ts) if t is None else bisect.bisect_left(ts, t)
+            max_entries = getattr(query, "maxEntries", 1)
+            begin = 0 if max_entries < 0 else max(end - max_entries, 0)
+            return ts[begin:end]
+
+        elif isinstance(query, qd.entity.TimeApprox):
+            t = _usec(query.timestamp)
+            if t is None:
+                return []
+            eps = getattr(query, "eps", None)
+            eps = getattr(eps, "microSeconds", eps)  # Duration or int.
+            index = bisect.bisect_left(ts, t)
+            candidates = ts[max(index - 1, 0):index + 1]
+            return [c for c in candidates if eps is None or eps < 0 or abs(c - t) <= eps]
+
+        raise NotImplementedError(f"Entity query of type {type(query).__name__} is not supported.")
+
+
+class LocalMemoryServer(armem.server.MemoryInterface):
+    """
+    A pure-Python memory server for local testing and benchmarking.
+
+    It stores commits in memory and answers queries like an ArmarX memory
+    server. Updates are announced to the added listeners directly (instead
+    of via IceStorm), in a background thread and in commit order.
+
+    Usually, it is hosted by a `LocalMemorySystem`, but it can also be
+    passed to a `Reader` or `Writer` directly (without Ice).
+
+    :param name: The memory name.
+    :param core_segments: The names of the core segments. If None, core
+        segments are created on demand when committing.
+    :param max_history_size: If given, only that many snapshots are kept per entity.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        core_segments: ty.Optional[ty.List[str]] = None,
+        max_history_size: ty.Optional[int] = None,
+    ):
+        super().__init__()
+        self.name = name
+        self.max_history_size = max_history_size
+        self.add_core_segments_on_demand = core_segments is None
+
+        # core segment -> provider segment -> entity
+        self.core_segments: ty.Dict[str, ty.Dict[str, ty.Dict[str, _Entity]]] = {
+            core_name: {} for core_name in (core_segments or [])
+        }
+        self._lock = threading.RLock()
+
+        self._listeners: ty.List[Listener] = []
+        self._notifications: ty.List[ty.List[MemoryID]] = []
+        self._notify_cond = threading.Condition()
+        self._notify_thread: ty.Optional[threading.Thread] = None
+        self._stop = False
+
+    @property
+    def id(self) -> MemoryID:
+        return MemoryID(self.name)
+
+    # Listeners
+
+    def add_listener(self, listener: Listener):
+        """Announce updates to `listener` (a `MemoryListener` or its proxy)."""
+        with self._notify_cond:
+            self._listeners.append(listener)
+            if self._notify_thread is None:
+                self._notify_thread = threading.Thread(target=self._run_notify, daemon=True)
+                self._notify_thread.start()
+
+    def remove_listener(self, listener: Listener):
+        with self._notify_cond:
+            self._listeners.remove(listener)
+
+    def shutdown(self):
+        with self._notify_cond:
+            self._stop = True
+            self._notify_cond.notify_all()
+        if self._notify_thread is not None:
+            self._notify_thread.join()
+
+    # WritingMemoryInterface
+
+    def addSegments(
+        self,
+        inputs: ty.List[armem.data.AddSegmentInput],
+        c=None,
+    ) -> ty.List[armem.data.AddSegmentResult]:
+        results = []
+        with self._lock:
+            for inp in inputs:
+                segment_id = MemoryID(self.name, inp.coreSegmentName, inp.providerSegmentName)
+                core = self._get_core_segment(inp.coreSegmentName, add=True)
+                if core is None:
+                    results.append(
+                        armem.data.AddSegmentResult(
+                            success=False,
+                            errorMessage=f"No core segment '{inp.coreSegmentName}'.",
+                        )
+                    )
+                    continue
+                if inp.providerSegmentName:
+                    if inp.clearWhenExists or inp.providerSegmentName not in core:
+                        core[inp.providerSegmentName] = {}
+                results.append(
+                    armem.data.AddSegmentResult(
+                        success=True, segmentID=str(segment_id).strip("'")
+                    )
+                )
+        return results
+
+    def commit(self, commit: armem.data.Commit, c=None) -> armem.data.CommitResult:
+        arrived_time = time_usec()
+        arrived_time_ice = date_time_conv.to_ice(arrived_time)
+
+        results = []
+        updated_ids = []
+        with self._lock:
+            for update in commit.updates:
+                try:
+                    snapshot_id = self._apply_update(update, arrived_time)
+                except KeyError as e:
+                    results.append(
+                        armem.data.EntityUpdateResult(
+                            success=False,
+                            arrivedTime=arrived_time_ice,
+                            errorMessage=str(e),
+                        )
+                    )
+                    continue
+
+                results.append(
+                    armem.data.EntityUpdateResult(
+                        success=True,
+                        snapshotID=snapshot_id.to_ice(),
+                        arrivedTime=arrived_time_ice,
+                    )
+                )
+                updated_ids += [
+                    snapshot_id.with_instance_index(i)
+                    for i in range(len(update.instancesData))
+                ]
+
+        if updated_ids:
+            self._notify(updated_ids)
+        return armem.data.CommitResult(results=results)
+
+    # ReadingMemoryInterface
+
+    def query(self, input: armem.query.data.Input, c=None) -> armem.query.data.Result:
+        try:
+            with self._lock:
+                memory = self._query_memory(input.memoryQueries, input.withData)
+        except (NotImplementedError, re.error) as e:
+            return qd.Result(success=False, errorMessage=str(e))
+        return qd.Result(success=True, memory=memory)
+
+    # Internals
+
+    def _notify(self, updated_ids: ty.List[MemoryID]):
+        with self._notify_cond:
+            if self._listeners:
+                self._notifications.append(updated_ids)
+                self._notify_cond.notify_all()
+
+    def _run_notify(self):
+        while True:
+            with self._notify_cond:
+                self._notify_cond.wait_for(lambda: self._notifications or self._stop)
+                if self._stop:
+                    return
+                notifications, self._notifications = self._notifications, []
+                listeners = list(self._listeners)
+
+            for updated_ids in notifications:
+                for listener in listeners:
+                    try:
+                        if isinstance(listener, armem.client.MemoryListenerInterface):
+                            # Local listener.
+                            listener.updated(updated_ids)
+                        else:
+                            listener.memoryUpdated([i.to_ice() for i in updated_ids])
+                    except Exception:
+                        logger.exception(f"Failed to notify listener {listener}.")
+
+    def _get_core_segment(self, name: str, add: bool):
+        core = self.core_segments.get(name, None)
+        if core is None and add and self.add_core_segments_on_demand:
+            core = self.core_segments[name] = {}
+        return core
+
+    def _apply_update(self, update: armem.data.EntityUpdate, arrived_time: int) -> MemoryID:
+        entity_id = MemoryID.from_ice(update.entityID)
+        core = self._get_core_segment(entity_id.core_segment_name, add=True)
+        if core is None:
+            raise KeyError(f"No core segment '{entity_id.core_segment_name}' in memory '{self.name}'.")
+        entities = core.setdefault(entity_id.provider_segment_name, {})
+        entity = entities.get(entity_id.entity_name, None)
+        if entity is None:
+            entity = entities[entity_id.entity_name] = _Entity()
+
+        timestamp = date_time_conv.from_ice(update.referencedTime)
+        snapshot_id = MemoryID(
+            self.name,
+            entity_id.core_segment_name,
+            entity_id.provider_segment_name,
+            entity_id.entity_name,
+            timestamp,
+        )
+        snapshot_id_ice = snapshot_id.to_ice()
+
+        instances = []
+        for index, data in enumerate(update.instancesData):
+            metadata = armem.data.EntityInstanceMetadata(
+                referencedTime=update.referencedTime,
+                sentTime=update.sentTime,
+                arrivedTime=date_time_conv.to_ice(arrived_time),
+                confidence=update.confidence,
+            )
+            instances.append(
+                armem.data.EntityInstance(
+                    id=snapshot_id.with_instance_index(index).to_ice(),
+                    data=data,
+                    metadata=metadata,
+                )
+            )
+        entity.add(timestamp, armem.data.EntitySnapshot(id=snapshot_id_ice, instances=instances))
+
+        if self.max_history_size is not None:
+            while len(entity.timestamps) > self.max_history_size:
+                del entity.snapshots[entity.timestamps.pop(0)]
+
+        return snapshot_id
+
+    def _query_memory(
+        self,
+        queries: ty.List[armem.query.data.MemoryQuery],
+        with_data: bool,
+    ) -> armem.data.Memory:
+        result = armem.data.Memory(id=self.id.to_ice(), coreSegments={})
+        for query in queries:
+            for name in _select_names(query, self.core_segments, "coreSegmentName"):
+                core_id = MemoryID(self.name, name)
+                core = result.coreSegments.get(name, None)
+                if core is None:
+                    core = result.coreSegments[name] = armem.data.CoreSegment(
+                        id=core_id.to_ice(), providerSegments={}
+                    )
+                self._query_core_segment(
+                    core_id, self.core_segments[name], core, query.coreSegmentQueries, with_data
+                )
+        return result
+
+    def _query_core_segment(self, core_id, segment, result, queries, with_data):
+        for query in queries:
+            for name in _select_names(query, segment, "providerSegmentName"):
+                prov_id = core_id.with_provider_segment_name(name)
+                prov = result.providerSegments.get(name, None)
+                if prov is None:
+                    prov = result.providerSegments[name] = armem.data.ProviderSegment(
+                        id=prov_id.to_ice(), entities={}
+                    )
+                self._query_provider_segment(
+                    prov_id, segment[name], prov, query.providerSegmentQueries, with_data
+                )
+
+    def _query_provider_segment(self, prov_id, segment, result, queries, with_data):
+        for query in queries:
+            for name in _select_names(query, segment, "entityName"):
+                entity = segment[name]
+                entity_result = result.entities.get(name, None)
+                if entity_result is None:
+                    entity_result = result.entities[name] = armem.data.Entity(
+                        id=prov_id.with_entity_name(name).to_ice(), history={}
+                    )
+                for entity_query in query.entityQueries:
+                    for timestamp in entity.select(entity_query):
+                        snapshot = entity.snapshots[timestamp]
+                        if not with_data:
+                            snapshot = _without_data(snapshot)
+                        entity_result.history[snapshot.id.timestamp] = snapshot
+
+
+def _usec(date_time) -> ty.Optional[int]:
+    """
+    Return the microseconds of a DateTime, or None if it is unset or invalid,
+    i.e. negative (e.g. -1). Zero is a valid timestamp.
+    """
+    if date_time is None:
+        return None
+    t = date_time_conv.from_ice(date_time)
+    return t if t >= 0 else None
+
+
+def _select_names(query, children: ty.Dict[str, ty.Any], name_attribute: str) -> ty.List[str]:
+    """Select children of a memory, core segment or provider segment query."""
+    type_name = type(query).__name__
+    if type_name == "All":
+        return list(children)
+    elif type_name == "Single":
+        name = getattr(query, name_attribute)
+        return [name] if name in children else []
+    elif type_name == "Regex":
+        regex = re.compile(getattr(query, name_attribute + "Regex"))
+        return [name for name in children if regex.search(name)]
+    raise NotImplementedError(f"Query of type {type_name} is not supported.")
+
+
+def _without_data(snapshot: armem.data.EntitySnapshot) -> armem.data.EntitySnapshot:
+    return armem.data.EntitySnapshot(
+        id=snapshot.id,
+        instances=[
+            armem.data.EntityInstance(id=i.id, data=None, metadata=i.metadata)
+            for i in snapshot.instances
+        ],
+    )
@@ -0,0 +1,132 @@
+import typing as ty
+
+from armarx import armem
+
+from armarx_memory.client import MemoryNameSystem, MemoryListener
+from armarx_memory.testing.LocalMemoryServer import LocalMemoryServer
+from armarx_memory.testing.LocalMemoryNameSystem import LocalMemoryNameSystem
+
+
+class LocalMemorySystem:
+    """
+    Hosts a memory name system and memory servers in the current process,
+    so the memory clients can be used without a running ArmarX.
+
+    The servants are added to their own Ice communicator and adapter, so
+    clients use real Ice proxies (including asynchronous invocations).
+    Listeners are notified directly instead of via IceStorm.
+
+    Usage:
+
+    with LocalMemorySystem() as system:
+        system.add_memory("Example")
+        mns = system.get_mns()
+
+        writer = mns.wait_for_writer(MemoryID("Example"))
+        reader = mns.wait_for_reader(MemoryID("Example"))
+
+        listener = MemoryListener(register=False)
+        system.add_listener(listener)
+        listener.subscribe(MemoryID("Example"), callback)
+    """
+
+    def __init__(
+        self,
+        endpoints: str = "tcp -h 127.0.0.1",
+        thread_pool_size: int = 4,
+        communicator: ty.Optional["Ice.Communicator"] = None,
+    ):
+        """
+        :param endpoints: The endpoints of the adapter.
+        :param thread_pool_size: The number of threads dispatching requests.
+        :param communicator: An existing communicator. If None, one is created.
+        """
+        import Ice
+
+        self._owns_communicator = communicator is None
+        if communicator is None:
+            init_data = Ice.InitializationData()
+            init_data.properties = Ice.createProperties()
+            init_data.properties.setProperty("Ice.ThreadPool.Server.Size", str(thread_pool_size))
+            init_data.properties.setProperty("Ice.ThreadPool.Server.SizeMax", str(thread_pool_size))
+            communicator = Ice.initialize(init_data)
+        self.communicator = communicator
+
+        self.adapter = communicator.createObjectAdapterWithEndpoints(
+            "LocalMemorySystem", endpoints
+        )
+        self.adapter.activate()
+
+        self.mns_servant = LocalMemoryNameSystem()
+        self.mns_proxy = armem.mns.MemoryNameSystemInterfacePrx.uncheckedCast(
+            self._add_servant(self.mns_servant, "MemoryNameSystem")
+        )
+
+        self.memories: ty.Dict[str, LocalMemoryServer] = {}
+
+    def add_memory(
+        self,
+        name: str,
+        core_segments: ty.Optional[ty.List[str]] = None,
+        max_history_size: ty.Optional[int] = None,
+    ) -> LocalMemoryServer:
+        """
+        Add a memory server and register it at the memory name system.
+        See `LocalMemoryServer` for the parameters.
+        """
+        server = LocalMemoryServer(
+            name, core_segments=core_segments, max_history_size=max_history_size
+        )
+        return self.add_server(server)
+
+    def add_server(self, server: LocalMemoryServer) -> LocalMemoryServer:
+        """
+        Add a memory server (e.g. of a subclass of `LocalMemoryServer`)
+        and register it at the memory name system under its name.
+        """
+        name = server.name
+        proxy = self._add_servant(server, f"{name}Memory")
+        self.memories[name] = server
+        self.mns_servant.register(
+            name,
+            armem.mns.dto.MemoryServerInterfaces(
+                reading=armem.server.ReadingMemoryInterfacePrx.uncheckedCast(proxy),
+                writing=armem.server.WritingMemoryInterfacePrx.uncheckedCast(proxy),
+            ),
+        )
+        return server
+
+    def get_mns(self, **kwargs) -> MemoryNameSystem:
+        """Return a client of the memory name system."""
+        return MemoryNameSystem(self.mns_proxy, **kwargs)
+
+    def add_listener(
+        self,
+        listener: MemoryListener,
+        memory_name: ty.Optional[str] = None,
+    ):
+        """
+        Notify `listener` about updates of a memory (or all memories added so far).
+        The listener does not need to be registered at Ice.
+        """
+        memories = (
+            self.memories.values() if memory_name is None else [self.memories[memory_name]]
+        )
+        for memory in memories:
+            memory.add_listener(listener)
+
+    def shutdown(self):
+        for memory in self.memories.values():
+            memory.shutdown()
+        self.adapter.destroy()
+        if self._owns_communicator:
+            self.communicator.destroy()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def _add_servant(self, servant, name: str) -> "Ice.ObjectPrx":
+        return self.adapter.add(servant, self.communicator.stringToIdentity(name))
@@ -0,0 +1,3 @@
+from .LocalMemoryServer import LocalMemoryServer
+from .LocalMemoryNameSystem import LocalMemoryNameSystem
+from .LocalMemorySystem import LocalMemorySystem
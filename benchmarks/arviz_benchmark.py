@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Conversion and commit benchmarks of the ArViz client.
+
+The benchmarks commit to an in-process storage
+(armarx_core.arviz.testing), so no ArViz storage needs to be running.
+Each case has a regression threshold; with --check, the script fails
+if a case is slower than its threshold.
+
+Usage:
+
+python3 benchmarks/arviz_benchmark.py --check
+python3 benchmarks/arviz_benchmark.py --filter PointCloud --repeat 20
+"""
+
+import argparse
+import sys
+import time
+import typing as ty
+
+import numpy as np
+
+import armarx_core.arviz as viz
+from armarx_core.arviz.testing import LocalArVizStorage
+
+
+# Regression thresholds of the median duration (ms), with headroom for
+# slower machines. Scale them with --threshold-scale.
+THRESHOLDS_MS = {
+    "Arrow x1000": 150.0,
+    "ArrowCircle x1000": 150.0,
+    "Box x1000": 150.0,
+    "Cylinder x1000": 150.0,
+    "Ellipsoid x1000": 150.0,
+    "Line x1000": 150.0,
+    "Object x1000": 150.0,
+    "Polygon (100 points) x100": 100.0,
+    "Pose x1000": 120.0,
+    "Robot (50 joints) x100": 50.0,
+    "Sphere x1000": 120.0,
+    "Text x1000": 120.0,
+    "PointCloud 300k points (structured)": 50.0,
+    "PointCloud 300k points (N, 7)": 150.0,
+    "Mesh 200x200 grid": 400.0,
+    "BoxArray x10000": 250.0,
+    "Layer.data cached (Box x1000)": 40.0,
+    "Client.commit 10 layers, 1 changed": 25.0,
+    "Client.commit 10 layers, 1 changed (delta)": 10.0,
+}
+
+
+class Case:
+    def __init__(
+        self,
+        name: str,
+        make_layers: ty.Callable[[], ty.List[viz.Layer]],
+        run: ty.Optional[ty.Callable[[ty.List[viz.Layer]], None]] = None,
+        setup_once=False,
+    ):
+        """
+        :param make_layers: Builds the layers. It is part of the measured
+            time unless `setup_once` is true.
+        :param run: Converts or commits the layers. By default,
+            `Layer.data()` is called for each layer.
+        """
+        self.name = name
+        self.make_layers = make_layers
+        self.run = run or (lambda layers: [layer.data() for layer in layers])
+        self.setup_once = setup_once
+
+    def measure(self, repeat: int) -> ty.Tuple[np.ndarray, ty.List[viz.Layer]]:
+        durations = []
+        layers = self.make_layers() if self.setup_once else None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            if not self.setup_once:
+                layers = self.make_layers()
+            self.run(layers)
+            durations.append(time.perf_counter() - start)
+        return np.array(durations) * 1e3, layers
+
+
+def layer_of(name: str, elements) -> ty.List[viz.Layer]:
+    return [viz.Layer("Benchmark", name, elements)]
+
+
+def random_positions(num: int) -> np.ndarray:
+    return np.random.uniform(-1000, 1000, (num, 3))
+
+
+def element_cases(num: int = 1000) -> ty.List[Case]:
+    positions = random_positions(num)
+    directions = np.random.normal(size=(num, 3))
+    factories = {
+        "Arrow": lambda i: viz.Arrow(
+            f"{i}", position=positions[i], direction=directions[i], length=100.0
+        ),
+        "ArrowCircle": lambda i: viz.ArrowCircle(
+            f"{i}", position=positions[i], normal=directions[i], radius=50.0
+        ),
+        "Box": lambda i: viz.Box(f"{i}", position=positions[i], size=(10, 20, 30)),
+        "Cylinder": lambda i: viz.Cylinder(
+            f"{i}", position=positions[i], direction=directions[i], radius=5.0, height=50.0
+        ),
+        "Ellipsoid": lambda i: viz.Ellipsoid(
+            f"{i}", position=positions[i], axis_lengths=(10, 20, 30)
+        ),
+        "Line": lambda i: viz.Line(f"{i}", start=positions[i], end=positions[i] + 100.0),
+        "Object": lambda i: viz.Object(
+            f"{i}", project="PriorKnowledgeData", filename="objects/box.xml", position=positions[i]
+        ),
+        "Pose": lambda i: viz.Pose(f"{i}", position=positions[i]),
+        "Sphere": lambda i: viz.Sphere(f"{i}", position=positions[i], radius=10.0),
+        "Text": lambda i: viz.Text(f"{i}", text=f"Text {i}", position=positions[i]),
+    }
+    cases = [
+        Case(f"{name} x{num}", lambda f=factory, n=name: layer_of(n, [f(i) for i in range(num)]))
+        for name, factory in factories.items()
+    ]
+
+    polygon_points = np.random.uniform(-1000, 1000, (100, 3))
+    cases.append(
+        Case(
+            "Polygon (100 points) x100",
+            lambda: layer_of(
+                "Polygon", [viz.Polygon(f"{i}", points=polygon_points) for i in range(100)]
+            ),
+        )
+    )
+
+    joint_angles = {f"joint_{j}": 0.1 * j for j in range(50)}
+    cases.append(
+        Case(
+            "Robot (50 joints) x100",
+            lambda: layer_of(
+                "Robot",
+                [
+                    viz.Robot(
+                        f"{i}",
+                        project="armar6_rt",
+                        filename="robotmodel/Armar6.xml",
+                        joint_angles=joint_angles,
+                    )
+                    for i in range(100)
+                ],
+            ),
+        )
+    )
+    return cases
+
+
+def point_cloud_cases(num_points: int = 300000) -> ty.List[Case]:
+    cloud = np.zeros(num_points, dtype=viz.PointCloud.dtype)
+    cloud["position"] = np.random.uniform(-1000, 1000, (num_points, 3))
+    cloud["r"] = 255
+    cloud["a"] = 255
+    points = np.random.uniform(0, 255, (num_points, 7))
+
+    return [
+        Case(
+            f"PointCloud {num_points // 1000}k points (structured)",
+            lambda: layer_of("PointCloud", [viz.PointCloud("cloud", points=cloud)]),
+        ),
+        Case(
+            f"PointCloud {num_points // 1000}k points (N, 7)",
+            lambda: layer_of("PointCloud", [viz.PointCloud("cloud", points=points)]),
+        ),
+    ]
+
+
+def mesh_cases(num: int = 200) -> ty.List[Case]:
+    xs, ys = np.meshgrid(np.linspace(0, 1000, num), np.linspace(0, 1000, num), indexing="ij")
+    vertices = np.stack([xs, ys, np.sin(xs / 100) * 100], axis=-1).reshape(-1, 3)
+    colors = np.random.randint(0, 255, (len(vertices), 4))
+
+    def make_layers():
+        mesh = viz.Mesh("mesh")
+        mesh.vertices = vertices
+        mesh.colors = colors
+        mesh.faces = viz.Mesh.make_grid2d_faces(num, num)
+        return layer_of("Mesh", [mesh])
+
+    return [Case(f"Mesh {num}x{num} grid", make_layers)]
+
+
+def array_cases(num: int = 10000) -> ty.List[Case]:
+    positions = random_positions(num)
+    sizes = np.random.uniform(1, 10, (num, 3))
+    colors = np.random.randint(0, 255, (num, 4))
+    return [
+        Case(
+            f"BoxArray x{num}",
+            lambda: layer_of(
+                "BoxArray", [viz.BoxArray("box", positions=positions, sizes=sizes, colors=colors)]
+            ),
+        )
+    ]
+
+
+def cache_cases(num: int = 1000) -> ty.List[Case]:
+    def make_layers():
+        layers = layer_of("Box", [viz.Box(f"{i}", position=p) for i, p in enumerate(random_positions(num))])
+        layers[0].data()
+        return layers
+
+    return [Case(f"Layer.data cached (Box x{num})", make_layers, setup_once=True)]
+
+
+def commit_cases(num_layers: int = 10, num_elements: int = 100) -> ty.List[Case]:
+    cases = []
+    for delta in (False, True):
+        client = viz.Client(
+            "Benchmark",
+            delta_commits=delta,
+            storage=LocalArVizStorage(measure_payload_size=False),
+        )
+
+        def make_layers():
+            return [
+                viz.Layer(
+                    "Benchmark",
+                    f"layer_{j}",
+                    [viz.Box(f"{i}", position=p) for i, p in enumerate(random_positions(num_elements))],
+                )
+                for j in range(num_layers)
+            ]
+
+        def run(layers, client=client):
+            layers[0].elements[0].position = np.random.uniform(-1000, 1000, 3)
+            client.commit(layers)
+
+        name = f"Client.commit {num_layers} layers, 1 changed" + (" (delta)" if delta else "")
+        cases.append(Case(name, make_layers, run, setup_once=True))
+    return cases
+
+
+def payload_size(layers: ty.List[viz.Layer]) -> int:
+    storage = LocalArVizStorage()
+    viz.Client("Benchmark", storage=storage).commit(layers)
+    return storage.payload_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="Repetitions per case.")
+    parser.add_argument("--filter", type=str, default="", help="Only run cases containing this.")
+    parser.add_argument("--check", action="store_true", help="Fail if a threshold is exceeded.")
+    parser.add_argument(
+        "--threshold-scale", type=float, default=1.0, help="Factor applied to the thresholds."
+    )
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    cases = (
+        element_cases()
+        + point_cloud_cases()
+        + mesh_cases()
+        + array_cases()
+        + cache_cases()
+        + commit_cases()
+    )
+    cases = [case for case in cases if args.filter in case.name]
+
+    regressions = []
+    width = max(len(case.name) for case in cases)
+    print(f"{'case':<{width}}  {'median':>10}  {'p95':>10}  {'threshold':>10}  {'payload':>10}")
+    for case in cases:
+        durations_ms, layers = case.measure(args.repeat)
+        median, p95 = np.percentile(durations_ms, [50, 95])
+        threshold = THRESHOLDS_MS.get(case.name, None)
+        if threshold is not None:
+            threshold *= args.threshold_scale
+        kib = payload_size(layers) / 1024
+
+        status = ""
+        if threshold is not None and median > threshold:
+            status = "  REGRESSION"
+            regressions.append(case.name)
+        threshold_str = f"{threshold:7.1f} ms" if threshold is not None else f"{'-':>10}"
+        print(
+            f"{case.name:<{width}}  {median:7.2f} ms  {p95:7.2f} ms  {threshold_str}"
+            f"  {kib:6.0f} KiB{status}"
+        )
+
+    if args.check and regressions:
+        print(f"\n{len(regressions)} case(s) exceeded their threshold: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
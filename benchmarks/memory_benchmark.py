@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Throughput and latency benchmarks of the memory clients.
+
+The benchmarks run against an in-process memory system
+(armarx_memory.testing), so no ArmarX installation needs to be running.
+
+Usage:
+
+python3 benchmarks/memory_benchmark.py --entities 10 --commits 1000
+"""
+
+import argparse
+import threading
+import time
+import typing as ty
+
+import numpy as np
+
+from armarx_memory.aron.conversion import to_aron
+from armarx_memory.client import (
+    BufferedWriter,
+    Commit,
+    MemoryListener,
+    MemoryNameSystem,
+    Reader,
+    Writer,
+)
+from armarx_memory.core import MemoryID, time_usec
+from armarx_memory.testing import LocalMemorySystem
+
+
+MEMORY_ID = MemoryID("Benchmark", "Data")
+
+
+class Results:
+    def __init__(self):
+        self.rows: ty.List[ty.Tuple[str, str]] = []
+
+    def throughput(self, name: str, count: int, duration_sec: float):
+        self.rows.append((name, f"{count / duration_sec:10.1f} / s"))
+
+    def latency(self, name: str, latencies_sec: ty.List[float]):
+        ms = np.array(latencies_sec) * 1e3
+        self.rows.append(
+            (
+                name,
+                "p50 {:7.3f} ms   p95 {:7.3f} ms   p99 {:7.3f} ms".format(
+                    *np.percentile(ms, [50, 95, 99])
+                ),
+            )
+        )
+
+    def print(self):
+        width = max(len(name) for name, _ in self.rows)
+        for name, value in self.rows:
+            print(f"{name:<{width}}  {value}")
+
+
+def make_entity_ids(num_entities: int) -> ty.List[MemoryID]:
+    provider_id = MEMORY_ID.with_provider_segment_name("Benchmark")
+    return [provider_id.with_entity_name(f"entity_{i}") for i in range(num_entities)]
+
+
+def make_data(payload_floats: int):
+    return to_aron({"value": np.random.rand(payload_floats).astype(np.float32), "index": 0})
+
+
+def bench_commit(writer: Writer, entity_ids, data, num_commits: int, results: Results):
+    latencies = []
+    start = time.perf_counter()
+    for i in range(num_commits):
+        commit = Commit()
+        commit.add(entity_id=entity_ids[i % len(entity_ids)], instances_data=[data])
+        t = time.perf_counter()
+        writer.commit(commit)
+        latencies.append(time.perf_counter() - t)
+    results.throughput("commit (one update per commit)", num_commits, time.perf_counter() - start)
+    results.latency("commit latency", latencies)
+
+
+def bench_buffered_commit(writer: Writer, entity_ids, data, num_commits: int, results: Results):
+    start = time.perf_counter()
+    with BufferedWriter(writer) as buffered:
+        futures = [
+            buffered.add(entity_id=entity_ids[i % len(entity_ids)], instances_data=[data])
+            for i in range(num_commits)
+        ]
+        for future in futures:
+            future.result()
+    results.throughput("commit (BufferedWriter)", num_commits, time.perf_counter() - start)
+
+
+def bench_query(reader: Reader, entity_ids, num_queries: int, results: Results):
+    latencies = []
+    for i in range(num_queries):
+        t = time.perf_counter()
+        reader.query_latest(entity_ids[i % len(entity_ids)])
+        latencies.append(time.perf_counter() - t)
+    results.latency("query_latest (one entity)", latencies)
+
+    latencies = []
+    for _ in range(max(num_queries // 10, 1)):
+        t = time.perf_counter()
+        reader.query_snapshots(entity_ids)
+        latencies.append(time.perf_counter() - t)
+    results.latency(f"query_snapshots ({len(entity_ids)} entities)", latencies)
+
+    latencies = []
+    for _ in range(max(num_queries // 10, 1)):
+        t = time.perf_counter()
+        reader.query_snapshot_infos(MEMORY_ID)
+        latencies.append(time.perf_counter() - t)
+    results.latency("query_snapshot_infos (all, no data)", latencies)
+
+
+def bench_listener(system: LocalMemorySystem, writer: Writer, entity_ids, data, num_commits: int, results: Results):
+    listener = MemoryListener(register=False)
+    system.add_listener(listener)
+
+    latencies = []
+    received = threading.Semaphore(0)
+
+    def callback(subscription_id: MemoryID, updated_ids: ty.List[MemoryID]):
+        latencies.append(time_usec() - updated_ids[0].timestamp_usec)
+        received.release()
+
+    listener.subscribe(MEMORY_ID, callback)
+    for i in range(num_commits):
+        commit = Commit()
+        commit.add(entity_id=entity_ids[i % len(entity_ids)], instances_data=[data])
+        writer.commit(commit)
+        received.acquire()
+
+    results.latency("commit to listener callback", [latency * 1e-6 for latency in latencies])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entities", type=int, default=10, help="Number of entities.")
+    parser.add_argument("--commits", type=int, default=1000, help="Number of commits.")
+    parser.add_argument("--queries", type=int, default=1000, help="Number of queries.")
+    parser.add_argument("--payload", type=int, default=16, help="Number of floats per instance.")
+    parser.add_argument("--history", type=int, default=100, help="Snapshots kept per entity.")
+    args = parser.parse_args()
+
+    results = Results()
+    with LocalMemorySystem() as system:
+        system.add_memory(MEMORY_ID.memory_name, max_history_size=args.history)
+        mns: MemoryNameSystem = system.get_mns()
+        writer = mns.wait_for_writer(MEMORY_ID)
+        reader = mns.wait_for_reader(MEMORY_ID)
+
+        entity_ids = make_entity_ids(args.entities)
+        data = make_data(args.payload)
+
+        bench_commit(writer, entity_ids, data, args.commits, results)
+        bench_buffered_commit(writer, entity_ids, data, args.commits, results)
+        bench_query(reader, entity_ids, args.queries, results)
+        bench_listener(system, writer, entity_ids, data, min(args.commits, 1000), results)
+
+    results.print()
+
+
+if __name__ == "__main__":
+    main()
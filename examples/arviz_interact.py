@@ -1,12 +1,12 @@
 #!/usr/bin/env python3
 import enum
+import time
 
 import numpy as np
 from typing import List, Optional
 
 import armarx_core.arviz as viz
 from armarx_core.math.transform import Transform
-from armarx_core.tools.metronome import Metronome
 
 
 # SLIDER EXAMPLE
@@ -423,45 +423,23 @@ class ArVizInteractExample:
         spawners.visualize(self.arviz)
         stage.add([spawners.layer_spawners, spawners.layer_objects])
 
-        result = self.arviz.commit(stage)
-        print(f"Initial commit at revision: {result.revision}")
-
-        try:
-            print("Press Ctrl+C to interrupt...")
-
-            metronome = Metronome(duration_seconds=0.01)
-            while True:
-
-                result = self.arviz.commit(stage)
-
-                # Reset the stage, so that it can be rebuild during the interaction handling
-                stage.reset()
-
-                stage.request_interaction(sliders.layer_interact)
-                stage.request_interaction(spawners.layer_spawners)
-
-                if len(result.interactions) > 0:
-                    print(f"Received {len(result.interactions)} interactions.")
-
-                for interaction in result.interactions:
-                    if interaction.layer == "Sliders":
-                        print(
-                            f"Processing slider interaction ... (revision {result.revision})"
-                        )
-                        sliders.handle(interaction, stage)
-
-                    if interaction.layer == "Spawners":
-                        print(
-                            f"Processing spawner interaction ... (revision {result.revision})"
-                        )
-                        spawners.handle(interaction, stage)
-
-                if metronome.remaining_seconds <= 0:
-                    print("Remaining: ", metronome.remaining_seconds)
-                metronome.wait_for_next_tick()
-
-        except KeyboardInterrupt:
-            pass
+        with self.arviz.start_interaction_session() as session:
+            # The handlers are called in the session's background thread.
+            session.on(sliders.layer_interact, handler=sliders.handle)
+            session.on(spawners.layer_spawners, handler=spawners.handle)
+            session.commit(stage)
+
+            try:
+                print("Press Ctrl+C to interrupt...")
+                while True:
+                    time.sleep(1.0)
+                    print(
+                        f"Polling at {session.rate_hz:.0f} Hz, "
+                        f"received {session.num_interactions} interactions."
+                    )
+
+            except KeyboardInterrupt:
+                pass
 
 
 if __name__ == "__main__":
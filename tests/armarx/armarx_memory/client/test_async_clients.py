@@ -0,0 +1,122 @@
+import asyncio
+import threading
+
+import Ice
+import pytest
+
+from armarx_memory.aron.conversion import to_aron
+from armarx_memory.client import (
+    AsyncMemoryNameSystem,
+    AsyncReader,
+    AsyncWriter,
+    Commit,
+    EntityUpdate,
+    gather_dict,
+)
+from armarx_memory.client.detail.ice_asyncio import wrap_ice_future
+from armarx_memory.core import MemoryID, error as armem_error
+from armarx_memory.testing import LocalMemorySystem
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def entity_id(memory_name: str) -> MemoryID:
+    return MemoryID(memory_name, "Core", "provider", "entity")
+
+
+def make_commit(memory_name: str, value: int) -> Commit:
+    commit = Commit()
+    commit.add(
+        EntityUpdate(entity_id(memory_name), [to_aron({"value": value})], referenced_time_usec=value)
+    )
+    return commit
+
+
+def test_wrap_ice_future_transfers_results_from_other_threads():
+    async def main():
+        ice_futures = [Ice.Future(), Ice.Future()]
+        futures = [wrap_ice_future(f) for f in ice_futures]
+
+        def complete():
+            ice_futures[0].set_result(42)
+            ice_futures[1].set_exception(Ice.TimeoutException())
+
+        threading.Thread(target=complete).start()
+        assert await futures[0] == 42
+        with pytest.raises(Ice.TimeoutException):
+            await futures[1]
+
+        # Cancelling the asyncio future cancels the invocation.
+        ice_future = Ice.Future()
+        future = wrap_ice_future(ice_future)
+        future.cancel()
+        await asyncio.sleep(0)
+        assert ice_future.cancelled()
+
+    run(main())
+
+
+def test_gather_dict_keeps_keys():
+    async def value(v, delay):
+        await asyncio.sleep(delay)
+        return v
+
+    async def fail():
+        raise ValueError("Failed.")
+
+    async def main():
+        results = await gather_dict({"a": value(1, 0.02), "b": value(2, 0.0)})
+        assert results == {"a": 1, "b": 2}
+
+        results = await gather_dict({"a": value(1, 0.0), "b": fail()}, return_exceptions=True)
+        assert results["a"] == 1
+        assert isinstance(results["b"], ValueError)
+
+        with pytest.raises(ValueError):
+            await gather_dict({"b": fail()})
+
+    run(main())
+
+
+def test_async_clients_with_local_memory_system():
+    names = ["Robot", "Object"]
+
+    async def main(system: LocalMemorySystem):
+        mns = AsyncMemoryNameSystem(system.get_mns())
+
+        writers = await mns.wait_for_writers([MemoryID(name) for name in names])
+        assert all(isinstance(w, AsyncWriter) for w in writers.values())
+        results = await gather_dict(
+            {
+                name: writers[MemoryID(name)].commit(make_commit(name, value))
+                for value, name in enumerate(names, start=1)
+            }
+        )
+        assert all(result.results[0].success for result in results.values())
+
+        memories = await mns.query_latest([entity_id(name) for name in names])
+        assert set(memories) == {entity_id(name) for name in names}
+
+        ids = [entity_id(name).with_timestamp(value) for value, name in enumerate(names, start=1)]
+        snapshots = await mns.resolve_entity_snapshots(ids)
+        assert set(snapshots) == set(ids)
+
+        reader = await mns.get_reader(entity_id("Robot"))
+        assert isinstance(reader, AsyncReader)
+        infos = await reader.query_snapshot_infos(entity_id("Robot"))
+        assert [info.timestamp_usec for info in infos] == [1]
+
+        with pytest.raises(armem_error.CouldNotResolveMemoryServer):
+            await mns.resolve_server(MemoryID("Missing"))
+        assert mns.sync.is_known_missing(MemoryID("Missing"))
+
+    with LocalMemorySystem() as system:
+        for name in names:
+            system.add_memory(name)
+        run(main(system))
@@ -0,0 +1,74 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from armarx_memory.client import BufferedWriter, EntityUpdate
+from armarx_memory.core import MemoryID, error as armem_error
+
+
+class FakeWriter:
+    def __init__(self):
+        self.commits = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def commit(self, commit):
+        self.entered.set()
+        self.release.wait()
+        self.commits.append(commit)
+        return SimpleNamespace(results=[f"result_{i}" for i in range(len(commit.updates))])
+
+
+def make_update(name: str) -> EntityUpdate:
+    return EntityUpdate(MemoryID("Memory", "Core", "provider", name), referenced_time_usec=1)
+
+
+def test_cancelled_future_is_dropped_without_stopping_the_thread():
+    fake = FakeWriter()
+    with BufferedWriter(fake, max_updates=100, max_age_seconds=10.0) as writer:
+        cancelled = writer.add(make_update("a"))
+        kept = writer.add(make_update("b"))
+        assert cancelled.cancel()
+        writer.flush(timeout=5.0)
+        assert kept.result(timeout=5.0) == "result_0"
+
+        # The thread still commits later updates.
+        later = writer.add(make_update("c"))
+        writer.flush(timeout=5.0)
+        assert later.result(timeout=5.0) == "result_0"
+
+    assert [len(c.updates) for c in fake.commits] == [1, 1]
+
+
+def test_add_after_stop_raises():
+    writer = BufferedWriter(FakeWriter())
+    writer.stop()
+    with pytest.raises(armem_error.ArMemError):
+        writer.add(make_update("a"))
+
+
+def test_add_raises_when_stopped_while_waiting_for_space():
+    fake = FakeWriter()
+    writer = BufferedWriter(fake, max_updates=1, max_pending=1, max_age_seconds=0.0)
+    fake.release.clear()
+    writer.add(make_update("in_flight"))
+    assert fake.entered.wait(timeout=5.0)  # The thread is blocked in commit().
+    writer.add(make_update("buffered"))
+
+    errors = []
+
+    def add():
+        try:
+            writer.add(make_update("waiting"))
+        except armem_error.ArMemError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=add)
+    thread.start()
+    thread.join(timeout=0.1)
+    writer.stop(flush=False, timeout=0.1)
+    thread.join(timeout=5.0)
+    fake.release.set()
+    assert len(errors) == 1
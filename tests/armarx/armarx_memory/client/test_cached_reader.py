@@ -0,0 +1,155 @@
+import typing as ty
+
+from armarx_memory.aron.conversion import to_aron
+from armarx_memory.client import Commit, EntityUpdate, Writer
+from armarx_memory.client.CachedReader import CachedReader, estimate_size_bytes
+from armarx_memory.core import MemoryID
+from armarx_memory.testing import LocalMemoryServer
+
+entity_id = MemoryID("Memory", "Core", "provider", "entity")
+
+
+class CountingMemoryServer(LocalMemoryServer):
+    """Counts the queries and runs `during_query` while answering one."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.num_queries = 0
+        self.during_query: ty.Optional[ty.Callable[[], None]] = None
+
+    def query(self, input, c=None):
+        self.num_queries += 1
+        result = super().query(input, c)
+        if self.during_query is not None:
+            self.during_query()
+        return result
+
+
+class FakeListener:
+    """Stands in for a MemoryListener, reporting updates on request."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def subscribe(self, memory_id: MemoryID, callback):
+        self.callbacks.append((memory_id, callback))
+
+    def update(self, updated_id: MemoryID):
+        for memory_id, callback in self.callbacks:
+            if memory_id.contains(updated_id) or updated_id.contains(memory_id):
+                callback(memory_id, [updated_id])
+
+
+def commit(server: LocalMemoryServer, t: int):
+    commit = Commit()
+    commit.add(EntityUpdate(entity_id, [to_aron({"t": t})], referenced_time_usec=t))
+    Writer(server).commit(commit)
+
+
+def get_t(snapshot) -> int:
+    return snapshot.id.timestamp.timeSinceEpoch.microSeconds
+
+
+def make_server(timestamps=(1000, 2000, 3000)) -> CountingMemoryServer:
+    server = CountingMemoryServer("Memory")
+    for t in timestamps:
+        commit(server, t)
+    return server
+
+
+def test_cached_reader_evicts_least_recently_used_snapshots():
+    server = make_server()
+    ids = [entity_id.with_timestamp(t) for t in (1000, 2000, 3000)]
+    size = estimate_size_bytes(CachedReader(server).query_snapshot(ids[0]))
+    reader = CachedReader(server, max_bytes=int(2.5 * size))
+    server.num_queries = 0
+
+    reader.query_snapshot(ids[0])
+    reader.query_snapshot(ids[1])
+    reader.query_snapshot(ids[0])
+    assert server.num_queries == 2
+
+    # Evicts the snapshot at 2000, which was used least recently.
+    reader.query_snapshot(ids[2])
+    assert server.num_queries == 3
+    assert reader.statistics.evictions == 1
+    assert reader.statistics.size_bytes <= reader.max_bytes
+
+    assert get_t(reader.query_snapshot(ids[0])) == 1000
+    assert server.num_queries == 3
+    assert get_t(reader.query_snapshot(ids[1])) == 2000
+    assert server.num_queries == 4
+
+    statistics = reader.statistics
+    assert (statistics.hits, statistics.misses, statistics.num_entries) == (2, 4, 2)
+
+
+def test_cached_reader_does_not_cache_snapshots_exceeding_the_budget():
+    server = make_server()
+    reader = CachedReader(server, max_bytes=1)
+    for _ in range(2):
+        reader.query_snapshot(entity_id.with_timestamp(1000))
+    assert server.num_queries == 2
+    assert reader.statistics.num_entries == 0
+
+
+def test_cached_reader_invalidates_latest_on_update():
+    server = make_server()
+    listener = FakeListener()
+    reader = CachedReader(server, listener=listener)
+
+    assert get_t(reader.query_snapshot(entity_id)) == 3000
+    assert get_t(reader.query_snapshot(entity_id)) == 3000
+    assert server.num_queries == 1
+    assert len(listener.callbacks) == 1
+
+    # Updates of other entities do not invalidate the entry.
+    listener.update(entity_id.with_entity_name("other"))
+    reader.query_snapshot(entity_id)
+    assert server.num_queries == 1
+
+    commit(server, 4000)
+    listener.update(entity_id.with_timestamp(4000))
+    assert reader.statistics.invalidations == 1
+    assert get_t(reader.query_snapshot(entity_id)) == 4000
+    assert server.num_queries == 2
+
+    # The snapshot at 3000 is still cached by its timestamp.
+    assert get_t(reader.query_snapshot(entity_id.with_timestamp(3000))) == 3000
+    assert server.num_queries == 2
+
+
+def test_cached_reader_invalidates_latest_memory_on_update():
+    server = make_server()
+    listener = FakeListener()
+    reader = CachedReader(server, listener=listener)
+    segment_id = MemoryID("Memory", "Core")
+
+    reader.query_latest(segment_id)
+    reader.query_latest(segment_id)
+    assert server.num_queries == 1
+
+    reader.invalidate(entity_id)
+    reader.query_latest(segment_id)
+    assert server.num_queries == 2
+
+
+def test_cached_reader_does_not_cache_results_of_queries_racing_updates():
+    server = make_server()
+    listener = FakeListener()
+    reader = CachedReader(server, listener=listener)
+
+    def update_during_query():
+        server.during_query = None
+        commit(server, 4000)
+        listener.update(entity_id.with_timestamp(4000))
+
+    # The result of the query is outdated when it arrives.
+    server.during_query = update_during_query
+    assert get_t(reader.query_snapshot(entity_id)) == 3000
+    assert reader.statistics.num_entries == 1  # Only the exact snapshot at 3000.
+
+    assert get_t(reader.query_snapshot(entity_id)) == 4000
+    assert server.num_queries == 2
+    assert get_t(reader.query_snapshot(entity_id)) == 4000
+    assert server.num_queries == 2
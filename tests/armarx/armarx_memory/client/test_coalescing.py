@@ -0,0 +1,119 @@
+import concurrent.futures
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from armarx_memory.aron.conversion import to_aron
+from armarx_memory.client import Commit, EntityUpdate, Reader, Writer
+from armarx_memory.client.detail.coalescing import SingleFlight, make_fingerprint
+from armarx_memory.core import MemoryID
+from armarx_memory.testing import LocalMemoryServer
+
+
+def run_concurrently(single_flight, keys, fn):
+    """Call `fn` for each key from its own thread while the first call blocks."""
+    release = threading.Event()
+    calls = []
+
+    def blocking_fn(key):
+        calls.append(key)
+        release.wait(timeout=5.0)
+        return fn(key)
+
+    with concurrent.futures.ThreadPoolExecutor(len(keys)) as executor:
+        futures = [
+            executor.submit(single_flight.call, key, lambda key=key: blocking_fn(key))
+            for key in keys
+        ]
+        deadline = time.monotonic() + 5.0
+        while (
+            single_flight.num_calls + single_flight.num_coalesced < len(keys)
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.001)
+        release.set()
+        concurrent.futures.wait(futures)
+    return calls, futures
+
+
+def test_identical_concurrent_calls_run_once():
+    single_flight = SingleFlight()
+    calls, futures = run_concurrently(single_flight, ["query"] * 4, lambda key: object())
+
+    assert calls == ["query"]
+    results = [f.result() for f in futures]
+    assert all(result is results[0] for result in results)
+    assert single_flight.num_coalesced == 3
+
+
+def test_exception_reaches_all_waiters():
+    def fail(key):
+        raise RuntimeError("Query failed.")
+
+    single_flight = SingleFlight()
+    calls, futures = run_concurrently(single_flight, ["query"] * 3, fail)
+
+    assert calls == ["query"]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="Query failed."):
+            future.result()
+
+
+def test_different_fingerprints_do_not_coalesce():
+    single_flight = SingleFlight()
+    keys = [make_fingerprint(SimpleNamespace(name=name)) for name in ["a", "b", "c"]]
+    calls, futures = run_concurrently(single_flight, keys, lambda key: key)
+
+    assert sorted(calls) == sorted(keys)
+    assert [f.result() for f in futures] == keys
+    assert single_flight.num_coalesced == 0
+
+
+def test_fingerprints_of_equal_values_are_equal():
+    a = SimpleNamespace(queries=[SimpleNamespace(name="x", depth=1)], options={"b": 2, "a": 1})
+    b = SimpleNamespace(queries=[SimpleNamespace(depth=1, name="x")], options={"a": 1, "b": 2})
+    assert make_fingerprint(a) == make_fingerprint(b)
+    assert make_fingerprint(a) != make_fingerprint(SimpleNamespace(queries=[], options={}))
+
+
+class BlockingMemoryServer(LocalMemoryServer):
+    """Counts the queries and answers them once released."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.num_queries = 0
+        self.release = threading.Event()
+
+    def query(self, input, c=None):
+        self.num_queries += 1
+        self.release.wait(timeout=5.0)
+        return super().query(input, c)
+
+
+def test_reader_sends_concurrent_identical_queries_once():
+    entity_id = MemoryID("Memory", "Core", "provider", "entity")
+    server = BlockingMemoryServer("Memory")
+    commit = Commit()
+    commit.add(EntityUpdate(entity_id, [to_aron({"value": 1})], referenced_time_usec=1000))
+    Writer(server).commit(commit)
+
+    num_threads = 4
+    reader = Reader(server, coalesce=True)
+    with concurrent.futures.ThreadPoolExecutor(num_threads) as executor:
+        futures = [executor.submit(reader.query_latest, entity_id) for _ in range(num_threads)]
+        deadline = time.monotonic() + 5.0
+        while reader.num_coalesced_queries < num_threads - 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        server.release.set()
+        results = [f.result() for f in futures]
+
+    assert server.num_queries == 1
+    assert reader.num_coalesced_queries == num_threads - 1
+    assert all(result is results[0] for result in results)
+    assert "Core" in results[0].coreSegments
+
+    # Later queries are sent again.
+    reader.query_latest(entity_id)
+    assert server.num_queries == 2
@@ -0,0 +1,41 @@
+from armarx_memory.aron.conversion import to_aron
+from armarx_memory.client import Commit, EntityStream, EntityUpdate, Reader, Writer
+from armarx_memory.core import MemoryID
+from armarx_memory.testing import LocalMemoryServer
+
+entity_id = MemoryID("Memory", "Core", "provider", "entity")
+
+
+class AnnouncingListener:
+    """Announces the given snapshots to each new subscriber."""
+
+    def __init__(self, snapshot_ids):
+        self.snapshot_ids = snapshot_ids
+        self.callbacks = []
+
+    def subscribe(self, subscription_id, callback):
+        self.callbacks.append(callback)
+        callback(subscription_id, self.snapshot_ids)
+
+    def unsubscribe(self, subscription_id, callback):
+        self.callbacks.remove(callback)
+
+
+def test_stream_can_be_listened_to_again_after_stop():
+    server = LocalMemoryServer("Memory")
+    commit = Commit()
+    commit.add(EntityUpdate(entity_id, [to_aron({"value": 1})], referenced_time_usec=1000))
+    Writer(server).commit(commit)
+
+    reader = Reader(server)
+    listener = AnnouncingListener([entity_id.with_timestamp(1000)])
+    stream = EntityStream()
+
+    for _ in range(2):
+        snapshots = stream.listen(reader, listener, entity_id)
+        snapshot = next(snapshots)
+        assert snapshot.timestamp_usec == 1000
+        assert snapshot.instances_data == [{"value": 1}]
+        stream.stop()
+        snapshots.close()
+        assert listener.callbacks == []
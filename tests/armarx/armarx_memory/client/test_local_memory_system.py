@@ -0,0 +1,51 @@
+import queue
+
+from armarx_core import ice_manager
+from armarx_memory.aron.conversion import from_aron, to_aron
+from armarx_memory.client import Commit, EntityUpdate, MemoryListener
+from armarx_memory.core import MemoryID
+from armarx_memory.testing import LocalMemorySystem
+
+entity_id = MemoryID("Example", "Core", "provider", "entity")
+
+
+def test_write_notify_and_read_round_trip():
+    with LocalMemorySystem() as system:
+        system.add_memory("Example")
+        mns = system.get_mns()
+        writer = mns.wait_for_writer(entity_id)
+        reader = mns.wait_for_reader(entity_id)
+
+        listener = MemoryListener(register=False)
+        system.add_listener(listener)
+        received = queue.Queue()
+        listener.subscribe(entity_id, lambda subscription_id, ids: received.put(ids))
+
+        commit = Commit()
+        commit.add(EntityUpdate(entity_id, [to_aron({"value": 1})], referenced_time_usec=1000))
+        result = writer.commit(commit)
+        assert result.results[0].success
+
+        updated_ids = received.get(timeout=5.0)
+        assert [i.timestamp_usec for i in updated_ids] == [1000]
+
+        snapshot = reader.query_snapshot(entity_id.with_timestamp(1000))
+        assert from_aron(snapshot.instances[0].data) == {"value": 1}
+
+
+def test_listener_uses_topics_of_subscriptions_made_before_registering(monkeypatch):
+    used_topics = []
+    monkeypatch.setattr(ice_manager, "register_object", lambda obj, name: "proxy")
+    monkeypatch.setattr(
+        ice_manager,
+        "using_topic",
+        lambda proxy, topic_name: used_topics.append((proxy, topic_name)),
+    )
+
+    listener = MemoryListener(register=False)
+    listener.subscribe(entity_id, lambda subscription_id, ids: None)
+    listener.subscribe(MemoryID("Example", "Other"), lambda subscription_id, ids: None)
+    assert used_topics == []
+
+    listener.register()
+    assert used_topics == [("proxy", "MemoryUpdates.Example")]
@@ -0,0 +1,142 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+from armarx_memory.client import MemoryListener
+from armarx_memory.core import MemoryID
+
+entity_id = MemoryID("Memory", "Core", "provider", "entity")
+
+
+def wait_until(predicate, timeout=5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def test_listener_routes_updates_to_containing_subscriptions():
+    listener = MemoryListener(register=False)
+    received = {}
+
+    subscribed_ids = [
+        MemoryID("Memory"),
+        MemoryID("Memory", "Core"),
+        MemoryID("Memory", "Other"),
+        MemoryID("Memory", "Core", "provider"),
+        entity_id,
+        entity_id.with_timestamp(1000),
+        entity_id.with_entity_name("other"),
+        MemoryID("Other"),
+    ]
+    for subscribed_id in subscribed_ids:
+        listener.subscribe(
+            subscribed_id,
+            lambda subscription_id, ids: received.setdefault(subscription_id, []).append(ids),
+        )
+
+    listener.updated([entity_id.with_timestamp(1000), entity_id.with_timestamp(2000)])
+
+    both = [[entity_id.with_timestamp(1000), entity_id.with_timestamp(2000)]]
+    assert received == {
+        MemoryID("Memory"): both,
+        MemoryID("Memory", "Core"): both,
+        MemoryID("Memory", "Core", "provider"): both,
+        entity_id: both,
+        entity_id.with_timestamp(1000): [[entity_id.with_timestamp(1000)]],
+    }
+    assert listener.statistics()[entity_id].num_dispatched == 1
+    assert listener.statistics()[MemoryID("Other")].num_dispatched == 0
+
+
+def test_listener_unsubscribe_prunes_the_trie():
+    listener = MemoryListener(register=False)
+    received = []
+
+    def callback(subscription_id, ids):
+        received.append(subscription_id)
+
+    listener.subscribe(entity_id, callback)
+    listener.subscribe(MemoryID("Memory"), callback)
+    listener.unsubscribe(entity_id, callback)
+    assert entity_id not in listener.subscriptions
+    assert list(listener.statistics()) == [MemoryID("Memory")]
+
+    listener.updated([entity_id.with_timestamp(1000)])
+    assert received == [MemoryID("Memory")]
+
+
+def check_ordered_dispatch(listener: MemoryListener, make_callback):
+    num_updates = 20
+    received = {entity_id: [], MemoryID("Memory"): []}
+    active = {entity_id: 0, MemoryID("Memory"): 0}
+    overlaps = []
+
+    for subscription_id in received:
+        listener.subscribe(subscription_id, make_callback(received, active, overlaps))
+    # A failing callback does not stop the other callbacks.
+    listener.subscribe(entity_id, lambda subscription_id, ids: 1 / 0)
+
+    for t in range(num_updates):
+        listener.updated([entity_id.with_timestamp(t)])
+
+    assert wait_until(
+        lambda: all(
+            stats.num_dispatched == num_updates for stats in listener.statistics().values()
+        )
+    )
+    for ids in received.values():
+        assert [i[0].timestamp_usec for i in ids] == list(range(num_updates))
+    assert not overlaps
+
+    statistics = listener.statistics()
+    assert statistics[entity_id].num_errors == num_updates
+    assert statistics[MemoryID("Memory")].num_errors == 0
+    assert all(stats.queue_depth == 0 for stats in statistics.values())
+    assert statistics[entity_id].max_queue_depth >= 1
+
+
+def test_listener_dispatches_in_order_through_executor():
+    def make_callback(received, active, overlaps):
+        lock = threading.Lock()
+
+        def callback(subscription_id, ids):
+            with lock:
+                active[subscription_id] += 1
+                if active[subscription_id] > 1:
+                    overlaps.append(subscription_id)
+            time.sleep(0.001)
+            received[subscription_id].append(ids)
+            with lock:
+                active[subscription_id] -= 1
+
+        return callback
+
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        check_ordered_dispatch(MemoryListener(register=False, executor=executor), make_callback)
+
+
+def test_listener_dispatches_in_order_through_loop():
+    def make_callback(received, active, overlaps):
+        async def callback(subscription_id, ids):
+            active[subscription_id] += 1
+            if active[subscription_id] > 1:
+                overlaps.append(subscription_id)
+            await asyncio.sleep(0.001)
+            received[subscription_id].append(ids)
+            active[subscription_id] -= 1
+
+        return callback
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    try:
+        check_ordered_dispatch(MemoryListener(register=False, loop=loop), make_callback)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
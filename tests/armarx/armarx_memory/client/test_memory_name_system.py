@@ -0,0 +1,174 @@
+import sys
+import threading
+import time
+import types
+
+import Ice
+import pytest
+
+from armarx import armem
+
+from armarx_memory.aron.conversion import to_aron
+from armarx_memory.client import Commit, EntityUpdate, MemoryNameSystem, Writer
+from armarx_memory.core import MemoryID, error as armem_error
+from armarx_memory.testing import LocalMemoryServer, LocalMemorySystem
+from armarx_memory.testing.LocalMemoryNameSystem import LocalMemoryNameSystem
+
+
+class HangingMemoryServer(LocalMemoryServer):
+    """A memory server which does not answer queries until it is shut down."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._futures = []
+        self._futures_lock = threading.Lock()
+
+    def query(self, input, c=None):
+        future = Ice.Future()
+        with self._futures_lock:
+            self._futures.append(future)
+        return future
+
+    def shutdown(self):
+        with self._futures_lock:
+            futures, self._futures = self._futures, []
+        for future in futures:
+            future.set_result(armem.query.data.Result(success=False, errorMessage="Shut down."))
+        super().shutdown()
+
+
+def snapshot_id(memory_name: str) -> MemoryID:
+    return MemoryID(memory_name, "Core", "provider", "entity", 1000)
+
+
+def test_resolve_entity_snapshots_does_not_wait_for_hanging_servers():
+    with LocalMemorySystem() as system:
+        fast = system.add_memory("Fast")
+        for name in ("Hanging1", "Hanging2"):
+            system.add_server(HangingMemoryServer(name))
+        commit = Commit()
+        commit.add(
+            EntityUpdate(snapshot_id("Fast"), [to_aron({"value": 1})], referenced_time_usec=1000)
+        )
+        Writer(fast).commit(commit)
+
+        ids = [snapshot_id(name) for name in ("Hanging1", "Hanging2", "Fast")]
+        start = time.monotonic()
+        resolution = system.get_mns().resolve_entity_snapshots_detailed(ids, timeout_seconds=0.2)
+
+        assert time.monotonic() - start < 5.0
+        assert list(resolution.snapshots) == [snapshot_id("Fast")]
+        assert set(resolution.errors) == {"Hanging1", "Hanging2"}
+        assert all(isinstance(e, Ice.TimeoutException) for e in resolution.errors.values())
+
+
+class CountingMemoryNameSystem(LocalMemoryNameSystem):
+    """A memory name system servant, used directly as proxy, counting the updates."""
+
+    def __init__(self, names=()):
+        super().__init__()
+        self.num_updates = 0
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str):
+        self.register(
+            name, armem.mns.dto.MemoryServerInterfaces(reading=f"{name}Reading", writing=None)
+        )
+
+    def getAllRegisteredServers(self, c=None):
+        self.num_updates += 1
+        return super().getAllRegisteredServers(c)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the monotonic clock of the MemoryNameSystem by a manual one."""
+    clock = types.SimpleNamespace(now=100.0)
+    clock.monotonic = lambda: clock.now
+    monkeypatch.setattr(sys.modules[MemoryNameSystem.__module__], "time", clock)
+    return clock
+
+
+def test_resolved_servers_expire_after_ttl(clock):
+    servant = CountingMemoryNameSystem(["Robot"])
+    mns = MemoryNameSystem(servant, ttl_seconds=10.0)
+
+    assert mns.resolve_server(MemoryID("Robot")).reading == "RobotReading"
+    clock.now += 5.0
+    mns.resolve_server(MemoryID("Robot"))
+    assert servant.num_updates == 1
+
+    clock.now += 6.0
+    assert mns.get_cached_server(MemoryID("Robot")) is None
+    mns.resolve_server(MemoryID("Robot"))
+    assert servant.num_updates == 2
+
+    # Without a TTL, servers are cached until they are invalidated.
+    mns = MemoryNameSystem(servant)
+    mns.resolve_server(MemoryID("Robot"))
+    clock.now += 1e6
+    mns.resolve_server(MemoryID("Robot"))
+    assert servant.num_updates == 3
+
+
+def test_missing_servers_are_cached_negatively(clock):
+    servant = CountingMemoryNameSystem()
+    mns = MemoryNameSystem(servant, negative_ttl_seconds=1.0)
+
+    for _ in range(3):
+        with pytest.raises(armem_error.CouldNotResolveMemoryServer):
+            mns.resolve_server(MemoryID("Robot"))
+    assert servant.num_updates == 1
+    assert mns.is_known_missing(MemoryID("Robot"))
+
+    # Registered in the meantime, but still reported missing until the entry expires.
+    servant.add("Robot")
+    clock.now += 0.5
+    with pytest.raises(armem_error.CouldNotResolveMemoryServer):
+        mns.resolve_server(MemoryID("Robot"))
+    clock.now += 1.0
+    assert mns.resolve_server(MemoryID("Robot")).reading == "RobotReading"
+    assert servant.num_updates == 2
+    assert not mns.is_known_missing(MemoryID("Robot"))
+
+
+def test_servers_are_invalidated_on_connection_errors(clock):
+    servant = CountingMemoryNameSystem(["Robot", "Object"])
+    mns = MemoryNameSystem(servant)
+    mns.prewarm([MemoryID("Robot"), MemoryID("Object", "Core")])
+    assert servant.num_updates == 1
+
+    with pytest.raises(ValueError):
+        with mns.invalidating(MemoryID("Robot", "Core")):
+            raise ValueError("Not an Ice error.")
+    assert mns.get_cached_server(MemoryID("Robot")) is not None
+
+    with pytest.raises(Ice.ConnectFailedException):
+        with mns.invalidating(MemoryID("Robot", "Core")):
+            raise Ice.ConnectFailedException()
+    assert mns.get_cached_server(MemoryID("Robot")) is None
+    assert mns.get_cached_server(MemoryID("Object")) is not None
+
+    mns.resolve_server(MemoryID("Robot"))
+    assert servant.num_updates == 2
+
+    mns.invalidate()
+    assert mns.get_cached_server(MemoryID("Object")) is None
+
+
+def test_prewarm_updates_once():
+    servant = CountingMemoryNameSystem(["Robot", "Object"])
+    mns = MemoryNameSystem(servant)
+
+    servers = mns.prewarm([MemoryID("Robot"), MemoryID("Object"), MemoryID("Missing")])
+    assert set(servers) == {"Robot", "Object"}
+    assert servant.num_updates == 1
+
+    mns.prewarm([MemoryID("Robot"), MemoryID("Object")])
+    assert servant.num_updates == 1
+
+    # Waits for servers registered later.
+    threading.Timer(0.05, servant.add, ["Missing"]).start()
+    servers = mns.prewarm([MemoryID("Missing")], wait=True)
+    assert servers["Missing"].reading == "MissingReading"
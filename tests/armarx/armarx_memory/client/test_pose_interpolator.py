@@ -0,0 +1,28 @@
+import numpy as np
+
+from armarx_memory.aron.conversion import to_aron
+from armarx_memory.client import Commit, EntityUpdate, PoseInterpolator, Reader, Writer
+from armarx_memory.core import MemoryID
+from armarx_memory.testing import LocalMemoryServer
+
+entity_id = MemoryID("Memory", "Core", "provider", "entity")
+
+
+def make_pose(x: float) -> np.ndarray:
+    pose = np.eye(4, dtype=np.float32)
+    pose[0, 3] = x
+    return pose
+
+
+def test_interpolates_beyond_the_prefetch_window():
+    server = LocalMemoryServer("Memory")
+    commit = Commit()
+    for t, x in [(1000000, 0.0), (10000000, 90.0), (20000000, 190.0)]:
+        commit.add(EntityUpdate(entity_id, [to_aron({"pose": make_pose(x)})], referenced_time_usec=t))
+    Writer(server).commit(commit)
+
+    interpolator = PoseInterpolator(Reader(server), entity_id, prefetch_usec=1000000)
+    pose = interpolator.pose_at(5500000)
+    assert np.isclose(pose[0, 3], 45.0)
+    # Only the next snapshot is fetched beyond the prefetched range.
+    assert list(interpolator._timestamps) == [1000000, 10000000]
@@ -0,0 +1,48 @@
+from armarx_memory.aron.conversion import to_aron
+from armarx_memory.client import Commit, EntityUpdate, Reader, SnapshotSelector, Writer
+from armarx_memory.core import MemoryID
+from armarx_memory.testing import LocalMemoryServer
+
+entity_id = MemoryID("Memory", "Core", "provider", "entity")
+timestamps = [1000, 2000, 3000, 4000, 5000]
+
+
+def make_reader() -> Reader:
+    server = LocalMemoryServer("Memory")
+    commit = Commit()
+    for t in timestamps:
+        commit.add(EntityUpdate(entity_id, [to_aron({"t": t})], referenced_time_usec=t))
+    Writer(server).commit(commit)
+    return Reader(server)
+
+
+def test_query_snapshots_after():
+    reader = make_reader()
+    selectors = [
+        SnapshotSelector.after(entity_id, 2000),
+        SnapshotSelector.after(entity_id, 2001),
+        SnapshotSelector.after(entity_id, 5001),
+    ]
+    snapshots = reader.query_snapshots(selectors)
+    assert snapshots[selectors[0]].id.timestamp.timeSinceEpoch.microSeconds == 2000
+    assert snapshots[selectors[1]].id.timestamp.timeSinceEpoch.microSeconds == 3000
+    assert selectors[2] not in snapshots
+
+
+def test_after_query_does_not_fetch_later_history():
+    reader = make_reader()
+    memory = reader.query(reader.make_snapshots_queries([SnapshotSelector.after(entity_id, 1500)]))
+    entity = Reader._get_entity(memory, ("Core", "provider", "entity"))
+    assert len(entity.history) <= 2
+
+
+def test_timestamp_zero_is_not_taken_as_unset():
+    reader = make_reader()
+
+    # A time range ending at 0 contains no snapshots, while -1 means unlimited.
+    assert len(reader.query_time_series(entity_id, [], start_usec=0, end_usec=0)) == 0
+    assert len(reader.query_time_series(entity_id, [], start_usec=0, end_usec=-1)) == 5
+    assert len(reader.query_time_series(entity_id, [], start_usec=-1, end_usec=2000)) == 2
+
+    before = SnapshotSelector.before(entity_id, 0)
+    assert before not in reader.query_snapshots([before])
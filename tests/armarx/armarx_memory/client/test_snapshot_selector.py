@@ -0,0 +1,62 @@
+from collections import namedtuple
+from types import SimpleNamespace
+
+from armarx_memory.core import MemoryID
+from armarx_memory.client.SnapshotSelector import SnapshotIndex, SnapshotSelector
+
+entity_id = MemoryID("Memory", "Core", "provider", "entity")
+
+# Stand-ins of the (hashable) Ice time types used as history keys.
+DateTime = namedtuple("DateTime", ["timeSinceEpoch"])
+Duration = namedtuple("Duration", ["microSeconds"])
+
+
+def make_entity(timestamps):
+    # Insert in unsorted order, as the history of a query result is unordered.
+    history = {
+        DateTime(Duration(t)): f"snapshot_{t}"
+        for t in reversed(timestamps)
+    }
+    return SimpleNamespace(history=history)
+
+
+def select(selector, timestamps=(10, 20, 30)):
+    return selector.select(SnapshotIndex(make_entity(list(timestamps))))
+
+
+def test_exact():
+    snapshot_id = MemoryID("Memory", "Core", "provider", "entity", 20)
+    assert select(SnapshotSelector.exact(snapshot_id)) == "snapshot_20"
+    assert select(SnapshotSelector.exact(snapshot_id.with_timestamp(25))) is None
+
+
+def test_nth_latest():
+    assert select(SnapshotSelector.latest(entity_id)) == "snapshot_30"
+    assert select(SnapshotSelector.nth_latest(entity_id, 1)) == "snapshot_30"
+    assert select(SnapshotSelector.nth_latest(entity_id, 3)) == "snapshot_10"
+    assert select(SnapshotSelector.nth_latest(entity_id, 4)) is None
+
+
+def test_before_includes_boundary():
+    assert select(SnapshotSelector.before(entity_id, 20)) == "snapshot_20"
+    assert select(SnapshotSelector.before(entity_id, 29)) == "snapshot_20"
+    assert select(SnapshotSelector.before(entity_id, 100)) == "snapshot_30"
+    assert select(SnapshotSelector.before(entity_id, 9)) is None
+
+
+def test_after_includes_boundary():
+    assert select(SnapshotSelector.after(entity_id, 20)) == "snapshot_20"
+    assert select(SnapshotSelector.after(entity_id, 11)) == "snapshot_20"
+    assert select(SnapshotSelector.after(entity_id, 0)) == "snapshot_10"
+    assert select(SnapshotSelector.after(entity_id, 31)) is None
+
+
+def test_empty_history():
+    for selector in [
+        SnapshotSelector.exact(entity_id.with_timestamp(10)),
+        SnapshotSelector.latest(entity_id),
+        SnapshotSelector.nth_latest(entity_id, 2),
+        SnapshotSelector.before(entity_id, 10),
+        SnapshotSelector.after(entity_id, 10),
+    ]:
+        assert select(selector, timestamps=()) is None
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from armarx_memory.aron.conversion import to_aron
+from armarx_memory.client import Commit, EntityUpdate, Reader, TimeSeries, Writer
+from armarx_memory.core import MemoryID
+from armarx_memory.testing import LocalMemoryServer
+
+entity_id = MemoryID("Memory", "Core", "provider", "entity")
+
+
+def make_reader(data_by_time) -> Reader:
+    server = LocalMemoryServer("Memory")
+    commit = Commit()
+    for t, data in data_by_time.items():
+        commit.add(EntityUpdate(entity_id, [to_aron(data)], referenced_time_usec=t))
+    Writer(server).commit(commit)
+    return Reader(server)
+
+
+def query_entity(reader: Reader):
+    memory = reader.query(reader.make_queries(entity_id))
+    return Reader._get_entity(memory, Reader._get_entity_key(entity_id))
+
+
+def test_time_series_from_entity():
+    reader = make_reader(
+        {
+            3000: {"confidence": np.float64(0.3), "count": 3, "pose": {"position": np.full(3, 3.0)}},
+            1000: {"confidence": np.float64(0.1), "count": 1, "pose": {"position": np.full(3, 1.0)}},
+            2000: {"confidence": np.float64(0.2), "count": 2, "pose": {"position": np.full(3, 2.0)}},
+        }
+    )
+    series = TimeSeries.from_entity(query_entity(reader), ["confidence", "count", "pose.position"])
+
+    assert len(series) == 3
+    assert series.timestamps_usec.tolist() == [1000, 2000, 3000]
+    assert np.allclose(series["confidence"], [0.1, 0.2, 0.3])
+    assert series["count"].tolist() == [1, 2, 3]
+    assert np.issubdtype(series["count"].dtype, np.integer)
+    assert series["pose.position"].shape == (3, 3)
+    assert np.allclose(series["pose.position"][:, 0], [1.0, 2.0, 3.0])
+
+    part = series.slice(1500, 3000)
+    assert part.timestamps_usec.tolist() == [2000, 3000]
+    assert part["count"].tolist() == [2, 3]
+
+
+def test_time_series_fills_missing_floats_with_nan():
+    reader = make_reader(
+        {
+            1000: {"confidence": np.float64(0.1), "count": 1},
+            2000: {"count": 2},
+            3000: {"confidence": np.float64(0.3), "count": 3},
+        }
+    )
+    entity = query_entity(reader)
+    series = TimeSeries.from_entity(entity, ["confidence", "unknown"])
+
+    assert np.allclose(series["confidence"], [0.1, np.nan, 0.3], equal_nan=True)
+    assert np.isnan(series["unknown"]).all() and len(series["unknown"]) == 3
+
+    # Queried via the reader.
+    series = reader.query_time_series(entity_id, ["confidence"], start_usec=2000)
+    assert series.timestamps_usec.tolist() == [2000, 3000]
+    assert np.isnan(series["confidence"][0])
+
+
+def test_time_series_rejects_missing_values_of_other_types():
+    reader = make_reader(
+        {
+            1000: {"count": 1, "position": np.zeros(3)},
+            2000: {"position": np.zeros(3)},
+            3000: {"count": 3, "position": np.zeros(2)},
+        }
+    )
+    entity = query_entity(reader)
+
+    with pytest.raises(ValueError, match="'count' .* missing in 1 of 3 snapshots"):
+        TimeSeries.from_entity(entity, ["count"])
+    with pytest.raises(ValueError, match="'position' has shape"):
+        TimeSeries.from_entity(entity, ["position"])
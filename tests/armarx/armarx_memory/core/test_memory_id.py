@@ -0,0 +1,57 @@
+import copy
+
+from armarx_memory.core import MemoryID
+
+
+def test_memory_id_interns_names():
+    name = "".join(["Ro", "bot", "State"])
+    a = MemoryID(name, "Proprioception")
+    b = MemoryID.from_string("RobotState/Proprioception")
+
+    assert a.memory_name is b.memory_name
+    assert a.core_segment_name is b.core_segment_name
+    assert a.with_entity_name("".join(["Arm", "ar6"])).entity_name is (
+        b.with_entity_name("Armar6").entity_name
+    )
+
+
+def test_memory_id_hash_and_eq_after_modification():
+    a = MemoryID("Memory", "Core", "Provider", "Entity", 10, 0)
+    b = copy.copy(a)
+    assert a == b and hash(a) == hash(b)
+
+    b.entity_name = "Other"
+    assert a != b
+    assert b == MemoryID("Memory", "Core", "Provider", "Other", 10, 0)
+    assert hash(b) == hash(MemoryID("Memory", "Core", "Provider", "Other", 10, 0))
+
+    b.set_entity_id(a)
+    assert a == b and hash(a) == hash(b)
+    assert {a: 1}[b] == 1
+
+
+def test_memory_id_with_functions_do_not_modify_the_id():
+    a = MemoryID("Memory", "Core", "Provider", "Entity", 10, 0)
+    hash(a)
+
+    b = a.with_timestamp(20).with_instance_index(1)
+    assert (a.timestamp_usec, a.instance_index) == (10, 0)
+    assert (b.timestamp_usec, b.instance_index) == (20, 1)
+    assert a != b
+    assert b == MemoryID("Memory", "Core", "Provider", "Entity", 20, 1)
+
+
+def test_memory_id_to_ice_returns_copies():
+    a = MemoryID("Memory", "Core", "Provider", "Entity", 10, 0)
+
+    dto = a.to_ice()
+    dto.entityName = "Modified"
+    dto.timestamp.timeSinceEpoch.microSeconds = 20
+
+    dto = a.to_ice()
+    assert dto.entityName == "Entity"
+    assert dto.timestamp.timeSinceEpoch.microSeconds == 10
+    assert MemoryID.from_ice(dto) == a
+
+    a.instance_index = 1
+    assert a.to_ice().instanceIndex == 1
@@ -0,0 +1,46 @@
+import numpy as np
+
+from armarx_memory.aron.aron_ice_types import AronIceTypes
+from armarx_memory.aron.conversion import from_aron, to_aron
+from armarx_memory.recording import aron_binary
+
+
+def encode_decode(data):
+    arrays = bytearray()
+
+    def store_array(array_data: bytes) -> int:
+        offset = len(arrays)
+        arrays.extend(array_data)
+        return offset
+
+    def load_array(offset: int, size: int) -> bytes:
+        return bytes(arrays[offset : offset + size])
+
+    encoded = aron_binary.encode(data, store_array)
+    decoded, end = aron_binary.decode(bytes(encoded), load_array)
+    assert end == len(encoded)
+    return decoded
+
+
+def test_primitives_and_containers():
+    data = to_aron(
+        {
+            "name": "object",
+            "confidence": 0.5,
+            "count": 3,
+            "valid": True,
+            "names": ["a", "b"],
+        }
+    )
+    assert from_aron(encode_decode(data)) == from_aron(data)
+
+
+def test_ndarray():
+    array = np.arange(12, dtype=np.float32).reshape(3, 4)
+    decoded = from_aron(encode_decode(to_aron({"array": array})))
+    assert np.array_equal(decoded["array"], array)
+
+
+def test_none():
+    data = AronIceTypes.dict({"none": None})
+    assert encode_decode(data).elements["none"] is None
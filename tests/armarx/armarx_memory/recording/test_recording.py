@@ -0,0 +1,66 @@
+import numpy as np
+
+from armarx_memory.aron.conversion import from_aron, to_aron
+from armarx_memory.client import Commit, EntityUpdate, Reader, Writer
+from armarx_memory.core import MemoryID
+from armarx_memory.recording.MemoryRecorder import MemoryRecorder
+from armarx_memory.recording.Recording import RecordedUpdate, RecordingReader, RecordingWriter
+from armarx_memory.testing import LocalMemoryServer
+
+entity_a = MemoryID("Memory", "Core", "provider", "a")
+entity_b = MemoryID("Memory", "Core", "provider", "b")
+
+
+def test_round_trip_with_chunk_rollover(tmp_path):
+    arrays = [np.full((4, 4), i, dtype=np.float32) for i in range(5)]
+    # Written out of time order, alternating between entities.
+    times = [3000, 1000, 5000, 2000, 4000]
+
+    with RecordingWriter(str(tmp_path), chunk_size_bytes=1) as writer:
+        for i, t in enumerate(times):
+            writer.write(
+                RecordedUpdate(
+                    entity_id=entity_a if i % 2 == 0 else entity_b,
+                    referenced_time_usec=t,
+                    instances_data=[to_aron({"index": i, "array": arrays[i]})],
+                    confidence=0.5,
+                )
+            )
+        # Each record starts a new chunk.
+        assert len(writer.chunks) == len(times) + 1
+
+    with RecordingReader(str(tmp_path)) as recording:
+        assert len(recording) == len(times)
+        assert (recording.start_usec, recording.end_usec) == (1000, 5000)
+
+        updates = list(recording)
+        assert [u.referenced_time_usec for u in updates] == sorted(times)
+        for update in updates:
+            data = from_aron(update.instances_data[0])
+            i = data["index"]
+            assert update.referenced_time_usec == times[i]
+            assert update.entity_id == (entity_a if i % 2 == 0 else entity_b)
+            assert update.confidence == 0.5
+            assert np.array_equal(data["array"], arrays[i])
+
+        selected = list(recording.updates(start_usec=2000, end_usec=4000, memory_id=entity_b))
+        assert [u.referenced_time_usec for u in selected] == [2000]
+
+
+def test_recorder_records_unordered_query_results(tmp_path):
+    server = LocalMemoryServer("Memory")
+    commit = Commit()
+    for t in [1000, 2000, 3000]:
+        commit.add(EntityUpdate(entity_a, [to_aron({"t": t})], referenced_time_usec=t))
+    Writer(server).commit(commit)
+
+    memory = Reader(server).query_all()
+    entity = memory.coreSegments["Core"].providerSegments["provider"].entities["a"]
+    entity.history = dict(reversed(list(entity.history.items())))
+
+    with MemoryRecorder(str(tmp_path / "recording")) as recorder:
+        recorder.record_memory(memory)
+        recorder.record_memory(memory)  # Already recorded.
+
+    with RecordingReader(str(tmp_path / "recording")) as recording:
+        assert [u.referenced_time_usec for u in recording] == [1000, 2000, 3000]
@@ -0,0 +1,181 @@
+import threading
+import time
+
+import numpy as np
+
+import armarx_core.arviz as viz
+from armarx_core.arviz.testing import LocalArVizStorage
+
+
+class ControlledStorage(LocalArVizStorage):
+    """Records the time of each commit, and can block or fail commits."""
+
+    def __init__(self):
+        super().__init__(measure_payload_size=False)
+        self.commit_times = []
+        self.fail = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def commitAndReceiveInteractions(self, input, c=None):
+        self.release.wait()
+        if self.fail:
+            raise ConnectionError("Storage unreachable.")
+        self.commit_times.append(time.monotonic())
+        return super().commitAndReceiveInteractions(input, c)
+
+
+def make_client(storage):
+    return viz.Client("Component", storage=storage)
+
+
+def test_async_committer_sends_newest_update_per_layer():
+    storage = ControlledStorage()
+    client = make_client(storage)
+    a = client.layer("a")
+    a.add(viz.Box("box"))
+    b = client.layer("b")
+
+    committer = viz.AsyncCommitter(client, start=False)
+    for x in range(3):
+        a.elements[0].position = (x, 0, 0)
+        committer.commit(a)
+    committer.commit(b)
+    committer.start()
+    assert committer.flush(timeout=5.0)
+    committer.close()
+
+    assert [stats.num_layers for stats in storage.commits] == [2]
+    assert storage.layers[("Component", "a")].elements[0].pose.x == 2
+    assert (committer.num_commits, committer.num_sent) == (4, 1)
+
+
+def test_async_committer_limits_rate():
+    storage = ControlledStorage()
+    client = make_client(storage)
+    layer = client.layer("layer")
+
+    with client.start_async(max_rate_hz=20.0) as committer:
+        for _ in range(3):
+            committer.commit(layer)
+            assert committer.flush(timeout=5.0)
+
+    assert len(storage.commit_times) == 3
+    assert (np.diff(storage.commit_times) >= 0.05 - 1e-3).all()
+
+
+def test_async_committer_flush_and_close():
+    storage = ControlledStorage()
+    storage.release.clear()
+    client = make_client(storage)
+
+    committer = client.start_async(max_rate_hz=None)
+    committer.commit(client.layer("a"))
+    assert not committer.flush(timeout=0.05)
+
+    storage.release.set()
+    assert committer.flush(timeout=5.0)
+    committer.commit(client.layer("b"))
+    committer.close()
+
+    assert committer.num_sent == 2
+    assert ("Component", "b") in storage.layers
+
+
+def test_async_committer_counts_dropped_interactions():
+    storage = ControlledStorage()
+    client = make_client(storage)
+    stage = client.begin_stage(commit_on_exit=False)
+    layer = stage.layer("interactive")
+    layer.add(viz.Box("box").enable_interaction(selection=True))
+    stage.request_interaction(layer)
+
+    for _ in range(3):
+        storage.add_interaction("Component", "interactive", "box")
+
+    with viz.AsyncCommitter(client, max_queued_interactions=1) as committer:
+        committer.commit(stage)
+        assert committer.flush(timeout=5.0)
+
+    assert committer.interactions.qsize() == 1
+    assert committer.interactions.get().element == "box"
+    assert committer.num_dropped_interactions == 2
+
+
+def test_async_committer_continues_after_errors():
+    storage = ControlledStorage()
+    storage.fail = True
+    client = make_client(storage)
+    results = []
+
+    with client.start_async(max_rate_hz=None, on_result=results.append) as committer:
+        committer.commit(client.layer("a"))
+        assert committer.flush(timeout=5.0)
+        assert (committer.num_errors, committer.num_sent) == (1, 0)
+
+        storage.fail = False
+        committer.commit(client.layer("a"))
+        assert committer.flush(timeout=5.0)
+
+    assert (committer.num_errors, committer.num_sent) == (1, 1)
+    assert len(results) == 1
+
+
+def test_async_committer_elements_may_be_modified_after_commit():
+    storage = ControlledStorage()
+    client = make_client(storage)
+    layer = client.layer("layer")
+    cloud = viz.PointCloud("cloud", points=np.zeros((3, 3)))
+    box = viz.Box("box").enable_interaction(selection=True)
+    layer.add(cloud)
+    layer.add(box)
+
+    committer = viz.AsyncCommitter(client, start=False)
+    committer.commit(layer)
+    cloud.points[:, 0] = 1.0
+    cloud.point_positions = np.full((3, 3), 2.0)
+    box.enable_interaction(context_menu_options=["Option"])
+    committer.start()
+    committer.close()
+
+    cloud_data, box_data = storage.layers[("Component", "layer")].elements
+    assert np.array_equal(cloud_data.points["position"], np.zeros((3, 3)))
+    assert box_data.interaction.contextMenuOptions == []
+
+
+def test_async_committer_sends_commits_without_layer_updates():
+    storage = ControlledStorage()
+    client = make_client(storage)
+    stage = client.begin_stage(commit_on_exit=False)
+    stage.request_interaction(client.layer("interactive"))
+    storage.add_interaction("Component", "interactive", "box")
+
+    with viz.AsyncCommitter(client, max_rate_hz=None) as committer:
+        committer.commit(stage)
+        assert committer.flush(timeout=5.0)
+        assert committer.num_sent == 1
+        assert committer.interactions.get_nowait().element == "box"
+
+        committer.commit(None, full_resync=True)
+        assert committer.flush(timeout=5.0)
+        assert committer.num_sent == 2
+
+    assert storage.num_commits == 2
+
+
+def test_async_committer_flush_fails_when_not_running():
+    storage = ControlledStorage()
+    client = make_client(storage)
+
+    committer = viz.AsyncCommitter(client, start=False)
+    assert committer.flush(timeout=0.0)
+
+    committer.commit(client.layer("a"))
+    assert not committer.flush()
+    committer.start()
+    assert committer.flush(timeout=5.0)
+    committer.close()
+
+    committer.commit(client.layer("b"))
+    assert not committer.flush()
+    assert ("Component", "b") not in storage.layers
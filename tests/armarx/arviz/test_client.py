@@ -0,0 +1,75 @@
+import pytest
+
+import armarx_core.arviz as viz
+from armarx_core.arviz.testing import LocalArVizStorage
+
+
+class FailingStorage(LocalArVizStorage):
+    def __init__(self):
+        super().__init__(measure_payload_size=False)
+        self.fail = False
+
+    def commitAndReceiveInteractions(self, input, c=None):
+        if self.fail:
+            raise ConnectionError("Storage unreachable.")
+        return super().commitAndReceiveInteractions(input, c)
+
+
+def make_layers():
+    return [viz.Layer("Component", name, [viz.Box("box")]) for name in ("a", "b")]
+
+
+def test_delta_commits_skip_unchanged_layers():
+    storage = LocalArVizStorage(measure_payload_size=False)
+    client = viz.Client("Component", delta_commits=True, storage=storage)
+    a, b = make_layers()
+
+    client.commit([a, b])
+    client.commit([a, b])
+    a.elements[0].position = (1, 2, 3)
+    client.commit([a, b])
+
+    assert [stats.num_layers for stats in storage.commits] == [2, 0, 1]
+
+
+def test_delta_commits_resend_after_full_resync():
+    storage = LocalArVizStorage(measure_payload_size=False)
+    client = viz.Client("Component", delta_commits=True, storage=storage)
+    layers = make_layers()
+
+    client.commit(layers)
+    client.commit(layers, full_resync=True)
+    client.commit(layers)
+    client.request_full_resync()
+    client.commit(layers)
+
+    assert [stats.num_layers for stats in storage.commits] == [2, 2, 0, 2]
+
+
+def test_delta_commits_resend_all_after_failed_commit():
+    storage = FailingStorage()
+    client = viz.Client("Component", delta_commits=True, storage=storage)
+    a, b = make_layers()
+    client.commit([a, b])
+
+    a.elements[0].position = (1, 2, 3)
+    storage.fail = True
+    with pytest.raises(ConnectionError):
+        client.commit([a, b])
+    storage.fail = False
+
+    client.commit([a, b])
+    assert [stats.num_layers for stats in storage.commits] == [2, 2]
+    client.commit([a, b])
+    assert [stats.num_layers for stats in storage.commits] == [2, 2, 0]
+
+
+def test_commits_without_delta_send_all_layers():
+    storage = LocalArVizStorage(measure_payload_size=False)
+    client = viz.Client("Component", storage=storage)
+    layers = make_layers()
+
+    client.commit(layers)
+    client.commit(layers)
+
+    assert [stats.num_layers for stats in storage.commits] == [2, 2]
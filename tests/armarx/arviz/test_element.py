@@ -93,3 +93,26 @@ def test_element_orientation_set_ori_quat(element):
     ori_quat = tf3d.quaternions.axangle2quat([0, 1, 0], np.pi)
     element.ori_quat = ori_quat
     check_orientation(element, ori_quat=ori_quat)
+
+
+def test_element_content_hash_changes_with_pose(element):
+    content_hash = element.content_hash()
+    assert element.content_hash() == content_hash
+    element.position = (1, 2, 3)
+    assert element.content_hash() != content_hash
+
+
+def test_element_ori_quat_cache_follows_pose_submatrix(element):
+    check_orientation(element, ori_mat=np.eye(3), ori_quat=tf3d.quaternions.qeye())
+    ori_mat = tf3d.axangles.axangle2mat([0, 1, 0], np.pi / 2)
+    element.pose[:3, :3] = ori_mat
+    assert np.allclose(element.ori_quat, tf3d.quaternions.mat2quat(ori_mat))
+
+
+def test_element_without_validation():
+    pose = np.eye(4)
+    color = np.array((1, 2, 3, 4))
+    box = viz.Box("box", pose=pose, position=(1, 2, 3), color=color, validate=False)
+    assert box.pose is pose
+    check_position(box, (1, 2, 3))
+    assert np.array_equal(box.color, (1, 2, 3, 4))
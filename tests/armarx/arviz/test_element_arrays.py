@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+import armarx_core.arviz as viz
+from armarx_core.arviz.testing import LocalArVizStorage
+from armarx_core.math import quaternion
+
+
+def test_box_array_broadcasts_values():
+    boxes = viz.BoxArray("box_", positions=np.zeros((3, 3)), sizes=2.0, colors=(1, 2, 3))
+    assert boxes.ids == ["box_0", "box_1", "box_2"]
+    assert np.array_equal(boxes.sizes, np.full((3, 3), 2.0))
+    assert np.array_equal(boxes.colors, [[1, 2, 3, 255]] * 3)
+    assert np.array_equal(boxes.ori_quats, [[1, 0, 0, 0]] * 3)
+
+
+def test_box_array_ice_data():
+    positions = np.arange(6).reshape(2, 3)
+    boxes = viz.BoxArray("box_", positions=positions, sizes=[(1, 2, 3), (4, 5, 6)])
+    data = boxes.get_ice_data()
+    assert [d.id for d in data] == ["box_0", "box_1"]
+    assert (data[1].pose.x, data[1].pose.y, data[1].pose.z) == (3, 4, 5)
+    assert (data[1].size.e0, data[1].size.e1, data[1].size.e2) == (4, 5, 6)
+
+
+def test_arrow_array_from_to():
+    starts = np.zeros((3, 3))
+    ends = np.array([(0, 2, 0), (0, -3, 0), (4, 0, 0)])
+    arrows = viz.ArrowArray.from_to("arrow_", starts, ends)
+    assert np.allclose(arrows.lengths, [2, 3, 4])
+    assert np.allclose(arrows.directions, [(0, 1, 0), (0, -1, 0), (1, 0, 0)])
+    assert np.allclose(np.linalg.det(quaternion.quat2mat(arrows.ori_quats)), 1)
+
+
+def test_element_array_rejects_values_of_other_lengths():
+    spheres = viz.SphereArray("sphere_", positions=np.zeros((3, 3)), radii=[1, 2, 3])
+    spheres.positions = np.zeros((2, 3))
+    with pytest.raises(ValueError, match="Expected 2"):
+        spheres.get_ice_data()
+
+    spheres.ori_quats = None
+    spheres.colors = None
+    spheres.scales = 1.0
+    with pytest.raises(ValueError, match="Expected 2 radii, but got 3"):
+        spheres.get_ice_data()
+
+    spheres.radii = [1, 2]
+    assert [d.radius for d in spheres.get_ice_data()] == [1, 2]
+
+    boxes = viz.BoxArray("box_", positions=np.zeros((3, 3)), ids="abc")
+    boxes.positions = np.zeros((4, 3))
+    with pytest.raises(ValueError):
+        boxes.get_ice_data()
+
+
+def test_size_models_get_sizes_match_get_size():
+    from armarx_core.arviz.volumetric.size_models import (
+        FixedScaleSizeModel,
+        SizeModel,
+        ValueProportionalSizeModel,
+    )
+
+    voxel_size = np.array([1.0, 2.0, 3.0])
+    xs = np.random.default_rng(0).uniform(size=(50, 3))
+    ys = np.linspace(-1.0, 2.0, len(xs))
+
+    for model in [
+        FixedScaleSizeModel(scale=0.5),
+        ValueProportionalSizeModel(min_absolute_size=0.1),
+        ValueProportionalSizeModel(to_lo_scale=0.2, to_hi_scale=0.8, value_limits=(-1, 1)),
+    ]:
+        expected = SizeModel.get_sizes(model, voxel_size, xs, ys)
+        assert np.allclose(model.get_sizes(voxel_size, xs, ys), expected)
+
+
+def test_volumetric_draw_on_matches_per_voxel_drawing():
+    pytest.importorskip("matplotlib")
+    from armarx_core.arviz.volumetric import Volumetric, get_grid_coordinates
+    from armarx_core.arviz.volumetric.size_models import ValueProportionalSizeModel
+
+    def func(xs):
+        return xs.sum(axis=-1)
+
+    bounds = [(0, 1), (0, 1), (0, 1)]
+    size_model = ValueProportionalSizeModel(min_absolute_size=0.05)
+    volumetric = Volumetric(bounds, num=4, size_model=size_model)
+    layer = viz.Client("Component", storage=LocalArVizStorage()).layer("layer")
+    volumetric.draw_on(func, layer, id_prefix="voxel_")
+    (boxes,) = layer.elements
+
+    # Draw the voxels one by one, as before the vectorization.
+    xs, voxel_size = get_grid_coordinates(bounds, 4, return_voxel_size=True)
+    ys = func(xs)
+    context = size_model.Context()
+    ids, positions, sizes = [], [], []
+    for i, (x, y) in enumerate(zip(xs, ys)):
+        context.i, context.x, context.y = i, x, y
+        size = size_model.get_size(voxel_size, context)
+        if size is not None and min(size) > 0:
+            ids.append(f"voxel_{i:>04}")
+            positions.append(x)
+            sizes.append(size)
+
+    assert 0 < len(ids) < len(xs)
+    assert boxes.ids == ids
+    assert np.allclose(boxes.positions, positions)
+    assert np.allclose(boxes.sizes, sizes)
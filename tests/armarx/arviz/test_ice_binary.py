@@ -0,0 +1,50 @@
+import struct
+
+import numpy as np
+import pytest
+
+import armarx_core.arviz as viz
+from armarx_core.arviz import ice_binary
+
+
+def test_ice_binary_round_trip_of_values():
+    cloud = viz.PointCloud("cloud", points=np.arange(9).reshape(3, 3)).cloud
+    value = {
+        "none": None,
+        "bool": [True, np.bool_(False)],
+        "numbers": (1, np.int32(-2), 0.5, np.float32(1.5)),
+        "text": "äöü",
+        "bytes": b"\x00\x01",
+        "cloud": cloud,
+        "matrix": np.eye(3),
+    }
+    decoded, offset = ice_binary.decode(ice_binary.encode(value))
+
+    assert offset == len(ice_binary.encode(value))
+    assert decoded["none"] is None
+    assert decoded["bool"] == [True, False]
+    assert decoded["numbers"] == [1, -2, 0.5, 1.5]
+    assert decoded["text"] == "äöü"
+    assert decoded["bytes"] == b"\x00\x01"
+    assert decoded["cloud"].dtype == viz.PointCloud.dtype
+    assert np.array_equal(decoded["cloud"], cloud)
+    assert np.array_equal(decoded["matrix"], np.eye(3))
+
+
+def test_ice_binary_round_trip_of_elements():
+    box = viz.Box("box", position=(1, 2, 3), size=(4, 5, 6)).get_ice_data()
+    decoded, _ = ice_binary.decode(ice_binary.encode(box))
+
+    assert type(decoded) is type(box)
+    assert decoded.id == "box"
+    assert (decoded.pose.x, decoded.pose.y, decoded.pose.z) == (1, 2, 3)
+
+
+def test_ice_binary_does_not_decode_other_types():
+    path = "subprocess.Popen".encode()
+    encoded = bytes([10]) + struct.pack("<I", len(path)) + path + struct.pack("<I", 0)
+    with pytest.raises(ValueError):
+        ice_binary.decode(encoded)
+
+    with pytest.raises(TypeError):
+        ice_binary.encode(object())
@@ -0,0 +1,32 @@
+import threading
+
+import armarx_core.arviz as viz
+from armarx_core.arviz.testing import LocalArVizStorage
+
+
+def test_session_dispatches_interactions_and_commits_handler_stage():
+    storage = LocalArVizStorage()
+    client = viz.Client("Component", storage=storage)
+    layer = client.layer("interactive")
+    box = viz.Box("box").enable_interaction(selection=True)
+    layer.add(box)
+
+    handled = threading.Event()
+    received = []
+
+    with client.start_interaction_session(idle_rate_hz=100.0) as session:
+        session.on(layer, handler=lambda i, stage: received.append(("layer", i.element)))
+
+        @session.on(layer, box)
+        def handle_box(interaction, stage):
+            received.append(("element", interaction.element))
+            box.position = (1, 2, 3)
+            stage.add(layer)
+            handled.set()
+
+        session.commit(layer)
+        storage.add_interaction("Component", "interactive", "box")
+        assert handled.wait(timeout=5.0)
+
+    assert received == [("element", "box"), ("layer", "box")]
+    assert storage.layers[("Component", "interactive")].elements[0].pose.x == 1
@@ -0,0 +1,22 @@
+import armarx_core.arviz as viz
+from armarx_core.arviz.testing import LocalArVizStorage
+
+
+def test_commit_records_statistics_and_returns_interactions():
+    storage = LocalArVizStorage()
+    client = viz.Client("Component", storage=storage)
+
+    stage = client.begin_stage(commit_on_exit=False)
+    layer = stage.layer("interactive")
+    layer.add(viz.Box("box").enable_interaction(selection=True))
+    stage.request_interaction(layer)
+
+    storage.add_interaction("Component", "interactive", "box")
+    storage.add_interaction("Other", "interactive", "box")
+    result = client.commit(stage)
+
+    assert [(i.layer, i.element) for i in result.interactions] == [("interactive", "box")]
+    assert storage.num_commits == 1
+    assert storage.commits[0].num_elements == 1
+    assert storage.commits[0].payload_bytes > 0
+    assert ("Component", "interactive") in storage.layers
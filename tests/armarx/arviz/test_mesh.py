@@ -0,0 +1,43 @@
+import numpy as np
+
+import armarx_core.arviz as viz
+
+
+def make_grid2d_faces_loop(num_x, num_y):
+    """The previous implementation of `Mesh.make_grid2d_faces`."""
+    faces = np.zeros((2 * (num_x - 1) * (num_y - 1), 6))
+    i = 0
+    for x in range(num_x - 1):
+        for y in range(num_y - 1):
+            v0 = y * num_x + x
+            v1 = (y + 1) * num_x + (x + 1)
+            v2 = (y + 1) * num_x + x
+            faces[i] = v0, v1, v2, v0, v1, v2
+            i += 1
+
+            v1 = y * num_x + (x + 1)
+            v2 = (y + 1) * num_x + (x + 1)
+            faces[i] = v0, v1, v2, v0, v1, v2
+            i += 1
+    return faces
+
+
+def test_make_grid2d_faces_matches_loop():
+    for num_x, num_y in [(2, 2), (3, 4), (5, 2)]:
+        faces = viz.Mesh.make_grid2d_faces(num_x, num_y)
+        expected = make_grid2d_faces_loop(num_x, num_y)
+
+        assert faces.shape == expected.shape
+        assert np.issubdtype(faces.dtype, np.integer)
+        assert np.array_equal(faces, expected)
+
+
+def test_make_grid2d_faces_as_mesh_faces():
+    mesh = viz.Mesh("mesh")
+    mesh.faces = viz.Mesh.make_grid2d_faces(3, 4)
+    mesh_loop = viz.Mesh("mesh")
+    mesh_loop.faces = make_grid2d_faces_loop(3, 4)
+
+    assert mesh.faces.dtype == mesh_loop.faces.dtype
+    assert np.array_equal(mesh.faces, mesh_loop.faces)
+    assert all(type(i) is int for i in mesh.faces.reshape(-1).tolist())
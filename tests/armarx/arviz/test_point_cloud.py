@@ -0,0 +1,56 @@
+import numpy as np
+
+import armarx_core.arviz as viz
+
+
+def test_point_cloud_points_default_color():
+    pc = viz.PointCloud("pc", points=np.arange(6).reshape(2, 3))
+    assert np.array_equal(pc.cloud["position"], [[0, 1, 2], [3, 4, 5]])
+    assert np.array_equal(pc.points[:, 3:], [[100, 100, 100, 255]] * 2)
+
+
+def test_point_cloud_modify_point_colors_in_place():
+    pc = viz.PointCloud("pc", points=np.zeros((3, 3)))
+    pc.point_colors[:, 0] = 255
+    assert np.array_equal(pc.cloud["r"], [255] * 3)
+
+
+def test_point_cloud_from_packed_color():
+    dtype = np.dtype([("color", np.uint32), ("position", np.float32, (3,))])
+    points = np.zeros(4, dtype=dtype)
+    points["position"] = (1, 2, 3)
+    points["color"] = np.frombuffer(bytes([10, 20, 30, 40]), dtype=np.uint32)[0]
+
+    pc = viz.PointCloud("pc", points=points)
+    assert np.array_equal(pc.cloud["position"], [[1, 2, 3]] * 4)
+    assert np.array_equal(pc.points[:, 3:], [[10, 20, 30, 40]] * 4)
+
+
+def test_point_cloud_reuses_buffer():
+    pc = viz.PointCloud("pc", points=np.zeros((10, 3)))
+    buffer = pc.cloud.base
+    pc.points = np.ones((5, 7))
+    assert pc.cloud.base is buffer
+    assert len(pc.cloud) == 5
+
+
+def test_point_cloud_does_not_modify_committed_data():
+    pc = viz.PointCloud("pc", points=np.zeros((10, 3)))
+    data = viz.Layer("Component", "layer", [pc]).data()
+    committed = data.elements[0].points
+
+    pc.points = np.ones((5, 7))
+    pc.point_positions = np.full((5, 3), 2.0)
+    assert np.array_equal(committed["position"], np.zeros((10, 3)))
+    assert np.array_equal(pc.cloud["position"], np.full((5, 3), 2.0))
+
+
+def test_point_cloud_keeps_points_modified_after_commit():
+    pc = viz.PointCloud("pc", points=np.zeros((3, 3)))
+    layer = viz.Layer("Component", "layer", [pc])
+    points = pc.points
+    layer.data()
+
+    points[:, 0] = 1.0
+    assert np.array_equal(pc.cloud["position"][:, 0], [1.0] * 3)
+    assert np.array_equal(layer.data().elements[0].points["position"][:, 0], [1.0] * 3)
@@ -0,0 +1,62 @@
+import warnings
+
+import numpy as np
+
+import armarx_core.arviz as viz
+
+
+def make_cloud(num_points):
+    dtype = np.dtype([("color", np.uint32), ("position", np.float32, (3,))])
+    cloud = np.zeros(num_points, dtype=dtype)
+    rng = np.random.default_rng(0)
+    cloud["position"] = rng.uniform(0, 1000, (num_points, 3))
+    cloud["color"] = np.arange(num_points)
+    return cloud
+
+
+def test_point_cloud_lod_respects_budget():
+    cloud = make_cloud(10000)
+    cloud["position"][:10] = np.nan
+    for method in viz.PointCloudLOD.methods:
+        lod = viz.PointCloudLOD("pc", max_points=1000, method=method, seed=0)
+        element = lod.update(cloud, viewpoint=(0, 0, 0))
+        assert lod.num_input_points == 9990
+        assert 0 < element.num_points <= 1000
+        assert np.isfinite(element.cloud["position"]).all()
+
+
+def test_point_cloud_lod_preserves_colors():
+    cloud = make_cloud(5000)
+    element = viz.PointCloudLOD("pc", max_points=100, method="random").update(cloud)
+    # The colors are the indices of the points.
+    points = element.cloud
+    colors = sum(points[c].astype(np.int64) << (8 * i) for i, c in enumerate("rgba"))
+    assert np.array_equal(cloud["position"][colors], element.cloud["position"])
+
+
+def test_point_cloud_lod_reuses_unchanged_cloud():
+    cloud = make_cloud(5000)
+    lod = viz.PointCloudLOD("pc", max_points=100, method="random")
+    points = lod.update(cloud).cloud.copy()
+    assert np.array_equal(lod.update(cloud).cloud, points)
+    cloud["position"] += 1
+    assert not np.array_equal(lod.update(cloud).cloud, points)
+
+
+def test_point_cloud_lod_handles_duplicate_points():
+    cloud = make_cloud(5000)
+    cloud["position"] = (1e6, 1e6, 1e6)
+    lod = viz.PointCloudLOD("pc", max_points=100, method="voxel")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        element = lod.update(cloud)
+    assert element.num_points == 1
+    # The voxel size did not converge, so it is not kept.
+    assert lod.voxel_size is None
+
+    cloud = make_cloud(5000)
+    cloud["position"][:, 2] = 0
+    element = lod.update(cloud)
+    assert 70 <= element.num_points <= 100
+    assert lod.voxel_size >= lod.min_voxel_size
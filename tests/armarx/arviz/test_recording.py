@@ -0,0 +1,215 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import armarx_core.arviz as viz
+from armarx_core.arviz.recording import METADATA_FILENAME, ArVizRecordingWriter
+from armarx_core.arviz.testing import LocalArVizStorage
+
+
+class FailingStorage(LocalArVizStorage):
+    def __init__(self):
+        super().__init__(measure_payload_size=False)
+        self.fail = False
+
+    def commitAndReceiveInteractions(self, input, c=None):
+        if self.fail:
+            raise ConnectionError("Storage unreachable.")
+        return super().commitAndReceiveInteractions(input, c)
+
+
+class TimedStorage(LocalArVizStorage):
+    """Records the time of each commit, and delays the first one."""
+
+    def __init__(self, first_delay: float = 0.0):
+        super().__init__(measure_payload_size=False)
+        self.first_delay = first_delay
+        self.commit_times = []
+
+    def commitAndReceiveInteractions(self, input, c=None):
+        self.commit_times.append(time.monotonic())
+        if len(self.commit_times) == 1:
+            time.sleep(self.first_delay)
+        return super().commitAndReceiveInteractions(input, c)
+
+
+def test_recording_round_trip_deduplicates_elements(tmp_path):
+    static = viz.Layer("Component", "static", [viz.Box(f"box{i}") for i in range(10)])
+    moving = viz.Layer("Component", "moving", [viz.Sphere("sphere")])
+
+    with ArVizRecordingWriter(str(tmp_path)) as writer:
+        for i in range(3):
+            moving.elements[0].position = (i, 0, 0)
+            writer.write([static.data_and_hash(), moving.data_and_hash()], time_usec=i)
+        assert writer.num_elements == 13
+        assert writer.num_stored_elements == 13
+
+    with viz.ArVizRecordingReader(str(tmp_path)) as recording:
+        assert list(recording.times_usec) == [0, 1, 2]
+        static_update, moving_update = recording.read(2)
+        assert [e.id for e in static_update.elements] == [f"box{i}" for i in range(10)]
+        assert moving_update.name == "moving"
+        assert moving_update.elements[0].pose.x == 2
+
+
+def test_recording_references_blobs_of_previous_chunks(tmp_path):
+    static = viz.Layer("Component", "static", [viz.Box(f"box{i}") for i in range(3)])
+    moving = viz.Layer("Component", "moving", [viz.Sphere("sphere")])
+
+    # Each commit starts a new chunk.
+    with ArVizRecordingWriter(str(tmp_path), chunk_size_bytes=1) as writer:
+        for i, x in enumerate([0, 1, 0]):
+            moving.elements[0].position = (x, 0, 0)
+            writer.write([static.data_and_hash(), moving.data_and_hash()], time_usec=i)
+        # The static layer and the sphere at x = 0 are only stored in the first chunk.
+        assert writer.num_stored_elements == 5
+        assert len(writer.chunks) == 4
+
+    with viz.ArVizRecordingReader(str(tmp_path)) as recording:
+        assert list(recording.chunk_of_commit) == [0, 1, 2]
+        for i, x in enumerate([0, 1, 0]):
+            static_update, moving_update = recording.read(i)
+            assert [e.id for e in static_update.elements] == ["box0", "box1", "box2"]
+            assert moving_update.elements[0].pose.x == x
+
+
+def test_recorder_drops_commits_when_full_and_writes_queue_on_close(tmp_path):
+    layer = viz.Layer("Component", "layer", [viz.Sphere("sphere")])
+    recorder = viz.ArVizRecorder(str(tmp_path), max_queue_size=2, start=False)
+
+    assert recorder.record([layer.data_and_hash()], time_usec=1)
+    assert recorder.record([layer.data()], time_usec=2)
+    assert not recorder.record([layer.data_and_hash()], time_usec=3)
+    stats = recorder.statistics()
+    assert (stats.queue_depth, stats.num_dropped, stats.num_recorded) == (2, 1, 0)
+
+    recorder.close()
+    stats = recorder.statistics()
+    assert (stats.queue_depth, stats.num_recorded, stats.num_errors) == (0, 2, 0)
+    with viz.ArVizRecordingReader(str(tmp_path)) as recording:
+        assert list(recording.times_usec) == [1, 2]
+
+
+def test_recorder_flush_makes_commits_readable(tmp_path):
+    layer = viz.Layer("Component", "layer", [viz.Sphere("sphere")])
+    with viz.ArVizRecorder(str(tmp_path)) as recorder:
+        for i in range(3):
+            recorder.record([layer.data_and_hash()], time_usec=i)
+        recorder.flush()
+
+        assert recorder.statistics().num_recorded == 3
+        assert os.path.isfile(os.path.join(str(tmp_path), METADATA_FILENAME))
+        with viz.ArVizRecordingReader(str(tmp_path)) as recording:
+            assert list(recording.times_usec) == [0, 1, 2]
+
+
+def test_recorder_records_state_at_commit(tmp_path):
+    cloud = viz.PointCloud("cloud", points=np.zeros((3, 3)))
+    sphere = viz.Sphere("sphere")
+    layer = viz.Layer("Component", "layer", [cloud, sphere])
+    recorder = viz.ArVizRecorder(str(tmp_path), start=False)
+
+    recorder.record([layer.data_and_hash()], time_usec=0)
+    cloud.points = np.ones((3, 3))
+    sphere.position = (1, 2, 3)
+    recorder.record([layer.data_and_hash()], time_usec=1)
+    recorder.close()
+
+    with viz.ArVizRecordingReader(str(tmp_path)) as recording:
+        for i, x in enumerate([0, 1]):
+            cloud_data, sphere_data = recording.read(i)[0].elements
+            assert np.array_equal(cloud_data.points["position"], np.full((3, 3), x))
+            assert sphere_data.pose.x == x
+
+
+def test_recording_client_records_successful_commits(tmp_path):
+    storage = FailingStorage()
+    client = viz.RecordingClient(viz.Client("Component", storage=storage), str(tmp_path))
+    layer = client.layer("layer")
+    layer.add(viz.Sphere("sphere"))
+
+    client.commit(layer)
+    storage.fail = True
+    with pytest.raises(ConnectionError):
+        client.commit(layer)
+    storage.fail = False
+
+    layer.elements[0].position = (1, 0, 0)
+    with client.begin_stage() as stage:
+        stage.add(layer)
+    with client.start_async(max_rate_hz=None) as committer:
+        layer.elements[0].position = (2, 0, 0)
+        committer.commit(layer)
+    client.close_recording()
+
+    assert client.component_name == "Component"
+    assert storage.num_commits == 3
+    with viz.ArVizRecordingReader(str(tmp_path)) as recording:
+        assert len(recording) == 3
+        positions = [recording.read(i)[0].elements[0].pose.x for i in range(3)]
+        assert positions == [0, 1, 2]
+
+
+def test_recording_reader_rejects_other_versions(tmp_path):
+    with ArVizRecordingWriter(str(tmp_path)):
+        pass
+    filename = os.path.join(str(tmp_path), METADATA_FILENAME)
+    with open(filename) as file:
+        metadata = file.read()
+    with open(filename, "w") as file:
+        file.write(metadata.replace('"version": 2', '"version": 1'))
+
+    with pytest.raises(ValueError):
+        viz.ArVizRecordingReader(str(tmp_path))
+
+
+def write_recording(path, times_usec):
+    """Write commits of layer "a" at the given times, and of layer "b" at the last one."""
+    a = viz.Layer("Component", "a", [viz.Sphere("sphere")])
+    b = viz.Layer("Component", "b", [viz.Box("box")])
+    with ArVizRecordingWriter(path) as writer:
+        for i, time_usec in enumerate(times_usec):
+            a.elements[0].position = (i, 0, 0)
+            updates = [a.data_and_hash()]
+            if i == len(times_usec) - 1:
+                updates.append(b.data_and_hash())
+            writer.write(updates, time_usec=time_usec)
+
+
+def test_replayer_keeps_pace(tmp_path):
+    write_recording(str(tmp_path), [0, 100000, 200000])
+    storage = TimedStorage()
+
+    with viz.ArVizRecordingReader(str(tmp_path)) as recording:
+        replayer = viz.ArVizReplayer(recording)
+        assert replayer.replay(viz.Client("Replay", storage=storage), speed=2.0) == 3
+        assert replayer.replay(storage, speed=None) == 3
+
+    intervals = np.diff(storage.commit_times[:3])
+    assert (intervals >= 0.05 - 1e-3).all()
+    assert storage.commit_times[5] - storage.commit_times[3] < 0.05
+
+
+def test_replayer_merges_commits_when_falling_behind(tmp_path):
+    write_recording(str(tmp_path), [0, 100000, 200000])
+    storage = TimedStorage(first_delay=0.3)
+
+    assert viz.ArVizReplayer(str(tmp_path)).replay(storage, speed=1.0) == 2
+
+    assert [stats.num_layers for stats in storage.commits] == [1, 2]
+    assert storage.layers[("Component", "a")].elements[0].pose.x == 2
+    assert ("Component", "b") in storage.layers
+
+
+def test_replayer_stops(tmp_path):
+    write_recording(str(tmp_path), [0, 10000000])
+    storage = TimedStorage()
+    stop = threading.Event()
+    threading.Timer(0.05, stop.set).start()
+
+    start = time.monotonic()
+    assert viz.ArVizReplayer(str(tmp_path)).replay(storage, stop=stop) == 1
+    assert time.monotonic() - start < 5.0
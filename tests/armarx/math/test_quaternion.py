@@ -0,0 +1,48 @@
+import numpy as np
+import transforms3d as tf3d
+
+from armarx_core.math import quaternion
+
+
+def random_quats(num: int) -> np.ndarray:
+    rng = np.random.default_rng(42)
+    quats = rng.normal(size=(num, 4))
+    quats /= np.linalg.norm(quats, axis=-1, keepdims=True)
+    # Canonical sign, as returned by mat2quat().
+    return np.where(quats[:, :1] < 0, -quats, quats)
+
+
+def test_quat2mat_matches_transforms3d():
+    quats = random_quats(100)
+    expected = np.stack([tf3d.quaternions.quat2mat(q) for q in quats])
+    assert np.allclose(quaternion.quat2mat(quats), expected)
+
+
+def test_mat2quat_inverts_quat2mat():
+    quats = random_quats(100)
+    assert np.allclose(quaternion.mat2quat(quaternion.quat2mat(quats)), quats)
+
+
+def test_mat2quat_identity():
+    assert np.allclose(quaternion.mat2quat(np.eye(3)), (1, 0, 0, 0))
+
+
+def test_slerp_halfway():
+    q0 = tf3d.quaternions.axangle2quat((0, 0, 1), 0)
+    q1 = tf3d.quaternions.axangle2quat((0, 0, 1), np.pi / 2)
+    expected = tf3d.quaternions.axangle2quat((0, 0, 1), np.pi / 4)
+    assert np.allclose(quaternion.slerp(q0, q1, 0.5), expected)
+
+
+def test_slerp_takes_shortest_path():
+    q0 = tf3d.quaternions.axangle2quat((0, 0, 1), 0)
+    q1 = tf3d.quaternions.axangle2quat((0, 0, 1), np.pi / 2)
+    expected = tf3d.quaternions.axangle2quat((0, 0, 1), np.pi / 4)
+    assert np.allclose(quaternion.slerp(q0, -q1, 0.5), expected)
+
+
+def test_slerp_endpoints_batched():
+    quats = random_quats(10)
+    q0, q1 = quats[:5], quats[5:]
+    assert np.allclose(np.abs(np.sum(quaternion.slerp(q0, q1, np.zeros(5)) * q0, axis=-1)), 1)
+    assert np.allclose(np.abs(np.sum(quaternion.slerp(q0, q1, np.ones(5)) * q1, axis=-1)), 1)